@@ -0,0 +1,225 @@
+"""
+Agent Pool for My.app
+Several instances behind one agent name, so concurrent runs don't share state
+"""
+
+from typing import Dict, Any, AsyncIterator, Callable, Deque, List, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+
+class _Instance:
+    """One pooled agent and its usage counters"""
+    
+    __slots__ = ("id", "agent", "busy", "runs", "idle_since")
+    
+    def __init__(self, instance_id: int, agent):
+        self.id = instance_id
+        self.agent = agent
+        self.busy = False
+        self.runs = 0
+        self.idle_since = time.monotonic()
+
+
+class AgentPool:
+    """
+    Instances of one registered agent, each serving one run at a time
+    
+    lease() hands out the least-busy idle instance (fewest runs so far).
+    When every instance is busy a new one is cloned from the registered
+    agent, up to max_size; past that, callers queue for the next instance
+    released. Instances above min_size that sit idle for idle_timeout
+    seconds are dropped again.
+    """
+    
+    def __init__(
+        self,
+        agent,
+        min_size: int = 1,
+        max_size: int = 1,
+        idle_timeout: float = 60.0,
+        on_change: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize AgentPool
+        
+        Args:
+            agent: Registered agent; serves as the first instance and the template for clones
+            min_size: Instances always kept
+            max_size: Instances the pool may grow to
+            idle_timeout: Seconds an instance above min_size may stay idle
+            on_change: Called with the agent name when pool or instance state changes
+        """
+        self.name = agent.name
+        self.prototype = agent
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.idle_timeout = idle_timeout
+        self.on_change = on_change
+        self._next_id = 0
+        self._instances: List[_Instance] = []
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_released: Optional[_Instance] = None
+        self.leases = 0
+        self.queued_leases = 0
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.peak_size = 0
+        self._add(agent)
+        while len(self._instances) < self.min_size:
+            self._add(agent.clone())
+    
+    def __len__(self) -> int:
+        return len(self._instances)
+    
+    @property
+    def busy(self) -> int:
+        return sum(1 for instance in self._instances if instance.busy)
+    
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+    
+    @property
+    def status(self) -> str:
+        """"running" while any instance runs, else the status of the last one released"""
+        if self.busy:
+            return "running"
+        instance = self._last_released or self._instances[0]
+        return instance.agent.status
+    
+    @property
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        """Result of the most recently released instance"""
+        instance = self._last_released or self._instances[0]
+        return instance.agent.last_result
+    
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.name)
+    
+    def _add(self, agent) -> _Instance:
+        agent._listener = self.on_change
+        instance = _Instance(self._next_id, agent)
+        self._next_id += 1
+        self._instances.append(instance)
+        self.peak_size = max(self.peak_size, len(self._instances))
+        return instance
+    
+    def _reap(self):
+        """Drop clones above min_size that have been idle too long"""
+        now = time.monotonic()
+        for instance in reversed(self._instances):
+            if len(self._instances) <= self.min_size:
+                break
+            if (
+                instance.agent is not self.prototype
+                and not instance.busy
+                and now - instance.idle_since > self.idle_timeout
+            ):
+                self._instances.remove(instance)
+                instance.agent._listener = None
+                if self._last_released is instance:
+                    self._last_released = None
+                self.scale_downs += 1
+    
+    def _take(self, instance: _Instance) -> _Instance:
+        instance.busy = True
+        instance.runs += 1
+        self.leases += 1
+        return instance
+    
+    async def _acquire(self, timeout: Optional[float]) -> _Instance:
+        self._reap()
+        idle = [instance for instance in self._instances if not instance.busy]
+        if idle:
+            return self._take(min(idle, key=lambda instance: instance.runs))
+        if len(self._instances) < self.max_size:
+            self.scale_ups += 1
+            instance = self._take(self._add(self.prototype.clone()))
+            self._changed()
+            return instance
+        
+        # Every instance busy and the pool is full: queue for the next release
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued_leases += 1
+        self._changed()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Handed an instance just as the wait was abandoned
+                self._release(future.result())
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+                self._changed()
+    
+    def _release(self, instance: _Instance):
+        self._last_released = instance
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                instance.runs += 1
+                self.leases += 1
+                future.set_result(instance)
+                return
+        instance.busy = False
+        instance.idle_since = time.monotonic()
+        self._reap()
+    
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        Hold an instance for one run
+        
+        Args:
+            timeout: Seconds to wait when every instance is busy (None for no limit)
+        
+        Yields:
+            The agent instance
+        
+        Raises:
+            asyncio.TimeoutError: No instance freed up in time
+        """
+        instance = await self._acquire(timeout)
+        try:
+            yield instance.agent
+        finally:
+            self._release(instance)
+    
+    def close(self):
+        """Stop reporting instance changes (the agent was unregistered)"""
+        self.on_change = None
+        for instance in self._instances:
+            instance.agent._listener = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size, utilization and per-instance status"""
+        busy = self.busy
+        return {
+            "size": len(self._instances),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "busy": busy,
+            "waiting": self.waiting,
+            "utilization": round(busy / len(self._instances), 3),
+            "peak_size": self.peak_size,
+            "leases": self.leases,
+            "queued_leases": self.queued_leases,
+            "scale_ups": self.scale_ups,
+            "scale_downs": self.scale_downs,
+            "instances": [
+                {
+                    "instance": instance.id,
+                    "status": instance.agent.status,
+                    "busy": instance.busy,
+                    "runs": instance.runs
+                }
+                for instance in self._instances
+            ],
+        }
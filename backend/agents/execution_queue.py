@@ -0,0 +1,313 @@
+"""
+Execution Queue for My.app
+Background agent runs on a worker pool, tracked in db.executions
+"""
+
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import asyncio
+
+from agents.parent_controller import ParentController, parent_controller
+from config.settings import settings
+from models import Execution, ExecutionStatus
+from utils.database import db, InMemoryDatabase
+from utils.deadline import Deadline
+from utils.exceptions import NotFoundError, RateLimitError
+
+
+FINISHED_STATUSES = (
+    ExecutionStatus.COMPLETED.value,
+    ExecutionStatus.FAILED.value,
+    ExecutionStatus.CANCELLED.value,
+)
+
+
+class ExecutionQueue:
+    """
+    Bounded queue of agent runs served by a fixed pool of workers
+    
+    submit() stores a pending Execution and returns at once; a worker picks
+    it up, runs it through the ParentController and records the results.
+    Callers poll with get(), block with wait() or stop a run with cancel().
+    Database calls go through db.call(), so a SQLite round trip never
+    holds up the event loop.
+    """
+    
+    def __init__(
+        self,
+        controller: ParentController,
+        database: InMemoryDatabase,
+        workers: int = 4,
+        max_queued: int = 100,
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.25
+    ):
+        """
+        Initialize ExecutionQueue
+        
+        Args:
+            controller: Controller that runs the agents
+            database: Store holding execution records
+            workers: Number of concurrent worker tasks
+            max_queued: Pending executions accepted before submit() is refused
+            timeout: Default run timeout in seconds (None for no limit)
+            poll_interval: Seconds between checks when waiting on another worker's execution
+        """
+        self.controller = controller
+        self.db = database
+        self.workers = workers
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._finished: Dict[str, asyncio.Event] = {}
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+    
+    async def startup(self):
+        """Start the worker pool"""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(i)) for i in range(self.workers)
+            ]
+    
+    async def shutdown(self):
+        """Stop the workers, cancelling running executions"""
+        workers, self._workers = self._workers, []
+        for task in list(self._running.values()):
+            task.cancel()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def submit(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        target_agents: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        first_n: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue an agent run
+        
+        Args:
+            prompt: Input prompt
+            context: Context dictionary
+            target_agents: List of agent names to run (all if None)
+            timeout: Run timeout in seconds, counted from when a worker starts it
+            max_concurrency: Agents of this run executed at once
+            first_n: Finish once this many agents succeed
+        
+        Returns:
+            The pending execution record
+        
+        Raises:
+            RateLimitError: The queue is full
+        """
+        if self._queue.full():
+            self.rejected += 1
+            raise RateLimitError(f"Execution queue is full ({self._queue.maxsize} pending)")
+        
+        execution = Execution(
+            agent_id=",".join(target_agents) if target_agents else "all",
+            agent_name="ParentController",
+            prompt=prompt,
+            target_agents=target_agents
+        ).model_dump(mode="json", exclude={"id", "started_at"})
+        execution_id = await self.db.call("add_execution", execution["agent_id"], execution)
+        try:
+            self._queue.put_nowait((execution_id, {
+                "prompt": prompt,
+                "context": context,
+                "target_agents": target_agents,
+                "timeout": timeout,
+                "max_concurrency": max_concurrency,
+                "first_n": first_n
+            }))
+        except asyncio.QueueFull:
+            # Filled up while the record was being written
+            self.rejected += 1
+            await self.db.call("update_execution", execution_id, {
+                "status": ExecutionStatus.CANCELLED.value,
+                "error": "Execution queue is full"
+            })
+            raise RateLimitError(f"Execution queue is full ({self._queue.maxsize} pending)")
+        self._finished[execution_id] = asyncio.Event()
+        self.submitted += 1
+        return await self.db.call("get_execution", execution_id)
+    
+    async def get(self, execution_id: str) -> Dict[str, Any]:
+        """
+        Get an execution record
+        
+        Raises:
+            NotFoundError: Unknown execution ID
+        """
+        execution = await self.db.call("get_execution", execution_id)
+        if execution is None:
+            raise NotFoundError(f"Execution {execution_id} not found")
+        return execution
+    
+    async def wait(self, execution_id: str, timeout: float) -> Dict[str, Any]:
+        """
+        Wait up to timeout seconds for an execution to finish
+        
+        Returns:
+            The execution record, finished or not
+        
+        Raises:
+            NotFoundError: Unknown execution ID
+        """
+        execution = await self.get(execution_id)
+        if execution["status"] in FINISHED_STATUSES:
+            return execution
+        event = self._finished.get(execution_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.get(execution_id)
+        
+        # Queued by another worker process; poll the shared store
+        deadline = Deadline.after(timeout)
+        while not deadline.expired():
+            await asyncio.sleep(min(self.poll_interval, deadline.remaining()))
+            execution = await self.db.call("get_execution", execution_id)
+            if execution["status"] in FINISHED_STATUSES:
+                break
+        return execution
+    
+    async def cancel(self, execution_id: str) -> Dict[str, Any]:
+        """
+        Cancel a pending or running execution
+        
+        Returns:
+            The execution record (unchanged if it had already finished)
+        
+        Raises:
+            NotFoundError: Unknown execution ID
+        """
+        execution = await self.get(execution_id)
+        if execution["status"] in FINISHED_STATUSES:
+            return execution
+        
+        task = self._running.get(execution_id)
+        if task is not None:
+            # The worker records the cancellation when the task unwinds
+            task.cancel()
+        else:
+            # Still queued (or running in another worker process, whose
+            # result is then discarded); workers skip it when dequeued
+            await self._finish(execution_id, {"status": ExecutionStatus.CANCELLED.value})
+        return await self.get(execution_id)
+    
+    async def _finish(self, execution_id: str, updates: Dict[str, Any]):
+        """Record the final state and wake waiters"""
+        execution = await self.db.call("get_execution", execution_id)
+        if execution is not None and execution["status"] == ExecutionStatus.CANCELLED.value:
+            # Cancelled from another worker process while running here
+            pass
+        else:
+            updates["completed_at"] = datetime.now().isoformat()
+            await self.db.call("update_execution", execution_id, updates)
+            status = updates["status"]
+            if status == ExecutionStatus.COMPLETED.value:
+                self.completed += 1
+            elif status == ExecutionStatus.FAILED.value:
+                self.failed += 1
+            else:
+                self.cancelled += 1
+        event = self._finished.pop(execution_id, None)
+        if event is not None:
+            event.set()
+    
+    async def _worker(self, index: int):
+        """Take executions off the queue and run them one at a time"""
+        while True:
+            execution_id, job = await self._queue.get()
+            try:
+                execution = await self.db.call("get_execution", execution_id)
+                if execution is None or execution["status"] in FINISHED_STATUSES:
+                    continue
+                task = asyncio.create_task(self._run(execution_id, job))
+                self._running[execution_id] = task
+                try:
+                    await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    if asyncio.current_task().cancelling():
+                        # The worker itself is shutting down
+                        task.cancel()
+                        raise
+                finally:
+                    self._running.pop(execution_id, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"ExecutionQueue worker {index} error on {execution_id}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, execution_id: str, job: Dict[str, Any]):
+        """Run one execution and record its outcome"""
+        await self.db.call("update_execution", execution_id, {
+            "status": ExecutionStatus.RUNNING.value,
+            "started_at": datetime.now().isoformat()
+        })
+        timeout = job["timeout"] if job["timeout"] is not None else self.timeout
+        if timeout is not None and self.timeout is not None:
+            timeout = min(timeout, self.timeout)
+        try:
+            results = await self.controller.run_agents(
+                job["prompt"],
+                job["context"],
+                job["target_agents"],
+                deadline=Deadline.after(timeout),
+                max_concurrency=job["max_concurrency"],
+                first_n=job["first_n"]
+            )
+        except asyncio.CancelledError:
+            # Shielded so a second cancel (shutdown) can't leave the record running
+            await asyncio.shield(self._finish(execution_id, {"status": ExecutionStatus.CANCELLED.value}))
+            raise
+        except Exception as e:
+            await self._finish(execution_id, {"status": ExecutionStatus.FAILED.value, "error": str(e)})
+            return
+        
+        timed_out = [r["agent"] for r in results if r.get("status") == "timeout"]
+        await self._finish(execution_id, {
+            "status": ExecutionStatus.COMPLETED.value,
+            "results": results,
+            "timed_out_agents": timed_out,
+            "partial": bool(timed_out)
+        })
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, worker usage and counters"""
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+# Global execution queue instance
+execution_queue = ExecutionQueue(
+    parent_controller,
+    db,
+    workers=settings.EXECUTION_WORKERS,
+    max_queued=settings.EXECUTION_QUEUE_SIZE,
+    timeout=settings.EXECUTION_TIMEOUT
+)
@@ -3,40 +3,218 @@ Parent Controller - Main agent orchestration and management
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional, Callable
+import copy
+import importlib
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Set
+
+from agents.agent_pool import AgentPool
+from agents.process_pool import AgentProcessPool
+from config.settings import settings
+from models import AgentProfile
+from tools.llm_provider import LLMProvider, llm_provider
+from tools.response_cache import ResponseCache, make_memo_key
+from utils.database import db
+from utils.deadline import Deadline
+from utils.exceptions import AgentException, DeadlineExceededError, ValidationException
+from utils.shared_state import LocalStateStore, state_store
+
+
+def _timeout_result(agent_name: str, reason: str = "Agent timed out") -> Dict[str, Any]:
+    """Result recorded for an agent that did not finish in time"""
+    return {
+        "agent": agent_name,
+        "error": reason,
+        "status": "timeout",
+        "timed_out": True
+    }
+
+
+def _plan_pipeline(nodes: List[Dict[str, Any]]) -> List[str]:
+    """
+    Check a pipeline graph and order its nodes
+    
+    Args:
+        nodes: Nodes with "id", "agent" and optional "depends_on"
+    
+    Returns:
+        Node IDs in a topological order
+    
+    Raises:
+        ValidationException: Duplicate or unknown node IDs, or a cycle
+    """
+    graph: Dict[str, List[str]] = {}
+    for node in nodes:
+        if node["id"] in graph:
+            raise ValidationException(f"Duplicate pipeline node: {node['id']}")
+        graph[node["id"]] = list(node.get("depends_on") or [])
+    
+    waiting = {node_id: len(set(deps)) for node_id, deps in graph.items()}
+    dependents: Dict[str, List[str]] = {node_id: [] for node_id in graph}
+    for node_id, deps in graph.items():
+        for dep in set(deps):
+            if dep not in graph:
+                raise ValidationException(f"Pipeline node {node_id} depends on unknown node {dep}")
+            dependents[dep].append(node_id)
+    
+    order = [node_id for node_id, count in waiting.items() if count == 0]
+    for node_id in order:
+        for dependent in dependents[node_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                order.append(dependent)
+    if len(order) != len(graph):
+        cycle = sorted(node_id for node_id in graph if node_id not in order)
+        raise ValidationException(f"Pipeline has a cycle through: {', '.join(cycle)}")
+    return order
 
 
 class BaseAgent:
-    """Base class for agents"""
+    """
+    Base class for agents
+    
+    Agents doing heavy local work set cpu_bound = True and implement
+    compute(); the controller then runs them in its process pool instead
+    of on the event loop. Agents whose result depends only on the prompt
+    and context set memoize = True to have the controller cache results.
+    """
     
-    def __init__(self, name: str):
+    cpu_bound = False
+    memoize = False
+    
+    def __init__(self, name: str, llm: Optional[LLMProvider] = None):
         self.name = name
+        self.llm = llm
+        self._listener: Optional[Callable[[str], None]] = None
         self.status = "idle"
         self.last_result = None
     
-    async def run(self, prompt: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes without the provider, listener or previous result
+        state = self.__dict__.copy()
+        state["llm"] = None
+        state["_listener"] = None
+        state["_last_result"] = None
+        return state
+    
+    def clone(self) -> "BaseAgent":
+        """Fresh instance for an agent pool, sharing the LLM provider but not run state"""
+        agent = copy.copy(self)  # via __getstate__: no provider, listener or last result
+        agent.llm = self.llm
+        agent._status = "idle"
+        return agent
+    
+    def _changed(self):
+        listener = getattr(self, "_listener", None)
+        if listener is not None:
+            listener(self.name)
+    
+    @property
+    def status(self) -> str:
+        return self._status
+    
+    @status.setter
+    def status(self, value: str):
+        if value != getattr(self, "_status", None):
+            self._status = value
+            self._changed()
+    
+    @property
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        return self._last_result
+    
+    @last_result.setter
+    def last_result(self, value: Optional[Dict[str, Any]]):
+        self._last_result = value
+        self._changed()
+    
+    def compute(self, prompt: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        CPU-bound work, run in a worker process for cpu_bound agents
+        
+        Args:
+            prompt: Input prompt
+            context: Context dictionary
+        
+        Returns:
+            Picklable dictionary merged into the success result
+        """
+        raise NotImplementedError(f"{type(self).__name__} is cpu_bound but does not implement compute()")
+    
+    async def run(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         Run agent with given prompt and context
         
         Args:
             prompt: Input prompt
             context: Context dictionary
+            deadline: Request deadline passed on to the LLM provider
         
         Returns:
             Result dictionary
         """
         self.status = "running"
         try:
-            result = {
+            if self.llm is not None:
+                generation = await self.llm.generate(prompt, deadline=deadline)
+                if generation["provider"] is None:
+                    raise AgentException(generation["metadata"]["error"])
+                result = self._build_result(prompt, context, generation)
+            else:
+                result = self._build_result(prompt, context)
+            self.last_result = result
+            self.status = "idle"
+            return result
+        except asyncio.CancelledError:
+            # Cancelled by the caller's deadline
+            self.status = "idle"
+            raise
+        except DeadlineExceededError as e:
+            self.status = "idle"
+            return _timeout_result(self.name, str(e))
+        except Exception as e:
+            self.status = "error"
+            return {
                 "agent": self.name,
-                "prompt": prompt,
-                "response": f"[{self.name}] processed: {prompt[:50]}...",
-                "status": "success",
-                "context_used": list(context.keys())
+                "error": str(e),
+                "status": "failed"
             }
+    
+    async def run_in_pool(
+        self,
+        pool: AgentProcessPool,
+        prompt: str,
+        context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Run compute() in a worker process
+        
+        Args:
+            pool: Process pool to run in
+            prompt: Input prompt
+            context: Context dictionary (must be picklable)
+        
+        Returns:
+            Result dictionary
+        """
+        self.status = "running"
+        try:
+            result = self._build_result(prompt, context)
+            result.update(await pool.run(self, prompt, context))
             self.last_result = result
             self.status = "idle"
             return result
+        except asyncio.CancelledError:
+            self.status = "idle"
+            raise
         except Exception as e:
             self.status = "error"
             return {
@@ -44,40 +222,245 @@ class BaseAgent:
                 "error": str(e),
                 "status": "failed"
             }
+    
+    async def run_stream(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run agent, yielding response chunks as they are generated
+        
+        Args:
+            prompt: Input prompt
+            context: Context dictionary
+            deadline: Request deadline passed on to the LLM provider
+        
+        Yields:
+            {"type": "token", "text": ...} chunks, then one
+            {"type": "complete", "result": {...}} with the run() result
+        """
+        if self.llm is None:
+            result = await self.run(prompt, context, deadline)
+            if result["status"] == "success":
+                yield {"type": "token", "text": result["response"]}
+            yield {"type": "complete", "result": result}
+            return
+        
+        self.status = "running"
+        try:
+            generation = None
+            async for chunk in self.llm.generate_stream(prompt, deadline=deadline):
+                if chunk["type"] == "token":
+                    yield chunk
+                elif chunk["type"] == "done":
+                    generation = chunk["result"]
+                else:
+                    raise AgentException(chunk["error"])
+            result = self._build_result(prompt, context, generation)
+            self.last_result = result
+            self.status = "idle"
+        except Exception as e:
+            self.status = "error"
+            result = {
+                "agent": self.name,
+                "error": str(e),
+                "status": "failed"
+            }
+        finally:
+            if self.status == "running":
+                # Consumer went away mid-stream
+                self.status = "idle"
+        yield {"type": "complete", "result": result}
+    
+    def _build_result(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        generation: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build the success result for a run"""
+        result = {
+            "agent": self.name,
+            "prompt": prompt,
+            "response": f"[{self.name}] processed: {prompt[:50]}...",
+            "status": "success",
+            "context_used": list(context.keys())
+        }
+        if generation is not None:
+            result["response"] = generation["text"]
+            result["provider"] = generation["provider"]
+        return result
 
 
 class ParentController:
     """
     Central controller for managing multiple agents
     Handles agent registration, execution, and upgrade requests
+    
+    Registrations, upgrade requests and execution history live in a state
+    store. With a shared store every worker process sees the same agents:
+    an agent registered by another worker is re-created locally from its
+    class and name. Agent run status stays per process.
+    
+    Each name is served by an AgentPool of instances, so concurrent runs
+    of one agent don't overwrite each other's status and results.
+    Memoized agents get a per-process result cache, dropped when the
+    agent is re-registered and cleared when an upgrade is approved.
+    
+    Registrations and upgrade requests bump a version number at once;
+    run state (agent status, last results, pool sizes, history size) is
+    folded into at most one bump per publish_interval, so polling clients
+    aren't invalidated by every run. get_snapshot() is rebuilt only when
+    the version moved and get_delta() returns what changed since a
+    client's version. Versions are per process (see instance_id).
+    
+    Store I/O on the request path goes through state.call(), which runs
+    it in a thread for a shared SQLite store. Other workers' changes are
+    picked up by a background task (startup()) that checks the shared
+    version every sync_interval seconds, so status calls never query it.
     """
     
-    def __init__(self):
-        """Initialize ParentController"""
+    def __init__(
+        self,
+        agent_timeout: Optional[float] = settings.AGENT_TIMEOUT,
+        max_concurrent_runs: int = settings.MAX_CONCURRENT_AGENT_RUNS,
+        max_agents_per_request: int = settings.MAX_AGENTS,
+        process_workers: int = settings.AGENT_PROCESS_WORKERS,
+        history_size: int = settings.EXECUTION_HISTORY_SIZE,
+        pool_min_size: int = settings.AGENT_POOL_MIN_SIZE,
+        pool_max_size: int = settings.AGENT_POOL_MAX_SIZE,
+        pool_idle_timeout: float = settings.AGENT_POOL_IDLE_TIMEOUT,
+        memo_max_entries: int = settings.AGENT_MEMO_MAX_ENTRIES,
+        memo_ttl: Optional[float] = settings.AGENT_MEMO_TTL,
+        sync_interval: float = settings.SHARED_STATE_SYNC_INTERVAL,
+        publish_interval: float = settings.STATUS_PUBLISH_INTERVAL,
+        state=None,
+        database=None
+    ):
+        """
+        Initialize ParentController
+        
+        Args:
+            agent_timeout: Per-agent run timeout in seconds (None for no limit)
+            max_concurrent_runs: Agent runs allowed in flight across all requests
+            max_agents_per_request: Agent runs one request may have in flight
+            process_workers: Worker processes for cpu_bound agents
+            history_size: Executions kept in history
+            pool_min_size: Default instances kept per agent
+            pool_max_size: Default instances an agent's pool may grow to
+            pool_idle_timeout: Seconds before an idle instance above the minimum is dropped
+            memo_max_entries: Results cached per memoized agent
+            memo_ttl: Seconds a memoized result stays valid (None for no expiry)
+            sync_interval: Seconds between checks for other workers' changes to a shared store
+            publish_interval: Seconds between version bumps for run-state changes
+            state: State store (a new LocalStateStore if None)
+            database: Database applying registered profiles' memory capacity (the global db if None)
+        """
         self.agents: Dict[str, BaseAgent] = {}
-        self.upgrade_requests: List[Dict[str, Any]] = []
-        self.execution_history: List[Dict[str, Any]] = []
-        self.max_history: int = 500
+        self.pools: Dict[str, AgentPool] = {}
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.memo: Dict[str, ResponseCache] = {}
+        self.memo_max_entries = memo_max_entries
+        self.memo_ttl = memo_ttl
+        self.agent_timeout = agent_timeout
+        self.max_concurrent_runs = max_concurrent_runs
+        self.max_agents_per_request = max_agents_per_request
+        self._run_slots = asyncio.Semaphore(max_concurrent_runs)
+        self.queued_runs = 0
+        self.in_flight_runs = 0
+        self.process_pool = AgentProcessPool(process_workers)
+        self.state = state if state is not None else LocalStateStore()
+        self.db = database if database is not None else db
+        self.max_history = history_size
+        self.history = self.state.history("execution_history", history_size, {
+            "agent": lambda execution: execution["agents_run"],
+            "success": lambda execution: [execution["success"]],
+        })
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._agent_versions: Dict[str, int] = {}
+        self._removed_agents: Dict[str, int] = {}
+        self._upgrade_versions: Dict[int, int] = {}
+        self.upgrades = self.state.records("upgrade_requests", {
+            "status": lambda request: [request["status"]],
+            "user": lambda request: [request["user"]],
+        })
+        # Upgrade requests changed in this process -> record, for deltas
+        self._changed_upgrades: Dict[int, Dict[str, Any]] = {}
+        self._full_since = 0
+        self.publish_interval = publish_interval
+        # Run-state changes not yet given a version
+        self._pending_agents: Set[str] = set()
+        self._pending_history = False
+        self._published_at = -math.inf
+        self.sync_interval = sync_interval
+        self._follower: Optional[asyncio.Task] = None
+        self._synced_at = time.monotonic()
+        self._seen_shared_version = self.state.peek_id("controller_version")
+        self._counts = self._read_counts()
+        self._snapshot: Optional[Dict[str, Any]] = None
     
-    def register_agent(self, name: str, agent_instance: BaseAgent) -> Dict[str, Any]:
+    @property
+    def upgrade_request_counts(self) -> Dict[str, int]:
+        """Upgrade requests in total and per status"""
+        counts = {"pending": 0, "approved": 0, "rejected": 0}
+        counts.update(self.upgrades.counts("status"))
+        return {"total": sum(counts.values()), **counts}
+    
+    @property
+    def execution_history(self) -> List[Dict[str, Any]]:
+        """Recent executions, oldest first"""
+        return self.history.latest()
+    
+    async def register_agent(
+        self,
+        name: str,
+        agent_instance: BaseAgent,
+        min_instances: Optional[int] = None,
+        max_instances: Optional[int] = None,
+        memoize: Optional[bool] = None,
+        profile: Optional[AgentProfile] = None
+    ) -> Dict[str, Any]:
         """
         Register a new agent
         
         Args:
             name: Agent name
             agent_instance: Agent instance
+            min_instances: Pool minimum size (default pool_min_size)
+            max_instances: Pool maximum size (default pool_max_size)
+            memoize: Cache results by prompt and context (default agent_instance.memoize)
+            profile: Agent profile; its memory_capacity bounds the agent's conversations
         
         Returns:
             Registration confirmation
         """
-        self.agents[name] = agent_instance
+        pool = {"min_size": min_instances, "max_size": max_instances}
+        if memoize is None:
+            memoize = agent_instance.memoize
+        profile_data = profile.model_dump(mode="json") if profile is not None else None
+        self._detach(name)
+        self._attach(name, agent_instance, pool, memoize, profile_data)
+        agent_type = type(agent_instance)
+        total = await self._store_registration(self.state.put, "agents", name, {
+            "name": name,
+            "type": f"{agent_type.__module__}.{agent_type.__qualname__}",
+            "llm": agent_instance.llm is not None,
+            "pool": pool,
+            "memoize": memoize,
+            "profile": profile_data
+        })
         return {
             "agent": name,
             "status": "registered",
-            "total_agents": len(self.agents)
+            "total_agents": total
         }
     
-    def unregister_agent(self, name: str) -> Dict[str, Any]:
+    async def unregister_agent(self, name: str) -> Dict[str, Any]:
         """
         Unregister an agent
         
@@ -87,20 +470,202 @@ class ParentController:
         Returns:
             Unregistration confirmation
         """
-        if name in self.agents:
-            del self.agents[name]
+        self._detach(name)
+        total = await self._store_registration(self.state.delete, "agents", name)
+        if total is not None:
             return {
                 "agent": name,
                 "status": "unregistered",
-                "total_agents": len(self.agents)
+                "total_agents": total
             }
         return {"error": f"Agent {name} not found"}
     
+    def _write_registration(self, fn: Callable[..., Any], seen: int, *args) -> tuple:
+        """Store side of a (un)registration: write, count and announce it (store I/O only)"""
+        if fn(*args) is False:
+            return None, None
+        shared = self._read_shared(seen, publish=True) if self.state.shared else None
+        return self.state.count("agents"), shared
+    
+    async def _store_registration(self, fn: Callable[..., Any], *args) -> Optional[int]:
+        """
+        Write a registration change off the loop and tell other workers
+        
+        Returns:
+            Registered agents afterwards, or None if fn reported nothing changed
+        """
+        total, shared = await self.state.call(self._write_registration, fn, self._seen_shared_version, *args)
+        if shared is not None:
+            self._apply_shared(shared)
+        return total
+    
+    def _attach(
+        self,
+        name: str,
+        agent: BaseAgent,
+        pool: Optional[Dict[str, Optional[int]]] = None,
+        memoize: bool = False,
+        profile: Optional[Dict[str, Any]] = None
+    ):
+        """Add a local agent instance, its pool and result cache, tracking status changes"""
+        pool = pool or {}
+        if profile is not None:
+            # Conversations may name the agent by registered name or profile ID
+            for agent_id in {name, profile["id"]}:
+                self.db.set_memory_capacity(agent_id, profile["memory_capacity"])
+        if memoize:
+            self.memo[name] = ResponseCache(self.memo_max_entries, self.memo_ttl)
+        self.agents[name] = agent
+        self.pools[name] = AgentPool(
+            agent,
+            min_size=pool.get("min_size") or self.pool_min_size,
+            max_size=pool.get("max_size") or self.pool_max_size,
+            idle_timeout=self.pool_idle_timeout,
+            on_change=self._agent_changed
+        )
+        self._removed_agents.pop(name, None)
+        self._pending_agents.discard(name)
+        self._agent_versions[name] = self._bump()
+    
+    def _detach(self, name: str):
+        """Drop a local agent instance"""
+        agent = self.agents.pop(name, None)
+        if agent is not None:
+            self.pools.pop(name).close()
+            self.memo.pop(name, None)
+            self._agent_versions.pop(name, None)
+            self._pending_agents.discard(name)
+            self._removed_agents[name] = self._bump()
+    
+    def _bump(self) -> int:
+        """Advance the state version"""
+        self.version += 1
+        return self.version
+    
+    def _agent_changed(self, name: str):
+        """Run state of an agent changed (versioned by _publish_run_state())"""
+        self._pending_agents.add(name)
+    
+    def _publish_run_state(self):
+        """Give pending run-state changes one new version, at most once per publish_interval"""
+        if not self._pending_agents and not self._pending_history:
+            return
+        now = time.monotonic()
+        if now - self._published_at < self.publish_interval:
+            return
+        self._published_at = now
+        version = self._bump()
+        for name in self._pending_agents:
+            self._agent_versions[name] = version
+        self._pending_agents.clear()
+        self._pending_history = False
+    
+    async def startup(self):
+        """Start following other workers' changes to a shared store"""
+        if self.state.shared and (self._follower is None or self._follower.done()):
+            self._follower = asyncio.create_task(self._follow_shared())
+    
+    async def _follow_shared(self):
+        while True:
+            try:
+                self._apply_shared(await self.state.call(self._read_shared, self._seen_shared_version))
+            except Exception as e:
+                print(f"Shared state sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+    
+    def _read_counts(self) -> Dict[str, Any]:
+        """Upgrade request counts and history size, read from the store"""
+        return {
+            "upgrade_requests": self.upgrade_request_counts,
+            "execution_history_size": len(self.history)
+        }
+    
+    def _current_counts(self) -> Dict[str, Any]:
+        """_read_counts(), as of the last store access when the store is shared"""
+        return self._counts if self.state.shared else self._read_counts()
+    
+    def _read_shared(self, seen: int, publish: bool = False) -> Dict[str, Any]:
+        """
+        Store side of a sync with other workers (store I/O only, safe off the loop)
+        
+        Args:
+            seen: Shared version this process has caught up with
+            publish: Advance the shared version, announcing a change made here
+        """
+        if publish:
+            version, expected = self.state.next_id("controller_version"), seen + 1
+        else:
+            version, expected = self.state.peek_id("controller_version"), seen
+        return {
+            "seen": seen,
+            "version": version,
+            "agents": self.state.values("agents") if version != expected else None,
+            "counts": self._read_counts()
+        }
+    
+    def _apply_shared(self, shared: Dict[str, Any]):
+        """Loop side of a sync: catch up with what _read_shared found"""
+        self._counts = shared["counts"]
+        self._synced_at = time.monotonic()
+        if shared["seen"] != self._seen_shared_version:
+            # Another sync finished first; the next check starts from its version
+            return
+        if shared["agents"] is not None:
+            # Another worker changed something. Which records is unknown (an
+            # approved upgrade among them), so memoized results go and
+            # deltas fall back to full
+            self._sync_agents(shared["agents"])
+            self.invalidate_memo()
+            self._full_since = self._bump()
+        self._seen_shared_version = shared["version"]
+    
+    async def _publish(self):
+        """Tell other workers sharing the store that registrations or requests changed"""
+        if self.state.shared:
+            self._apply_shared(await self.state.call(self._read_shared, self._seen_shared_version, True))
+    
+    def _sync_shared(self):
+        """
+        Pick up changes other workers made to the shared store
+        
+        A no-op while the startup() follower runs; without it the store is
+        read here, at most once per sync_interval.
+        """
+        if not self.state.shared or (self._follower is not None and not self._follower.done()):
+            return
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self._apply_shared(self._read_shared(self._seen_shared_version))
+    
+    def _sync_agents(self, registrations: List[Dict[str, Any]]):
+        """Bring local agent instances in line with the shared registrations"""
+        records = {record["name"]: record for record in registrations}
+        for name in list(self.agents):
+            if name not in records:
+                self._detach(name)
+        for name, record in records.items():
+            if name not in self.agents:
+                agent = self._load_agent(record)
+                if agent is not None:
+                    self._attach(name, agent, record.get("pool"), record.get("memoize", False), record.get("profile"))
+    
+    def _load_agent(self, record: Dict[str, Any]) -> Optional[BaseAgent]:
+        """Re-create an agent registered by another worker"""
+        module_name, _, class_name = record["type"].rpartition(".")
+        try:
+            agent_class = getattr(importlib.import_module(module_name), class_name)
+            return agent_class(record["name"], llm=llm_provider if record["llm"] else None)
+        except Exception as e:
+            print(f"Cannot load agent {record['name']} ({record['type']}): {e}")
+            return None
+    
     async def run_agents(
         self,
         prompt: str,
         context: Dict[str, Any],
-        target_agents: Optional[List[str]] = None
+        target_agents: Optional[List[str]] = None,
+        deadline: Optional[Deadline] = None,
+        max_concurrency: Optional[int] = None,
+        first_n: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Run multiple agents with given prompt and context
@@ -109,49 +674,452 @@ class ParentController:
             prompt: Input prompt
             context: Context dictionary
             target_agents: List of agent names to run (all if None)
+            deadline: Request deadline; unfinished agents are cancelled when it passes
+            max_concurrency: Agents of this request run at once (capped at MAX_AGENTS)
+            first_n: Return as soon as this many agents succeed, cancelling the rest
         
         Returns:
-            List of results from all executed agents
+            List of results from all executed agents; agents that ran out of
+            time have status "timeout". With first_n, only the agents that
+            finished are returned, in completion order.
         """
-        if target_agents is None:
-            target_agents = list(self.agents.keys())
-        
-        # Filter target agents that exist
-        valid_agents = {
-            name: agent for name, agent in self.agents.items()
-            if name in target_agents
-        }
+        valid_agents = self._select_agents(target_agents)
         
         if not valid_agents:
             return [{"error": f"No valid agents found. Available: {list(self.agents.keys())}"}]
         
-        # Run agents concurrently
-        tasks = [
-            agent.run(prompt, context)
+        deadline = deadline or Deadline()
+        request_slots = self._request_slots(max_concurrency)
+        
+        # Run agents concurrently, bounded per request and globally
+        tasks = {
+            asyncio.ensure_future(
+                self._run_with_timeout(name, agent, prompt, context, deadline, request_slots)
+            ): name
             for name, agent in valid_agents.items()
-        ]
+        }
         
         try:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            if first_n is None:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                agents_run = list(valid_agents.keys())
+            else:
+                results, agents_run = await self._gather_first(tasks, first_n)
             output = [
                 {"error": str(r)} if isinstance(r, Exception) else r
                 for r in results
             ]
-            
-            # Store in history
-            execution = {
-                "prompt": prompt,
-                "agents_run": list(valid_agents.keys()),
-                "results": output,
-                "success": len([r for r in output if "error" not in r]) == len(output)
-            }
-            self._add_to_history(execution)
-            
+            await self._record_execution(prompt, agents_run, output)
             return output
         except Exception as e:
             return [{"error": str(e)}]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def _gather_first(self, tasks: Dict["asyncio.Future", str], first_n: int):
+        """
+        Wait until first_n tasks succeed (or all finish); return finished results in order
+        
+        Every task that completed in the last wait is kept, so more than
+        first_n successes may be returned.
+        """
+        results, agents_run = [], []
+        successes = 0
+        pending = set(tasks)
+        while pending and successes < first_n:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.exception() or task.result()
+                results.append(result)
+                agents_run.append(tasks[task])
+                if isinstance(result, dict) and result.get("status") == "success":
+                    successes += 1
+        return results, agents_run
     
-    def request_upgrade(self, user: str, proposal: str) -> Dict[str, Any]:
+    async def run_agents_stream(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        target_agents: Optional[List[str]] = None,
+        deadline: Optional[Deadline] = None,
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run multiple agents, yielding events as each agent produces output
+        
+        Args:
+            prompt: Input prompt
+            context: Context dictionary
+            target_agents: List of agent names to run (all if None)
+            deadline: Request deadline; unfinished agents are reported as timed out
+            max_concurrency: Agents of this request run at once (capped at MAX_AGENTS)
+        
+        Yields:
+            "start", then interleaved per-agent "token" and "agent_complete"
+            events, then a final "done" event carrying all results
+        """
+        valid_agents = self._select_agents(target_agents)
+        
+        if not valid_agents:
+            yield {
+                "event": "error",
+                "error": f"No valid agents found. Available: {list(self.agents.keys())}"
+            }
+            return
+        
+        yield {"event": "start", "agents": list(valid_agents.keys())}
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        deadline = deadline or Deadline()
+        request_slots = self._request_slots(max_concurrency)
+        
+        async def pump(name: str, agent: BaseAgent):
+            key, cached = self._memo_lookup(name, prompt, context)
+            if cached is not None:
+                await queue.put((name, {"type": "complete", "result": cached}))
+                return
+            completed = False
+            try:
+                async with self._run_slot(request_slots, deadline), self._lease(name, deadline) as agent:
+                    async with asyncio.timeout(deadline.cap(self.agent_timeout)):
+                        if agent.cpu_bound:
+                            result = await agent.run_in_pool(self.process_pool, prompt, context)
+                            await queue.put((name, {"type": "complete", "result": result}))
+                            return
+                        async for chunk in agent.run_stream(prompt, context, deadline):
+                            if chunk["type"] == "complete":
+                                completed = True
+                                self._memo_store(name, key, chunk["result"])
+                            await queue.put((name, chunk))
+            except asyncio.TimeoutError:
+                await queue.put((name, {"type": "complete", "result": _timeout_result(name)}))
+                return
+            except Exception as e:
+                await queue.put((name, {"type": "complete", "result": {"error": str(e)}}))
+                return
+            if not completed:
+                await queue.put((name, {"type": "complete", "result": {"error": "Agent produced no result"}}))
+        
+        tasks = [
+            asyncio.create_task(pump(name, agent))
+            for name, agent in valid_agents.items()
+        ]
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            while len(results) < len(tasks):
+                try:
+                    name, chunk = await asyncio.wait_for(queue.get(), deadline.remaining())
+                except asyncio.TimeoutError:
+                    for name in valid_agents:
+                        if name not in results:
+                            results[name] = _timeout_result(name)
+                            yield {"event": "agent_complete", "agent": name, "result": results[name]}
+                    break
+                if chunk["type"] == "token":
+                    yield {"event": "token", "agent": name, "text": chunk["text"]}
+                else:
+                    results[name] = chunk["result"]
+                    yield {"event": "agent_complete", "agent": name, "result": chunk["result"]}
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        output = [results[name] for name in valid_agents]
+        await self._record_execution(prompt, list(valid_agents.keys()), output)
+        yield {"event": "done", "results": output, "total_results": len(output)}
+    
+    def _request_slots(self, max_concurrency: Optional[int]) -> asyncio.Semaphore:
+        """Per-request concurrency limit"""
+        limit = self.max_agents_per_request
+        if max_concurrency:
+            limit = min(max_concurrency, limit)
+        return asyncio.Semaphore(max(1, limit))
+    
+    async def _acquire_slots(self, request_slots: asyncio.Semaphore):
+        """Take the per-request slot, then the global one"""
+        await request_slots.acquire()
+        try:
+            await self._run_slots.acquire()
+        except BaseException:
+            request_slots.release()
+            raise
+    
+    @asynccontextmanager
+    async def _run_slot(self, request_slots: asyncio.Semaphore, deadline: Deadline):
+        """
+        Hold a run slot for one agent
+        
+        Raises:
+            asyncio.TimeoutError: No slot freed up before the deadline
+        """
+        self.queued_runs += 1
+        try:
+            await asyncio.wait_for(self._acquire_slots(request_slots), deadline.remaining())
+        finally:
+            self.queued_runs -= 1
+        self.in_flight_runs += 1
+        try:
+            yield
+        finally:
+            self.in_flight_runs -= 1
+            self._run_slots.release()
+            request_slots.release()
+    
+    def _lease(self, name: str, deadline: Deadline):
+        """
+        Hold an instance of an agent, waiting at most until the deadline
+        
+        Raises:
+            AgentException: The agent was unregistered
+            asyncio.TimeoutError: No instance freed up before the deadline
+        """
+        pool = self.pools.get(name)
+        if pool is None:
+            raise AgentException(f"Agent {name} is no longer registered")
+        return pool.lease(deadline.remaining())
+    
+    async def _run_with_timeout(
+        self,
+        name: str,
+        agent: BaseAgent,
+        prompt: str,
+        context: Dict[str, Any],
+        deadline: Deadline,
+        request_slots: asyncio.Semaphore,
+        timing: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run one agent in a run slot, cancelling it at the agent timeout or request deadline
+        
+        If timing is given, the monotonic time the slot was granted is stored under "started".
+        """
+        key, cached = self._memo_lookup(name, prompt, context)
+        if cached is not None:
+            if timing is not None:
+                timing["started"] = time.monotonic()
+            return cached
+        try:
+            async with self._run_slot(request_slots, deadline), self._lease(name, deadline) as agent:
+                if timing is not None:
+                    timing["started"] = time.monotonic()
+                if agent.cpu_bound:
+                    run = agent.run_in_pool(self.process_pool, prompt, context)
+                else:
+                    run = agent.run(prompt, context, deadline)
+                result = await asyncio.wait_for(run, deadline.cap(self.agent_timeout))
+        except asyncio.TimeoutError:
+            return _timeout_result(name)
+        self._memo_store(name, key, result)
+        return result
+    
+    def _memo_lookup(self, name: str, prompt: str, context: Dict[str, Any]):
+        """
+        Check a memoized agent's cache
+        
+        Returns:
+            (cache key or None if the agent is not memoized, cached result or None)
+        """
+        memo = self.memo.get(name)
+        if memo is None:
+            return None, None
+        key = make_memo_key(name, prompt, context)
+        cached = memo.get(key)
+        if cached is not None:
+            # A hit changes only the cache counters, which live in get_metrics()
+            cached["memoized"] = True
+        return key, cached
+    
+    def _memo_store(self, name: str, key: Optional[str], result: Dict[str, Any]):
+        """Cache a successful result of a memoized agent"""
+        memo = self.memo.get(name)
+        if memo is not None and key is not None and "error" not in result:
+            memo.set(key, result)
+    
+    def invalidate_memo(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Drop memoized results
+        
+        Args:
+            name: Agent whose results to drop (all agents if None)
+        
+        Returns:
+            Agents whose caches were cleared
+        """
+        names = list(self.memo) if name is None else [name] if name in self.memo else []
+        for agent_name in names:
+            self.memo[agent_name].clear()
+            self._agent_changed(agent_name)
+        return {"invalidated": names}
+    
+    async def run_pipeline(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        nodes: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run agents as a DAG, feeding each node the results of the nodes it depends on
+        
+        A node starts as soon as all of its dependencies succeeded, so
+        independent branches run concurrently (bounded per request and
+        globally like run_agents). A node whose dependency failed or timed
+        out is skipped, along with everything downstream of it.
+        
+        Args:
+            prompt: Prompt for nodes without their own
+            context: Context shared by all nodes
+            nodes: Nodes with "id", "agent", optional "depends_on" (node IDs)
+                and optional "prompt"; a node's context gets an "upstream"
+                dict of dependency node ID -> result
+            deadline: Request deadline; nodes not finished by then time out
+            max_concurrency: Nodes of this pipeline run at once (capped at MAX_AGENTS)
+        
+        Returns:
+            Per-node status, result and timings (milliseconds from pipeline
+            start), the execution order and overall success
+        
+        Raises:
+            ValidationException: Invalid graph or unknown agent
+        """
+        order = _plan_pipeline(nodes)
+        by_id = {node["id"]: node for node in nodes}
+        agents = self._select_agents([node["agent"] for node in nodes])
+        for node in nodes:
+            if node["agent"] not in agents:
+                raise ValidationException(f"Pipeline node {node['id']} uses unknown agent {node['agent']}")
+        
+        deadline = deadline or Deadline()
+        request_slots = self._request_slots(max_concurrency)
+        pipeline_start = time.monotonic()
+        
+        def ms(t: float) -> float:
+            return round((t - pipeline_start) * 1000, 3)
+        
+        waiting = {node_id: set(by_id[node_id].get("depends_on") or []) for node_id in order}
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        timings: Dict[str, Dict[str, float]] = {}
+        running: Dict[asyncio.Future, str] = {}
+        
+        def launch(node_id: str):
+            node = by_id[node_id]
+            deps = node.get("depends_on") or []
+            node_context = {**context, "upstream": {dep: outcomes[dep]["result"] for dep in deps}}
+            timings[node_id] = {"ready": time.monotonic()}
+            task = asyncio.ensure_future(self._run_with_timeout(
+                node["agent"], agents[node["agent"]], node.get("prompt") or prompt,
+                node_context, deadline, request_slots, timings[node_id]
+            ))
+            running[task] = node_id
+        
+        def skip(node_id: str, reason: str):
+            if node_id in outcomes:
+                return
+            outcomes[node_id] = {
+                "node": node_id,
+                "agent": by_id[node_id]["agent"],
+                "status": "skipped",
+                "reason": reason,
+                "result": None
+            }
+            waiting.pop(node_id, None)
+            for dependent in order:
+                if node_id in waiting.get(dependent, ()):
+                    skip(dependent, f"Dependency {node_id} was skipped")
+        
+        for node_id in order:
+            if not waiting[node_id]:
+                launch(node_id)
+        
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    waiting.pop(node_id, None)
+                    finished = time.monotonic()
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = {"agent": by_id[node_id]["agent"], "error": str(e), "status": "failed"}
+                    timing = timings[node_id]
+                    started = timing.get("started", finished)
+                    status = result.get("status", "completed") if "error" in result else "completed"
+                    outcomes[node_id] = {
+                        "node": node_id,
+                        "agent": by_id[node_id]["agent"],
+                        "status": status,
+                        "result": result,
+                        "ready_ms": ms(timing["ready"]),
+                        "started_ms": ms(started),
+                        "finished_ms": ms(finished),
+                        "queued_ms": round((started - timing["ready"]) * 1000, 3),
+                        "duration_ms": round((finished - started) * 1000, 3)
+                    }
+                    for dependent in order:
+                        deps = waiting.get(dependent)
+                        if deps is None or node_id not in deps:
+                            continue
+                        if status != "completed":
+                            skip(dependent, f"Dependency {node_id} {status}")
+                            continue
+                        deps.discard(node_id)
+                        if not deps:
+                            launch(dependent)
+        finally:
+            for task in running:
+                task.cancel()
+        
+        ran = [node_id for node_id in order if outcomes[node_id]["status"] != "skipped"]
+        output = [outcomes[node_id]["result"] for node_id in ran]
+        await self._record_execution(prompt, [by_id[node_id]["agent"] for node_id in ran], output)
+        return {
+            "nodes": {node_id: outcomes[node_id] for node_id in order},
+            "order": order,
+            "success": all(outcome["status"] == "completed" for outcome in outcomes.values()),
+            "total_ms": ms(time.monotonic())
+        }
+    
+    def _select_agents(self, target_agents: Optional[List[str]]) -> Dict[str, BaseAgent]:
+        """Resolve target agent names to registered agents"""
+        self._sync_shared()
+        if target_agents is None:
+            target_agents = list(self.agents.keys())
+        
+        # Filter target agents that exist
+        return {
+            name: agent for name, agent in self.agents.items()
+            if name in target_agents
+        }
+    
+    async def _record_execution(self, prompt: str, agents_run: List[str], output: List[Dict[str, Any]]):
+        """Store a finished run in history"""
+        execution = {
+            "prompt": prompt,
+            "agents_run": agents_run,
+            "results": output,
+            "success": len([r for r in output if "error" not in r]) == len(output),
+            "timestamp": __import__("datetime").datetime.utcnow().isoformat()
+        }
+        await self._add_to_history(execution)
+    
+    def _write(self, fn: Callable[..., Any], *args) -> tuple:
+        """A store write plus, for a shared store, the counts after it (store I/O only)"""
+        result = fn(*args)
+        return result, self._read_counts() if self.state.shared else None
+    
+    async def _store(self, fn: Callable[..., Any], *args) -> Any:
+        """Run a store write off the loop and keep the cached counts current"""
+        result, counts = await self.state.call(self._write, fn, *args)
+        if counts is not None:
+            self._counts = counts
+        return result
+    
+    async def request_upgrade(self, user: str, proposal: str) -> Dict[str, Any]:
         """
         Submit an upgrade request
         
@@ -163,16 +1131,16 @@ class ParentController:
             Request confirmation
         """
         request = {
-            "id": len(self.upgrade_requests),
             "user": user,
             "proposal": proposal,
             "status": "pending",
             "timestamp": __import__("datetime").datetime.utcnow().isoformat()
         }
-        self.upgrade_requests.append(request)
+        await self._store(self.upgrades.add, request)
+        await self._upgrade_changed(request)
         return request
     
-    def approve_upgrade(self, request_id: int) -> Dict[str, Any]:
+    async def approve_upgrade(self, request_id: int) -> Dict[str, Any]:
         """
         Approve an upgrade request
         
@@ -182,12 +1150,15 @@ class ParentController:
         Returns:
             Updated request
         """
-        if 0 <= request_id < len(self.upgrade_requests):
-            self.upgrade_requests[request_id]["status"] = "approved"
-            return self.upgrade_requests[request_id]
+        request = await self._store(self.upgrades.update, request_id, {"status": "approved"})
+        if request is not None:
+            # Upgraded agents may answer differently now
+            self.invalidate_memo()
+            await self._upgrade_changed(request)
+            return request
         return {"error": f"Request {request_id} not found"}
     
-    def reject_upgrade(self, request_id: int) -> Dict[str, Any]:
+    async def reject_upgrade(self, request_id: int) -> Dict[str, Any]:
         """
         Reject an upgrade request
         
@@ -197,41 +1168,209 @@ class ParentController:
         Returns:
             Updated request
         """
-        if 0 <= request_id < len(self.upgrade_requests):
-            self.upgrade_requests[request_id]["status"] = "rejected"
-            return self.upgrade_requests[request_id]
+        request = await self._store(self.upgrades.update, request_id, {"status": "rejected"})
+        if request is not None:
+            await self._upgrade_changed(request)
+            return request
         return {"error": f"Request {request_id} not found"}
     
-    def _add_to_history(self, execution: Dict[str, Any]):
+    async def _add_to_history(self, execution: Dict[str, Any]):
         """Store execution in history"""
-        self.execution_history.append(execution)
-        if len(self.execution_history) > self.max_history:
-            self.execution_history.pop(0)
+        await self._store(self.history.append, execution)
+        self._pending_history = True
+    
+    async def query_upgrade_requests(
+        self,
+        status: Optional[str] = None,
+        user: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Page through upgrade requests, newest first
+        
+        Args:
+            status: Only requests with this status
+            user: Only requests from this user
+            since: Only requests made at or after this epoch time
+            until: Only requests made at or before this epoch time
+            cursor: next_cursor from the previous page
+            limit: Page size
+        
+        Returns:
+            Matching requests, the cursor for the next page (None at the end)
+            and request counts per status
+        """
+        def read():
+            items, next_cursor = self.upgrades.query(
+                {"status": status, "user": user},
+                since=since,
+                until=until,
+                before=cursor,
+                limit=limit
+            )
+            return {"items": items, "next_cursor": next_cursor, "counts": self.upgrade_request_counts}
+        return await self.state.call(read)
     
-    def get_status(self) -> Dict[str, Any]:
+    async def _upgrade_changed(self, request: Dict[str, Any]):
+        self._upgrade_versions[request["id"]] = self._bump()
+        self._changed_upgrades[request["id"]] = dict(request)
+        await self._publish()
+    
+    async def query_history(
+        self,
+        agent: Optional[str] = None,
+        success: Optional[bool] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Page through execution history, newest first
+        
+        Args:
+            agent: Only executions that ran this agent
+            success: Only executions with this success flag
+            since: Only executions at or after this epoch time
+            until: Only executions at or before this epoch time
+            cursor: next_cursor from the previous page
+            limit: Page size
+        
+        Returns:
+            Matching executions and the cursor for the next page (None at the end)
+        """
+        items, next_cursor = await self.state.call(
+            self.history.query,
+            {"agent": agent, "success": success},
+            since=since,
+            until=until,
+            before=cursor,
+            limit=limit
+        )
+        return {"items": items, "next_cursor": next_cursor}
+    
+    async def get_status(self) -> Dict[str, Any]:
         """Get controller status"""
         return {
+            **self.get_snapshot(),
+            "execution_history": await self.state.call(self.history.get_stats),
+            "shared_state": self.state.shared,
+            "fanout": self.get_fanout_stats(),
+            "process_pool": self.process_pool.get_stats()
+        }
+    
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Volatile gauges kept out of the versioned snapshot"""
+        return {
+            "execution_history": await self.state.call(self.history.get_stats),
+            "shared_state": self.state.shared,
+            "fanout": self.get_fanout_stats(),
+            "process_pool": self.process_pool.get_stats(),
+            "memo": {name: memo.get_stats() for name, memo in self.memo.items()}
+        }
+    
+    def agent_count(self) -> int:
+        """Number of agents registered in this process (constant time)"""
+        return len(self.agents)
+    
+    def _agent_state(self, name: str) -> Dict[str, Any]:
+        pool = self.pools[name]
+        return {
+            "status": pool.status,
+            "last_result": pool.last_result,
+            "pool": pool.get_stats(),
+            "memoized": name in self.memo
+        }
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Versioned controller state, rebuilt only after a change
+        
+        Returns:
+            Agents, upgrade request counts and history size with the version they reflect
+        """
+        self._sync_shared()
+        self._publish_run_state()
+        if self._snapshot is None or self._snapshot["version"] != self.version:
+            self._snapshot = {
+                "instance_id": self.instance_id,
+                "version": self.version,
+                "agents": {name: self._agent_state(name) for name in self.agents},
+                "total_agents": len(self.agents),
+                **self._current_counts(),
+                "controller_status": "active"
+            }
+        return self._snapshot
+    
+    def get_delta(self, since: int) -> Dict[str, Any]:
+        """
+        Changes since a version returned by get_snapshot() or get_delta()
+        
+        Args:
+            since: Version the client already has
+        
+        Returns:
+            Changed agents, removed agents, changed upgrade requests and
+            request counts, or the
+            full snapshot ("full": True) when since is too old or unknown
+        """
+        self._sync_shared()
+        self._publish_run_state()
+        if since < self._full_since or since > self.version:
+            return {**self.get_snapshot(), "full": True}
+        changed_requests = [
+            self._changed_upgrades[request_id]
+            for request_id, version in self._upgrade_versions.items() if version > since
+        ]
+        counts = self._current_counts()
+        return {
+            "instance_id": self.instance_id,
+            "version": self.version,
+            "since": since,
+            "full": False,
             "agents": {
-                name: {"status": agent.status, "last_result": agent.last_result}
-                for name, agent in self.agents.items()
+                name: self._agent_state(name)
+                for name, version in self._agent_versions.items() if version > since
             },
+            "removed_agents": [name for name, version in self._removed_agents.items() if version > since],
+            "upgrade_requests": counts["upgrade_requests"],
+            "changed_upgrade_requests": changed_requests,
             "total_agents": len(self.agents),
-            "upgrade_requests": self.upgrade_requests,
-            "execution_history_size": len(self.execution_history),
+            "execution_history_size": counts["execution_history_size"],
             "controller_status": "active"
         }
     
+    def get_fanout_stats(self) -> Dict[str, Any]:
+        """Get agent run queue-depth and in-flight gauges"""
+        return {
+            "in_flight": self.in_flight_runs,
+            "queued": self.queued_runs,
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "max_agents_per_request": self.max_agents_per_request
+        }
+    
+    def shutdown(self):
+        """Stop the shared store follower and the process pool used by cpu_bound agents"""
+        if self._follower is not None:
+            self._follower.cancel()
+            self._follower = None
+        self.process_pool.shutdown()
+    
     def get_agent_status(self, agent_name: str) -> Dict[str, Any]:
         """Get status of specific agent"""
+        self._sync_shared()
         if agent_name in self.agents:
-            agent = self.agents[agent_name]
+            memo = self.memo.get(agent_name)
             return {
                 "agent": agent_name,
-                "status": agent.status,
-                "last_result": agent.last_result
+                **self._agent_state(agent_name),
+                "memo": memo.get_stats() if memo is not None else None
             }
         return {"error": f"Agent {agent_name} not found"}
 
 
 # Global parent controller instance
-parent_controller = ParentController()
+parent_controller = ParentController(state=state_store)
@@ -0,0 +1,121 @@
+"""
+Agent Process Pool for My.app
+Runs CPU-bound agent work in worker processes, off the event loop
+"""
+
+from typing import Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+import pickle
+
+from utils.exceptions import AgentException
+
+
+class ResultNotPicklable(Exception):
+    """compute() returned a result that cannot be sent back from the worker"""
+
+
+def _compute(task: bytes) -> bytes:
+    """Worker-process entry point: pickled (agent, prompt, context) -> pickled compute() output"""
+    agent, prompt, context = pickle.loads(task)
+    result = agent.compute(prompt, context)
+    try:
+        return pickle.dumps(result)
+    except Exception as e:
+        raise ResultNotPicklable(str(e))
+
+
+class AgentProcessPool:
+    """
+    Lazily started ProcessPoolExecutor for agents with cpu_bound = True
+    
+    The agent (without its LLM provider), prompt and context are pickled
+    once, here, so unpicklable inputs fail before reaching the pool; the
+    worker returns the agent's compute() output, pickled on its side.
+    Timeouts are applied by the caller: a timed-out task that has not
+    started yet is dropped, one already running finishes in its worker
+    and its result is discarded. A pool broken by a crashed worker is
+    replaced on the next call.
+    """
+    
+    def __init__(self, workers: int, start_method: str = "spawn"):
+        """
+        Initialize AgentProcessPool
+        
+        Args:
+            workers: Number of worker processes
+            start_method: multiprocessing start method ("spawn", "forkserver" or "fork")
+        """
+        self.workers = workers
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.submitted = 0
+        self.failed = 0
+        self.restarts = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+    
+    async def run(self, agent, prompt: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run agent.compute(prompt, context) in a worker process
+        
+        Args:
+            agent: CPU-bound agent
+            prompt: Input prompt
+            context: Context dictionary
+        
+        Returns:
+            compute() output
+        
+        Raises:
+            AgentException: Inputs or result cannot be pickled, or the worker crashed
+        """
+        try:
+            task = pickle.dumps((agent, prompt, context))
+        except Exception as e:
+            raise AgentException(f"Agent {agent.name} cannot run in a worker process, inputs are not picklable: {e}")
+        
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        self.in_flight += 1
+        try:
+            return pickle.loads(await loop.run_in_executor(executor, _compute, task))
+        except ResultNotPicklable as e:
+            self.failed += 1
+            raise AgentException(f"Agent {agent.name} returned a result that is not picklable: {e}")
+        except BrokenProcessPool as e:
+            self.failed += 1
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise AgentException(f"Agent {agent.name} worker process died: {e}")
+        finally:
+            self.in_flight -= 1
+    
+    def shutdown(self):
+        """Stop the worker processes, dropping queued tasks"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker count and task counters"""
+        return {
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,236 @@
+"""
+Admission Control for My.app
+Sheds agent and chat requests with 503 once the server is overloaded
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import hmac
+import json
+import math
+import time
+
+from config.settings import settings
+
+
+PRIORITIES = {"low": 0, "normal": 1, "high": 2}
+
+
+class AdmissionController:
+    """
+    Tracks in-flight requests and event-loop lag, and decides what to shed
+    
+    Load is "busy" once in-flight requests or loop lag cross the soft
+    thresholds, and "overloaded" past the hard ones. Busy sheds low
+    priority requests, overloaded sheds low and normal ones; high priority
+    requests are always admitted. Lag is sampled by a background task that
+    measures how late a short sleep wakes up; the application starts it
+    with startup() and stops it with shutdown().
+    
+    Clients may lower their priority with X-Priority; raising it to high
+    takes the configured priority token in X-Priority-Token.
+    """
+    
+    def __init__(
+        self,
+        max_in_flight: int = 256,
+        soft_in_flight: int = 192,
+        max_loop_lag: float = 0.5,
+        soft_loop_lag: float = 0.2,
+        lag_interval: float = 0.1,
+        retry_after: int = 1,
+        paths: Tuple[str, ...] = ("/agents", "/chat"),
+        exempt_paths: Tuple[str, ...] = ("/health",),
+        low_priority_paths: Tuple[str, ...] = (),
+        priority_token: str = ""
+    ):
+        """
+        Initialize AdmissionController
+        
+        Args:
+            max_in_flight: In-flight requests at which normal priority is shed
+            soft_in_flight: In-flight requests at which low priority is shed
+            max_loop_lag: Event-loop lag in seconds at which normal priority is shed
+            soft_loop_lag: Event-loop lag in seconds at which low priority is shed
+            lag_interval: Seconds between lag samples
+            retry_after: Retry-After seconds sent with 503
+            paths: Path prefixes under admission control
+            exempt_paths: Paths always admitted
+            low_priority_paths: Path prefixes treated as low priority
+            priority_token: Token allowing X-Priority: high (empty to never allow it)
+        """
+        self.max_in_flight = max_in_flight
+        self.soft_in_flight = soft_in_flight
+        self.max_loop_lag = max_loop_lag
+        self.soft_loop_lag = soft_loop_lag
+        self.lag_interval = lag_interval
+        self.retry_after = retry_after
+        self.paths = paths
+        self.exempt_paths = exempt_paths
+        self.low_priority_paths = low_priority_paths
+        self.priority_token = priority_token
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.loop_lag = 0.0
+        self.accepted: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        self.shed: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        self._monitor: Optional[asyncio.Task] = None
+    
+    def guarded(self, path: str) -> bool:
+        """Whether a path is under admission control"""
+        if path in self.exempt_paths:
+            return False
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.paths)
+    
+    def priority(self, path: str, header: Optional[str], token: Optional[str] = None) -> str:
+        """
+        Priority of a request
+        
+        Args:
+            path: Request path (low_priority_paths are low, others normal)
+            header: X-Priority value; without the token it can only lower the priority
+            token: X-Priority-Token value
+        """
+        if header == "high" and self.trusted(token):
+            return "high"
+        if any(path == prefix or path.startswith(prefix + "/") for prefix in self.low_priority_paths):
+            default = "low"
+        else:
+            default = "normal"
+        if header in PRIORITIES and PRIORITIES[header] < PRIORITIES[default]:
+            return header
+        return default
+    
+    def trusted(self, token: Optional[str]) -> bool:
+        """Whether a request carries the priority token"""
+        if not self.priority_token or token is None:
+            return False
+        return hmac.compare_digest(token.encode(), self.priority_token.encode())
+    
+    @property
+    def load(self) -> str:
+        """Current load: ok, busy or overloaded"""
+        if self.in_flight >= self.max_in_flight or self.loop_lag >= self.max_loop_lag:
+            return "overloaded"
+        if self.in_flight >= self.soft_in_flight or self.loop_lag >= self.soft_loop_lag:
+            return "busy"
+        return "ok"
+    
+    def admit(self, priority: str) -> bool:
+        """Decide on a request and count it; admitted requests must call release()"""
+        load = self.load
+        rank = PRIORITIES[priority]
+        if (load == "overloaded" and rank < PRIORITIES["high"]) or (load == "busy" and rank < PRIORITIES["normal"]):
+            self.shed[priority] += 1
+            return False
+        self.accepted[priority] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return True
+    
+    def release(self):
+        """An admitted request finished"""
+        self.in_flight -= 1
+    
+    async def startup(self):
+        """Start sampling loop lag (call from the application startup hook)"""
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.create_task(self._sample_lag())
+    
+    async def shutdown(self):
+        """Stop sampling loop lag (call from the application shutdown hook)"""
+        monitor, self._monitor = self._monitor, None
+        if monitor is not None:
+            monitor.cancel()
+            await asyncio.gather(monitor, return_exceptions=True)
+    
+    async def _sample_lag(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, time.monotonic() - started - self.lag_interval)
+            # Rise at once, decay gradually so one quiet sample doesn't reopen the gates
+            self.loop_lag = lag if lag > self.loop_lag else self.loop_lag * 0.5 + lag * 0.5
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load, thresholds and accept/shed counters"""
+        return {
+            "load": self.load,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "loop_lag_ms": round(self.loop_lag * 1000, 3),
+            "thresholds": {
+                "soft_in_flight": self.soft_in_flight,
+                "max_in_flight": self.max_in_flight,
+                "soft_loop_lag_ms": self.soft_loop_lag * 1000,
+                "max_loop_lag_ms": self.max_loop_lag * 1000,
+            },
+            "accepted": dict(self.accepted),
+            "shed": dict(self.shed),
+            "total_accepted": sum(self.accepted.values()),
+            "total_shed": sum(self.shed.values()),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to HTTP requests
+    
+    A request counts as in flight until its response body has been sent,
+    so streaming responses hold their slot while they stream. WebSocket
+    connections and paths outside the controller's prefixes pass through.
+    """
+    
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+    
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if scope["type"] != "http" or not controller.guarded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        
+        header = token = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-priority":
+                header = value.decode("latin-1").strip().lower()
+            elif name == b"x-priority-token":
+                token = value.decode("latin-1").strip()
+        priority = controller.priority(scope["path"], header, token)
+        if not controller.admit(priority):
+            await self._reject(send, controller.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+    
+    @staticmethod
+    async def _reject(send, retry_after: int):
+        body = json.dumps({"detail": "Server overloaded, retry later"}).encode()
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(retry_after)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 503, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _prefixes(value: str) -> Tuple[str, ...]:
+    return tuple(prefix.strip().rstrip("/") for prefix in value.split(",") if prefix.strip())
+
+
+# Global admission controller instance
+admission_controller = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    soft_in_flight=settings.ADMISSION_SOFT_IN_FLIGHT,
+    max_loop_lag=settings.ADMISSION_MAX_LOOP_LAG_MS / 1000,
+    soft_loop_lag=settings.ADMISSION_SOFT_LOOP_LAG_MS / 1000,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+    paths=_prefixes(settings.ADMISSION_PATHS),
+    exempt_paths=_prefixes(settings.ADMISSION_EXEMPT_PATHS),
+    low_priority_paths=_prefixes(settings.ADMISSION_LOW_PRIORITY_PATHS),
+    priority_token=settings.ADMISSION_PRIORITY_TOKEN
+)
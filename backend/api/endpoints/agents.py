@@ -2,10 +2,20 @@
 Agents Endpoint - Agent management and execution
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Any, List, Optional, AsyncIterator, Union
+from contextlib import aclosing
+from datetime import datetime, timezone
+import json
 from agents.parent_controller import parent_controller, BaseAgent
+from agents.execution_queue import execution_queue
+from config.settings import settings
+from models import AgentProfile
+from tools.llm_provider import llm_provider
+from utils.deadline import Deadline
+from utils.exceptions import NotFoundError, RateLimitError, ValidationException
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
@@ -15,6 +25,34 @@ class AgentRequest(BaseModel):
     prompt: str
     context: Dict[str, Any] = {}
     target_agents: Optional[List[str]] = None
+    timeout: Optional[float] = None  # seconds, capped at REQUEST_TIMEOUT
+    max_concurrency: Optional[int] = None  # agents run at once, capped at MAX_AGENTS
+    first_n: Optional[int] = None  # return once this many agents succeed
+
+
+class PipelineNode(BaseModel):
+    """One agent in a pipeline"""
+    id: str
+    agent: str
+    depends_on: List[str] = []
+    prompt: Optional[str] = None  # defaults to the pipeline prompt
+
+
+class PipelineRequest(BaseModel):
+    """Agent pipeline (DAG) execution request"""
+    prompt: str
+    context: Dict[str, Any] = {}
+    nodes: List[PipelineNode] = Field(..., min_length=1)
+    timeout: Optional[float] = None  # seconds, capped at REQUEST_TIMEOUT
+    max_concurrency: Optional[int] = None  # nodes run at once, capped at MAX_AGENTS
+
+
+def _request_deadline(request: Union[AgentRequest, PipelineRequest]) -> Deadline:
+    """Start the request deadline that bounds the whole agent run"""
+    timeout = settings.REQUEST_TIMEOUT
+    if request.timeout is not None:
+        timeout = min(request.timeout, timeout)
+    return Deadline.after(timeout)
 
 
 class UpgradeRequest(BaseModel):
@@ -26,7 +64,7 @@ class UpgradeRequest(BaseModel):
 @router.get("/list")
 async def list_agents() -> Dict[str, Any]:
     """List all registered agents"""
-    status = parent_controller.get_status()
+    status = parent_controller.get_snapshot()
     return {
         "agents": list(status["agents"].keys()),
         "total": status["total_agents"],
@@ -34,10 +72,57 @@ async def list_agents() -> Dict[str, Any]:
     }
 
 
+# (version, ETag, encoded body) of the last full snapshot served
+_status_body: Optional[tuple] = None
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
 @router.get("/status")
-async def get_agents_status() -> Dict[str, Any]:
-    """Get all agents status"""
-    return parent_controller.get_status()
+async def get_agents_status(
+    since: Optional[int] = Query(None, ge=0),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """
+    Get all agents status
+    
+    The body is a versioned snapshot, encoded once per version and served
+    with an ETag; a matching If-None-Match gets 304. With ?since=<version>
+    only what changed after that version is returned ("full": false), or
+    the whole snapshot ("full": true) if the version is too old. Versions
+    belong to one worker process, identified by instance_id.
+    """
+    global _status_body
+    snapshot = parent_controller.get_snapshot()
+    etag = f'"{snapshot["instance_id"]}-{snapshot["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    if since is not None:
+        body = json.dumps(parent_controller.get_delta(since), default=str).encode()
+    else:
+        if _status_body is None or _status_body[1] != etag:
+            _status_body = (snapshot["version"], etag, json.dumps(snapshot, default=str).encode())
+        body = _status_body[2]
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/metrics")
+async def get_agents_metrics() -> Dict[str, Any]:
+    """Get fan-out, process pool and history gauges (not versioned)"""
+    return await parent_controller.get_metrics()
+
+
+@router.post("/memo/invalidate")
+async def invalidate_memo(agent: Optional[str] = None) -> Dict[str, Any]:
+    """Drop memoized results of one agent, or of all agents"""
+    return parent_controller.invalidate_memo(agent)
 
 
 @router.get("/status/{agent_name}")
@@ -49,11 +134,43 @@ async def get_agent_status(agent_name: str) -> Dict[str, Any]:
     return result
 
 
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    """Epoch seconds for a query datetime (naive values are UTC)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@router.get("/history")
+async def get_history(
+    agent: Optional[str] = None,
+    success: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500)
+) -> Dict[str, Any]:
+    """Page through execution history, newest first; pass next_cursor back as cursor"""
+    return await parent_controller.query_history(
+        agent=agent,
+        success=success,
+        since=_epoch(since),
+        until=_epoch(until),
+        cursor=cursor,
+        limit=limit
+    )
+
+
 @router.post("/register")
-async def register_agent(name: str) -> Dict[str, Any]:
-    """Register a new agent"""
-    agent = BaseAgent(name)
-    return parent_controller.register_agent(name, agent)
+async def register_agent(name: str, memoize: bool = False, profile: Optional[AgentProfile] = None) -> Dict[str, Any]:
+    """
+    Register a new agent (memoize caches its results by prompt and context;
+    the optional profile body's memory_capacity bounds its conversations)
+    """
+    agent = BaseAgent(name, llm=llm_provider)
+    return await parent_controller.register_agent(name, agent, memoize=memoize, profile=profile)
 
 
 @router.post("/run")
@@ -62,35 +179,172 @@ async def run_agents(request: AgentRequest) -> Dict[str, Any]:
     results = await parent_controller.run_agents(
         request.prompt,
         request.context,
-        request.target_agents
+        request.target_agents,
+        deadline=_request_deadline(request),
+        max_concurrency=request.max_concurrency,
+        first_n=request.first_n
     )
+    timed_out = [r["agent"] for r in results if r.get("status") == "timeout"]
     return {
         "prompt": request.prompt,
         "results": results,
-        "total_results": len(results)
+        "total_results": len(results),
+        "timed_out_agents": timed_out,
+        "partial": bool(timed_out)
     }
 
 
+@router.post("/pipeline")
+async def run_pipeline(request: PipelineRequest) -> Dict[str, Any]:
+    """Execute agents as a DAG, passing results along dependency edges"""
+    try:
+        return await parent_controller.run_pipeline(
+            request.prompt,
+            request.context,
+            [node.model_dump() for node in request.nodes],
+            deadline=_request_deadline(request),
+            max_concurrency=request.max_concurrency
+        )
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/run/stream")
+async def run_agents_stream(request: AgentRequest) -> StreamingResponse:
+    """Execute agents with prompt, streaming events as Server-Sent Events"""
+    async def event_source() -> AsyncIterator[str]:
+        events = parent_controller.run_agents_stream(
+            request.prompt,
+            request.context,
+            request.target_agents,
+            deadline=_request_deadline(request),
+            max_concurrency=request.max_concurrency
+        )
+        async with aclosing(events):
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/run")
+async def run_agents_websocket(websocket: WebSocket):
+    """WebSocket agent execution - one JSON AgentRequest in, a stream of events out"""
+    await websocket.accept()
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                request = AgentRequest(**data)
+            except ValidationError as e:
+                await websocket.send_json({"event": "error", "error": str(e)})
+                continue
+            events = parent_controller.run_agents_stream(
+                request.prompt,
+                request.context,
+                request.target_agents,
+                deadline=_request_deadline(request),
+                max_concurrency=request.max_concurrency
+            )
+            async with aclosing(events):
+                async for event in events:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        print("Agent run WebSocket disconnected")
+
+
+@router.post("/executions", status_code=202)
+async def submit_execution(request: AgentRequest) -> Dict[str, Any]:
+    """Queue agents for background execution and return its ID at once"""
+    try:
+        execution = await execution_queue.submit(
+            request.prompt,
+            request.context,
+            request.target_agents,
+            timeout=request.timeout,
+            max_concurrency=request.max_concurrency,
+            first_n=request.first_n
+        )
+    except RateLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return {"execution_id": execution["id"], "status": execution["status"]}
+
+
+@router.get("/executions")
+async def get_executions_status() -> Dict[str, Any]:
+    """Get execution queue depth and worker usage"""
+    return execution_queue.get_stats()
+
+
+@router.get("/executions/{execution_id}")
+async def get_execution(execution_id: str) -> Dict[str, Any]:
+    """Get execution status and results"""
+    try:
+        return await execution_queue.get(execution_id)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/executions/{execution_id}/wait")
+async def wait_execution(execution_id: str, timeout: float = 30.0) -> Dict[str, Any]:
+    """Long-poll until the execution finishes or timeout (capped at EXECUTION_WAIT_MAX) passes"""
+    try:
+        return await execution_queue.wait(
+            execution_id, max(0.0, min(timeout, settings.EXECUTION_WAIT_MAX))
+        )
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/executions/{execution_id}/cancel")
+async def cancel_execution(execution_id: str) -> Dict[str, Any]:
+    """Cancel a pending or running execution"""
+    try:
+        return await execution_queue.cancel(execution_id)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/upgrade-request")
 async def submit_upgrade(request: UpgradeRequest) -> Dict[str, Any]:
     """Submit agent upgrade request"""
-    return parent_controller.request_upgrade(request.user, request.proposal)
+    return await parent_controller.request_upgrade(request.user, request.proposal)
 
 
 @router.get("/upgrade-requests")
-async def get_upgrade_requests() -> Dict[str, Any]:
-    """Get pending upgrade requests"""
-    status = parent_controller.get_status()
+async def get_upgrade_requests(
+    status: Optional[str] = None,
+    user: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500)
+) -> Dict[str, Any]:
+    """Page through upgrade requests, newest first; pass next_cursor back as cursor"""
+    page = await parent_controller.query_upgrade_requests(
+        status=status,
+        user=user,
+        since=_epoch(since),
+        until=_epoch(until),
+        cursor=cursor,
+        limit=limit
+    )
     return {
-        "upgrade_requests": status["upgrade_requests"],
-        "total": len(status["upgrade_requests"])
+        "upgrade_requests": page["items"],
+        "next_cursor": page["next_cursor"],
+        "counts": page["counts"],
+        "total": page["counts"]["total"]
     }
 
 
 @router.post("/upgrade-requests/{request_id}/approve")
 async def approve_upgrade(request_id: int) -> Dict[str, Any]:
     """Approve upgrade request"""
-    result = parent_controller.approve_upgrade(request_id)
+    result = await parent_controller.approve_upgrade(request_id)
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
@@ -99,7 +353,7 @@ async def approve_upgrade(request_id: int) -> Dict[str, Any]:
 @router.post("/upgrade-requests/{request_id}/reject")
 async def reject_upgrade(request_id: int) -> Dict[str, Any]:
     """Reject upgrade request"""
-    result = parent_controller.reject_upgrade(request_id)
+    result = await parent_controller.reject_upgrade(request_id)
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
@@ -2,9 +2,14 @@
 Chat Endpoint - Chat and messaging interface
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from contextlib import aclosing
+import json
+from config.settings import settings
+from utils.database import db
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -55,3 +60,144 @@ async def get_chat_history(limit: int = 50) -> Dict[str, Any]:
 async def clear_history() -> Dict[str, str]:
     """Clear chat history"""
     return {"status": "cleared"}
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    (line number, line) for each non-blank line, read as the body arrives
+    
+    Only the bytes of each new chunk are scanned for newlines, so a line
+    spread over many chunks costs time linear in its length.
+    
+    Raises:
+        HTTPException: 413 when a line is longer than max_line_bytes
+    """
+    buffer = bytearray()
+    number = 0
+    async for chunk in chunks:
+        scan = len(buffer)
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", scan)
+            if end == -1:
+                break
+            number += 1
+            if end - start > max_line_bytes:
+                raise HTTPException(status_code=413, detail=f"Line {number} exceeds {max_line_bytes} bytes")
+            line = bytes(buffer[start:end])
+            if line.strip():
+                yield number, line
+            start = scan = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise HTTPException(status_code=413, detail=f"Line {number + 1} exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield number + 1, bytes(buffer)
+
+
+def _parse_record(line: bytes) -> Tuple[str, str, dict]:
+    """("message", conversation_id, message) or ("execution", agent_id, execution)"""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    if isinstance(record.get("message"), dict) and record.get("conversation_id"):
+        return "message", str(record["conversation_id"]), record["message"]
+    if isinstance(record.get("execution"), dict) and record.get("agent_id"):
+        return "execution", str(record["agent_id"]), record["execution"]
+    raise ValueError('expected {"conversation_id", "message"} or {"agent_id", "execution"}')
+
+
+async def _commit_batch(index: int, first_line: int, last_line: int, records: List[Tuple[str, str, dict]],
+                        errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write one batch, grouped by conversation and agent, in a single write and describe it"""
+    groups: Dict[str, Dict[str, List[dict]]] = {"message": {}, "execution": {}}
+    for kind, key, value in records:
+        groups[kind].setdefault(key, []).append(value)
+    ids = await db.call("add_records", groups["message"], groups["execution"])
+    return {
+        "batch": index,
+        "lines": [first_line, last_line],
+        "messages": sum(len(values) for values in groups["message"].values()),
+        "executions": sum(len(values) for values in groups["execution"].values()),
+        "first_id": min(ids) if ids else None,
+        "last_id": max(ids) if ids else None,
+        "errors": errors,
+    }
+
+
+async def _import_batches(lines: AsyncIterator[Tuple[int, bytes]], batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+    """Parse NDJSON records and commit them every batch_size lines, yielding each batch's acknowledgement"""
+    records: List[Tuple[str, str, dict]] = []
+    errors: List[Dict[str, Any]] = []
+    first_line = last_line = 0
+    index = 0
+    async for number, line in lines:
+        if not records and not errors:
+            first_line = number
+        last_line = number
+        try:
+            records.append(_parse_record(line))
+        except ValueError as e:
+            errors.append({"line": number, "error": str(e)})
+        if len(records) + len(errors) >= batch_size:
+            yield await _commit_batch(index, first_line, last_line, records, errors)
+            index += 1
+            records, errors = [], []
+    if records or errors:
+        yield await _commit_batch(index, first_line, last_line, records, errors)
+
+
+@router.post("/import")
+async def import_records(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=10000)
+) -> StreamingResponse:
+    """
+    Bulk-load messages and executions from an NDJSON body
+    
+    Each line is {"conversation_id": ..., "message": {...}} or
+    {"agent_id": ..., "execution": {...}}. The body is parsed as it
+    streams in and written every batch_size lines (IMPORT_BATCH_SIZE by
+    default), one database write per batch. Lines that fail to parse are
+    reported with their batch and skipped.
+    
+    The response is NDJSON too: one acknowledgement per batch, sent as
+    soon as the batch commits, then a summary line with the totals.
+    Each batch commits on its own. An overlong line before the first
+    commit is a plain 413; after it, batches already acknowledged stay
+    committed and the summary has status "rejected" and the error.
+    """
+    batches = _import_batches(
+        _ndjson_lines(request.stream(), settings.IMPORT_MAX_LINE_BYTES),
+        batch_size or settings.IMPORT_BATCH_SIZE
+    )
+    try:
+        first = await anext(batches, None)
+    except HTTPException:
+        await batches.aclose()
+        raise
+    
+    async def acknowledgements() -> AsyncIterator[str]:
+        totals = {"batches": 0, "messages": 0, "executions": 0, "errors": 0}
+        async with aclosing(batches):
+            batch = first
+            try:
+                while batch is not None:
+                    totals["batches"] += 1
+                    totals["messages"] += batch["messages"]
+                    totals["executions"] += batch["executions"]
+                    totals["errors"] += len(batch["errors"])
+                    yield json.dumps(batch) + "\n"
+                    batch = await anext(batches, None)
+            except HTTPException as e:
+                # The pending batch is dropped; the ones acknowledged stay committed
+                yield json.dumps({"status": "rejected", "status_code": e.status_code, "error": e.detail, **totals}) + "\n"
+                return
+        yield json.dumps({"status": "imported", **totals}) + "\n"
+    
+    return StreamingResponse(
+        acknowledgements(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
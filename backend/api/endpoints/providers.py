@@ -0,0 +1,15 @@
+"""
+Providers Endpoint - LLM provider routing and health
+"""
+
+from fastapi import APIRouter
+from typing import Dict, Any
+from tools.llm_provider import llm_provider
+
+router = APIRouter(prefix="/providers", tags=["providers"])
+
+
+@router.get("/status")
+async def get_providers_status() -> Dict[str, Any]:
+    """Get provider routing, circuit breaker, cache and coalescing state"""
+    return llm_provider.get_status()
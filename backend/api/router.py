@@ -3,8 +3,9 @@ Main API Router - Combines all endpoints
 """
 
 from fastapi import APIRouter
-from api.endpoints import console, chat, agents
+from api.endpoints import console, chat, agents, providers
 from agents.parent_controller import parent_controller
+from api.admission import admission_controller
 from config.settings import settings
 
 router = APIRouter()
@@ -13,6 +14,7 @@ router = APIRouter()
 router.include_router(console.router)
 router.include_router(chat.router)
 router.include_router(agents.router)
+router.include_router(providers.router)
 
 
 @router.get("/")
@@ -25,7 +27,8 @@ async def root():
         "endpoints": {
             "console": "/console",
             "chat": "/chat",
-            "agents": "/agents"
+            "agents": "/agents",
+            "providers": "/providers"
         }
     }
 
@@ -33,14 +36,20 @@ async def root():
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    status = parent_controller.get_status()
+    # Constant time: no snapshot, store or history access
     return {
         "status": "healthy",
-        "agents_available": status["total_agents"],
-        "controller": status["controller_status"]
+        "agents_available": parent_controller.agent_count(),
+        "controller": "active"
     }
 
 
+@router.get("/admission")
+async def get_admission_stats():
+    """Load, thresholds and accepted/shed request counts"""
+    return admission_controller.get_stats()
+
+
 @router.get("/config")
 async def get_config():
     """Get API configuration"""
@@ -4,7 +4,8 @@ Stage 1: Initial Configuration
 """
 
 import os
-from typing import Optional
+import json
+from typing import Optional, Dict, Any
 
 class Settings:
     """Base application settings"""
@@ -17,17 +18,126 @@ class Settings:
     PORT: int = int(os.getenv("PORT", "8000"))
     
     # LLM Configuration
+    LLM_PROVIDER: Optional[str] = os.getenv("LLM_PROVIDER")  # "simulation" for load testing
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     HF_MODEL: Optional[str] = os.getenv("HF_MODEL")
+    HUGGINGFACE_API_KEY: Optional[str] = os.getenv("HUGGINGFACE_API_KEY")
     LLAMA_PATH: Optional[str] = os.getenv("LLAMA_PATH")
     LLM_TIMEOUT: int = int(os.getenv("LLM_TIMEOUT", "30"))
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL")
+    HF_BASE_URL: Optional[str] = os.getenv("HF_BASE_URL")
+    LLAMA_BASE_URL: Optional[str] = os.getenv("LLAMA_BASE_URL")
+    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4")
+    
+    # LLM Context Window Budgeting
+    LLM_CONTEXT_POLICY: str = os.getenv("LLM_CONTEXT_POLICY", "truncate")  # truncate | reject
+    # Per-model overrides, e.g. {"my-finetune": 16384}
+    LLM_CONTEXT_WINDOWS: Dict[str, int] = json.loads(os.getenv("LLM_CONTEXT_WINDOWS", "{}"))
+    
+    # LLM HTTP Connection Pool
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+    LLM_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "false").lower() == "true"
+    
+    # LLM Simulation Provider (LLM_PROVIDER=simulation)
+    LLM_SIM_LATENCY_DISTRIBUTION: str = os.getenv("LLM_SIM_LATENCY_DISTRIBUTION", "lognormal")
+    LLM_SIM_LATENCY_MEDIAN_MS: float = float(os.getenv("LLM_SIM_LATENCY_MEDIAN_MS", "200"))
+    LLM_SIM_LATENCY_SIGMA: float = float(os.getenv("LLM_SIM_LATENCY_SIGMA", "0.5"))
+    # Used with the "percentiles" distribution, e.g. {"50": 200, "95": 800, "99": 2000}
+    LLM_SIM_LATENCY_PERCENTILES: Dict[str, float] = json.loads(
+        os.getenv("LLM_SIM_LATENCY_PERCENTILES", '{"50": 200, "95": 800, "99": 2000}')
+    )
+    LLM_SIM_ERROR_RATE: float = float(os.getenv("LLM_SIM_ERROR_RATE", "0"))
+    LLM_SIM_TIMEOUT_RATE: float = float(os.getenv("LLM_SIM_TIMEOUT_RATE", "0"))
+    LLM_SIM_TOKEN_INTERVAL_MS: float = float(os.getenv("LLM_SIM_TOKEN_INTERVAL_MS", "20"))
+    LLM_SIM_COMPLETION_TOKENS: int = int(os.getenv("LLM_SIM_COMPLETION_TOKENS", "32"))
+    LLM_SIM_SEED: Optional[int] = int(os.environ["LLM_SIM_SEED"]) if os.getenv("LLM_SIM_SEED") else None
+    
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", "3600"))
+    LLM_CACHE_DIR: Optional[str] = os.getenv("LLM_CACHE_DIR")
+    LLM_CACHE_DISK_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "10000"))
+    LLM_COALESCE_REQUESTS: bool = os.getenv("LLM_COALESCE_REQUESTS", "true").lower() == "true"
+    
+    # LLM Provider Routing
+    LLM_ROUTING_EWMA_ALPHA: float = float(os.getenv("LLM_ROUTING_EWMA_ALPHA", "0.2"))
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RECOVERY_TIME: float = float(os.getenv("LLM_BREAKER_RECOVERY_TIME", "30"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    
+    # LLM Micro-batching
+    LLM_BATCHING_ENABLED: bool = os.getenv("LLM_BATCHING_ENABLED", "false").lower() == "true"
+    LLM_BATCH_MAX_SIZE: int = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+    LLM_BATCH_MAX_WAIT_MS: int = int(os.getenv("LLM_BATCH_MAX_WAIT_MS", "10"))
+    
+    # LLM Rate Limiting (0 disables a limit)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_REQUESTS_PER_SECOND: float = float(os.getenv("LLM_REQUESTS_PER_SECOND", "0"))
+    LLM_TOKENS_PER_MINUTE: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+    LLM_QUEUE_TIMEOUT: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+    # Per-provider overrides, e.g. {"openai": {"max_concurrency": 4, "requests_per_second": 3}}
+    LLM_PROVIDER_LIMITS: Dict[str, Dict[str, Any]] = json.loads(os.getenv("LLM_PROVIDER_LIMITS", "{}"))
     
     # WebSocket Configuration
     WS_HEARTBEAT: int = int(os.getenv("WS_HEARTBEAT", "30"))
     
     # Agent Configuration
-    MAX_AGENTS: int = int(os.getenv("MAX_AGENTS", "10"))
+    MAX_AGENTS: int = int(os.getenv("MAX_AGENTS", "10"))  # agent runs in flight per request
+    MAX_CONCURRENT_AGENT_RUNS: int = int(os.getenv("MAX_CONCURRENT_AGENT_RUNS", "64"))
+    AGENT_PROCESS_WORKERS: int = int(os.getenv("AGENT_PROCESS_WORKERS", str(os.cpu_count() or 1)))
     AGENT_TIMEOUT: int = int(os.getenv("AGENT_TIMEOUT", "60"))
+    REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "60"))
+    AGENT_POOL_MIN_SIZE: int = int(os.getenv("AGENT_POOL_MIN_SIZE", "1"))  # instances per agent
+    AGENT_POOL_MAX_SIZE: int = int(os.getenv("AGENT_POOL_MAX_SIZE", "4"))
+    AGENT_POOL_IDLE_TIMEOUT: float = float(os.getenv("AGENT_POOL_IDLE_TIMEOUT", "60"))
+    AGENT_MEMO_MAX_ENTRIES: int = int(os.getenv("AGENT_MEMO_MAX_ENTRIES", "256"))  # per memoized agent
+    AGENT_MEMO_TTL: int = int(os.getenv("AGENT_MEMO_TTL", "300"))
+    STATUS_PUBLISH_INTERVAL: float = float(os.getenv("STATUS_PUBLISH_INTERVAL", "1.0"))  # seconds between status versions for run-state changes
+    
+    # Database ("sqlite:///./app.db" for the persistent engine; empty keeps data in memory)
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    DATABASE_BATCH_SIZE: int = int(os.getenv("DATABASE_BATCH_SIZE", "256"))  # calls per transaction
+    # Messages kept per conversation (AgentProfile.memory_capacity default; 0 for no limit)
+    CONVERSATION_MEMORY_CAPACITY: int = int(os.getenv("CONVERSATION_MEMORY_CAPACITY", "0"))
+    CONVERSATION_RETENTION_POLICY: str = os.getenv("CONVERSATION_RETENTION_POLICY", "truncate")  # or summarize
+    # In-memory engine: messages held before idle conversations spill to disk (0 for no limit)
+    MEMORY_MAX_RESIDENT_MESSAGES: int = int(os.getenv("MEMORY_MAX_RESIDENT_MESSAGES", "100000"))
+    MEMORY_SPILL_PATH: str = os.getenv("MEMORY_SPILL_PATH", "")
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))  # NDJSON lines per commit
+    IMPORT_MAX_LINE_BYTES: int = int(os.getenv("IMPORT_MAX_LINE_BYTES", "1048576"))
+    
+    # Admission control (load shedding) for the agent and chat routes
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "256"))  # sheds normal priority
+    ADMISSION_SOFT_IN_FLIGHT: int = int(os.getenv("ADMISSION_SOFT_IN_FLIGHT", "192"))  # sheds low priority
+    ADMISSION_MAX_LOOP_LAG_MS: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "500"))
+    ADMISSION_SOFT_LOOP_LAG_MS: float = float(os.getenv("ADMISSION_SOFT_LOOP_LAG_MS", "200"))
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+    ADMISSION_PATHS: str = os.getenv("ADMISSION_PATHS", "/agents,/chat")
+    ADMISSION_EXEMPT_PATHS: str = os.getenv("ADMISSION_EXEMPT_PATHS", "/health")
+    ADMISSION_LOW_PRIORITY_PATHS: str = os.getenv("ADMISSION_LOW_PRIORITY_PATHS", "/agents/executions,/agents/history")
+    ADMISSION_PRIORITY_TOKEN: str = os.getenv("ADMISSION_PRIORITY_TOKEN", "")  # required for X-Priority: high
+    
+    # Multi-worker deployment
+    WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    SHARED_STATE_PATH: Optional[str] = os.getenv("SHARED_STATE_PATH") or None  # SQLite file shared by workers
+    SHARED_STATE_SYNC_INTERVAL: float = float(os.getenv("SHARED_STATE_SYNC_INTERVAL", "0.5"))  # seconds between checks for other workers' changes
+    
+    # History
+    EXECUTION_HISTORY_SIZE: int = int(os.getenv("EXECUTION_HISTORY_SIZE", "500"))
+    NOTIFIER_HISTORY_SIZE: int = int(os.getenv("NOTIFIER_HISTORY_SIZE", "1000"))
+    
+    # Background Executions
+    EXECUTION_WORKERS: int = int(os.getenv("EXECUTION_WORKERS", "4"))
+    EXECUTION_QUEUE_SIZE: int = int(os.getenv("EXECUTION_QUEUE_SIZE", "100"))
+    EXECUTION_TIMEOUT: int = int(os.getenv("EXECUTION_TIMEOUT", "600"))
+    EXECUTION_WAIT_MAX: int = int(os.getenv("EXECUTION_WAIT_MAX", "60"))
     
     @classmethod
     def to_dict(cls):
@@ -41,8 +151,90 @@ class Settings:
                 "openai": bool(cls.OPENAI_API_KEY),
                 "huggingface": bool(cls.HF_MODEL),
                 "llama_local": bool(cls.LLAMA_PATH),
+                "simulation": cls.LLM_PROVIDER == "simulation",
             },
             "max_agents": cls.MAX_AGENTS,
+            "max_concurrent_agent_runs": cls.MAX_CONCURRENT_AGENT_RUNS,
+            "agent_process_workers": cls.AGENT_PROCESS_WORKERS,
+            "agent_pool": {
+                "min_size": cls.AGENT_POOL_MIN_SIZE,
+                "max_size": cls.AGENT_POOL_MAX_SIZE,
+                "idle_timeout": cls.AGENT_POOL_IDLE_TIMEOUT,
+            },
+            "agent_memo": {
+                "max_entries": cls.AGENT_MEMO_MAX_ENTRIES,
+                "ttl": cls.AGENT_MEMO_TTL,
+            },
+            "admission": {
+                "enabled": cls.ADMISSION_ENABLED,
+                "max_in_flight": cls.ADMISSION_MAX_IN_FLIGHT,
+                "soft_in_flight": cls.ADMISSION_SOFT_IN_FLIGHT,
+                "max_loop_lag_ms": cls.ADMISSION_MAX_LOOP_LAG_MS,
+                "soft_loop_lag_ms": cls.ADMISSION_SOFT_LOOP_LAG_MS,
+            },
+            "executions": {
+                "workers": cls.EXECUTION_WORKERS,
+                "queue_size": cls.EXECUTION_QUEUE_SIZE,
+                "timeout": cls.EXECUTION_TIMEOUT,
+            },
+            "llm_cache": {
+                "enabled": cls.LLM_CACHE_ENABLED,
+                "max_entries": cls.LLM_CACHE_MAX_ENTRIES,
+                "ttl": cls.LLM_CACHE_TTL,
+                "disk": bool(cls.LLM_CACHE_DIR),
+            },
+        }
+    
+    @classmethod
+    def llm_config(cls):
+        """Build the LLMProvider config dictionary"""
+        return {
+            "provider": cls.LLM_PROVIDER,
+            "openai_api_key": cls.OPENAI_API_KEY,
+            "hf_model": cls.HF_MODEL,
+            "hf_api_key": cls.HUGGINGFACE_API_KEY,
+            "llama_path": cls.LLAMA_PATH,
+            "openai_base_url": cls.OPENAI_BASE_URL,
+            "hf_base_url": cls.HF_BASE_URL,
+            "llama_base_url": cls.LLAMA_BASE_URL,
+            "openai_model": cls.OPENAI_MODEL,
+            "context_policy": cls.LLM_CONTEXT_POLICY,
+            "context_windows": cls.LLM_CONTEXT_WINDOWS,
+            "timeout": cls.LLM_TIMEOUT,
+            "http_max_connections": cls.LLM_HTTP_MAX_CONNECTIONS,
+            "http_max_keepalive": cls.LLM_HTTP_MAX_KEEPALIVE,
+            "http_keepalive_expiry": cls.LLM_HTTP_KEEPALIVE_EXPIRY,
+            "http_connect_timeout": cls.LLM_HTTP_CONNECT_TIMEOUT,
+            "http2": cls.LLM_HTTP2,
+            "sim_latency_distribution": cls.LLM_SIM_LATENCY_DISTRIBUTION,
+            "sim_latency_median_ms": cls.LLM_SIM_LATENCY_MEDIAN_MS,
+            "sim_latency_sigma": cls.LLM_SIM_LATENCY_SIGMA,
+            "sim_latency_percentiles": cls.LLM_SIM_LATENCY_PERCENTILES,
+            "sim_error_rate": cls.LLM_SIM_ERROR_RATE,
+            "sim_timeout_rate": cls.LLM_SIM_TIMEOUT_RATE,
+            "sim_token_interval_ms": cls.LLM_SIM_TOKEN_INTERVAL_MS,
+            "sim_completion_tokens": cls.LLM_SIM_COMPLETION_TOKENS,
+            "sim_seed": cls.LLM_SIM_SEED,
+            "cache_enabled": cls.LLM_CACHE_ENABLED,
+            "cache_max_entries": cls.LLM_CACHE_MAX_ENTRIES,
+            "cache_ttl": cls.LLM_CACHE_TTL,
+            "cache_dir": cls.LLM_CACHE_DIR,
+            "cache_disk_max_entries": cls.LLM_CACHE_DISK_MAX_ENTRIES,
+            "coalesce_requests": cls.LLM_COALESCE_REQUESTS,
+            "routing_ewma_alpha": cls.LLM_ROUTING_EWMA_ALPHA,
+            "breaker_failure_threshold": cls.LLM_BREAKER_FAILURE_THRESHOLD,
+            "breaker_recovery_time": cls.LLM_BREAKER_RECOVERY_TIME,
+            "hedge_enabled": cls.LLM_HEDGE_ENABLED,
+            "hedge_percentile": cls.LLM_HEDGE_PERCENTILE,
+            "hedge_min_samples": cls.LLM_HEDGE_MIN_SAMPLES,
+            "batching_enabled": cls.LLM_BATCHING_ENABLED,
+            "batch_max_size": cls.LLM_BATCH_MAX_SIZE,
+            "batch_max_wait": cls.LLM_BATCH_MAX_WAIT_MS / 1000.0,
+            "max_concurrency": cls.LLM_MAX_CONCURRENCY,
+            "requests_per_second": cls.LLM_REQUESTS_PER_SECOND,
+            "tokens_per_minute": cls.LLM_TOKENS_PER_MINUTE,
+            "queue_timeout": cls.LLM_QUEUE_TIMEOUT,
+            "provider_limits": cls.LLM_PROVIDER_LIMITS,
         }
 
 settings = Settings()
@@ -5,9 +5,13 @@ Stage 1: Initial Scaffold with Agent Orchestration
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from api.admission import AdmissionMiddleware, admission_controller
 from api.router import router
 from config.settings import settings
 from agents.parent_controller import parent_controller, BaseAgent
+from agents.execution_queue import execution_queue
+from tools.llm_provider import llm_provider
+from utils.database import db
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -25,6 +29,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shed agent and chat requests under overload (added last, so it runs first)
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Include routers
 app.include_router(router)
 
@@ -33,13 +41,28 @@ app.include_router(router)
 async def startup_event():
     """Initialize on startup"""
     print(f"Starting {settings.API_TITLE} v{settings.API_VERSION}")
+    if settings.WORKERS > 1 and not settings.SHARED_STATE_PATH:
+        print("Warning: multiple workers without SHARED_STATE_PATH; each worker keeps its own state")
+    
+    # Open pooled HTTP clients for LLM providers
+    await llm_provider.startup()
+    
+    # Sample event-loop lag for load shedding
+    if settings.ADMISSION_ENABLED:
+        await admission_controller.startup()
     
     # Register default agents
     for agent_name in ["Aelira", "Zyra", "Xyron", "Orryn"]:
-        agent = BaseAgent(agent_name)
-        parent_controller.register_agent(agent_name, agent)
+        agent = BaseAgent(agent_name, llm=llm_provider)
+        await parent_controller.register_agent(agent_name, agent)
         print(f"Registered agent: {agent_name}")
     
+    # Follow other workers' registrations and upgrade requests
+    await parent_controller.startup()
+    
+    # Start background execution workers
+    await execution_queue.startup()
+    
     print("Application startup complete")
 
 
@@ -47,13 +70,19 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     print(f"Shutting down {settings.API_TITLE}")
+    await execution_queue.shutdown()
+    await admission_controller.shutdown()
+    parent_controller.shutdown()
+    await llm_provider.shutdown()
+    db.close()
 
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        app,
+        "main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        workers=settings.WORKERS
     )
@@ -1,7 +1,7 @@
 """Data models for My.app"""
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -40,6 +40,7 @@ class ExecutionStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class Execution(BaseModel):
@@ -53,6 +54,10 @@ class Execution(BaseModel):
     started_at: Optional[datetime] = Field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
+    target_agents: Optional[List[str]] = None
+    results: Optional[List[Dict[str, Any]]] = None
+    timed_out_agents: Optional[List[str]] = None
+    partial: bool = False
 
     class Config:
         schema_extra = {
@@ -0,0 +1,124 @@
+"""
+Micro-batching scheduler for My.app
+Groups prompts that arrive close together into one batched provider call
+"""
+
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Set
+import asyncio
+import json
+
+
+BatchFn = Callable[..., Awaitable[List[Dict[str, Any]]]]
+
+
+class BatchScheduler:
+    """
+    Collects prompts per (provider, options) and flushes them as a batch
+    
+    A batch is flushed when it reaches max_batch_size or when max_wait
+    seconds have passed since its first prompt arrived, whichever comes
+    first. Each caller's future is resolved with its own result; if the
+    batched call raises, every caller in the batch receives the error.
+    """
+    
+    def __init__(self, batch_fn: BatchFn, max_batch_size: int = 8, max_wait: float = 0.01):
+        """
+        Initialize BatchScheduler
+        
+        Args:
+            batch_fn: Coroutine called as batch_fn(provider, prompts, **options)
+                returning one result per prompt, in order
+            max_batch_size: Flush as soon as this many prompts are queued
+            max_wait: Seconds to wait for more prompts before flushing
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: Dict[Tuple[str, str], List[Tuple[str, asyncio.Future]]] = {}
+        self._options: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+    
+    async def submit(self, provider: str, prompt: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a prompt and wait for its result
+        
+        Args:
+            provider: Provider the batch will be sent to
+            prompt: Input prompt
+            options: Generation options (only prompts with equal options share a batch)
+        
+        Returns:
+            Result dictionary for this prompt
+        """
+        loop = asyncio.get_running_loop()
+        key = (provider, json.dumps(options, sort_keys=True, default=str))
+        future = loop.create_future()
+        
+        batch = self._pending.setdefault(key, [])
+        batch.append((prompt, future))
+        self._options[key] = options
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        
+        return await future
+    
+    def _flush(self, key: Tuple[str, str]):
+        """Send the queued prompts for key as one batch"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        options = self._options.pop(key, {})
+        # Callers cancelled while queued are dropped from the batch
+        batch = [(prompt, future) for prompt, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        task = asyncio.ensure_future(self._run_batch(key[0], batch, options))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    async def _run_batch(
+        self,
+        provider: str,
+        batch: List[Tuple[str, asyncio.Future]],
+        options: Dict[str, Any]
+    ):
+        """Execute a batch and resolve each caller's future"""
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            results = await self.batch_fn(provider, prompts, **options)
+            if len(results) != len(prompts):
+                raise RuntimeError(
+                    f"Batch for {provider} returned {len(results)} results for {len(prompts)} prompts"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching counters"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait": self.max_wait,
+            "queued": sum(len(batch) for batch in self._pending.values()),
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
@@ -0,0 +1,136 @@
+"""
+HTTP Client Pool for My.app
+Shared keep-alive async HTTP clients for network-backed LLM providers
+"""
+
+from typing import Dict, Any
+import httpx
+
+
+class HTTPClientPool:
+    """
+    One connection-pooled httpx.AsyncClient per provider
+    
+    Clients are opened once at application startup and closed on shutdown
+    so connections (and TLS sessions) are reused across requests. New
+    connections are counted through httpx's "trace" request extension;
+    requests per connection opened shows how well they are reused.
+    """
+    
+    def __init__(
+        self,
+        base_urls: Dict[str, str],
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        timeout: float = 30.0,
+        http2: bool = False
+    ):
+        """
+        Initialize HTTPClientPool
+        
+        Args:
+            base_urls: Provider name -> base URL
+            max_connections: Maximum open connections per provider
+            max_keepalive_connections: Idle connections kept per provider
+            keepalive_expiry: Seconds an idle connection is kept
+            connect_timeout: Connection establishment timeout in seconds
+            timeout: Read/write/pool timeout in seconds
+            http2: Negotiate HTTP/2 (requires the h2 package)
+        """
+        self.base_urls = base_urls
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats: Dict[str, Dict[str, int]] = {
+            name: {"requests": 0, "errors": 0, "in_flight": 0, "connections_opened": 0} for name in base_urls
+        }
+    
+    async def startup(self):
+        """Open a client for every configured provider"""
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("HTTPClientPool: h2 not installed, falling back to HTTP/1.1")
+                http2 = False
+        for name, base_url in self.base_urls.items():
+            if name not in self.clients:
+                self.clients[name] = httpx.AsyncClient(
+                    base_url=base_url,
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=http2
+                )
+    
+    async def shutdown(self):
+        """Close all clients and their connections"""
+        clients, self.clients = self.clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"HTTPClientPool error closing {name}: {e}")
+    
+    def get_client(self, provider: str) -> httpx.AsyncClient:
+        """Return the open client for provider"""
+        client = self.clients.get(provider)
+        if client is None:
+            raise RuntimeError(f"HTTP client for {provider} is not open")
+        return client
+    
+    async def request(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the provider's pooled client
+        
+        Args:
+            provider: Provider name
+            method: HTTP method
+            url: URL, relative to the provider's base URL
+            **kwargs: Passed to httpx.AsyncClient.request
+        
+        Returns:
+            Response (status is raised for 4xx/5xx)
+        """
+        client = self.get_client(provider)
+        stats = self.stats[provider]
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        
+        async def trace(event: str, info: Dict[str, Any]):
+            if event == "connection.connect_tcp.complete":
+                stats["connections_opened"] += 1
+        
+        kwargs["extensions"] = {"trace": trace, **kwargs.get("extensions", {})}
+        try:
+            response = await client.request(method, url, **kwargs)
+            response.raise_for_status()
+            return response
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool usage per provider"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "providers": {
+                name: {
+                    "open": name in self.clients,
+                    "base_url": self.base_urls[name],
+                    **self.stats[name]
+                }
+                for name in self.base_urls
+            },
+        }
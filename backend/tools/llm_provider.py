@@ -1,10 +1,23 @@
 """
 LLM Provider for My.app
-Supports: OpenAI, HuggingFace, LLaMA Local, Demo Mode
+Supports: OpenAI, HuggingFace, LLaMA Local, Demo Mode, Simulation
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, Set, List
 import asyncio
+import time
+
+from config.settings import settings
+from tools.response_cache import ResponseCache, make_cache_key
+from tools.single_flight import SingleFlight
+from tools.provider_router import ProviderRouter
+from tools.batch_scheduler import BatchScheduler
+from tools.rate_limiter import ProviderLimiter
+from tools.http_pool import HTTPClientPool
+from tools.simulation_provider import SimulationProvider
+from tools.tokenizer import ContextWindowExceeded, count_tokens, fit_prompt, context_window
+from utils.deadline import Deadline
+from utils.exceptions import RateLimitError, DeadlineExceededError
 
 
 class LLMProvider:
@@ -12,19 +25,48 @@ class LLMProvider:
     Unified LLM Provider supporting multiple backends
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    # Providers whose backends accept several prompts per call
+    BATCH_PROVIDERS = ("huggingface", "llama_local", "demo_mode", "simulation")
+    # Generation options forwarded to the OpenAI API
+    OPENAI_PARAMETERS = ("temperature", "max_tokens", "top_p", "stop")
+    
+    def __init__(self, config: Dict[str, Any], cache: Optional[ResponseCache] = None):
         """
         Initialize LLM Provider with configuration
         
         Args:
             config: Configuration dictionary with API keys and model paths
+            cache: Response cache to use (built from config if None)
         """
         self.config = config
         self.providers = []
         self._init_providers()
+        self.simulator = self._init_simulator()
+        self.router = ProviderRouter(
+            self.providers,
+            ewma_alpha=config.get("routing_ewma_alpha", 0.2),
+            failure_threshold=config.get("breaker_failure_threshold", 5),
+            recovery_time=config.get("breaker_recovery_time", 30.0),
+            hedge_enabled=config.get("hedge_enabled", False),
+            hedge_percentile=config.get("hedge_percentile", 95.0),
+            hedge_min_samples=config.get("hedge_min_samples", 20)
+        )
+        self.cache = cache if cache is not None else self._init_cache()
+        self.inflight = SingleFlight() if config.get("coalesce_requests", True) else None
+        self.batcher = self._init_batcher()
+        self.limiters = self._init_limiters()
+        self.http = self._init_http_pool()
+        self.usage: Dict[str, Dict[str, int]] = {
+            provider: {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "truncated": 0}
+            for provider in self.providers
+        }
     
     def _init_providers(self):
         """Initialize available providers based on config"""
+        if self.config.get("provider") == "simulation":
+            # Load testing: the simulator replaces every real backend
+            self.providers.append("simulation")
+            return
         if self.config.get("openai_api_key"):
             self.providers.append("openai")
         if self.config.get("hf_model"):
@@ -34,6 +76,143 @@ class LLMProvider:
         if not self.providers:
             self.providers.append("demo_mode")
     
+    def _init_simulator(self) -> Optional[SimulationProvider]:
+        """Initialize the synthetic load-testing backend based on config"""
+        if "simulation" not in self.providers:
+            return None
+        return SimulationProvider(
+            distribution=self.config.get("sim_latency_distribution", "lognormal"),
+            latency_median_ms=self.config.get("sim_latency_median_ms", 200.0),
+            latency_sigma=self.config.get("sim_latency_sigma", 0.5),
+            latency_percentiles=self.config.get("sim_latency_percentiles"),
+            error_rate=self.config.get("sim_error_rate", 0.0),
+            timeout_rate=self.config.get("sim_timeout_rate", 0.0),
+            timeout=self.config.get("timeout", 30.0),
+            token_interval_ms=self.config.get("sim_token_interval_ms", 20.0),
+            completion_tokens=self.config.get("sim_completion_tokens", 32),
+            seed=self.config.get("sim_seed")
+        )
+    
+    def _init_cache(self) -> Optional[ResponseCache]:
+        """Initialize response cache based on config"""
+        if not self.config.get("cache_enabled"):
+            return None
+        return ResponseCache(
+            max_entries=self.config.get("cache_max_entries", 1024),
+            ttl=self.config.get("cache_ttl", 3600),
+            disk_dir=self.config.get("cache_dir"),
+            disk_max_entries=self.config.get("cache_disk_max_entries", 10000)
+        )
+    
+    def _init_batcher(self) -> Optional[BatchScheduler]:
+        """Initialize micro-batching scheduler based on config"""
+        if not self.config.get("batching_enabled"):
+            return None
+        return BatchScheduler(
+            self._batch_call_provider,
+            max_batch_size=self.config.get("batch_max_size", 8),
+            max_wait=self.config.get("batch_max_wait", 0.01)
+        )
+    
+    def _init_limiters(self) -> Dict[str, ProviderLimiter]:
+        """Initialize per-provider admission limits based on config"""
+        overrides = self.config.get("provider_limits", {})
+        limiters = {}
+        for provider in self.providers:
+            limits = {
+                "max_concurrency": self.config.get("max_concurrency"),
+                "requests_per_second": self.config.get("requests_per_second"),
+                "tokens_per_minute": self.config.get("tokens_per_minute"),
+                "queue_timeout": self.config.get("queue_timeout", 10.0),
+                **overrides.get(provider, {})
+            }
+            limiters[provider] = ProviderLimiter(
+                provider,
+                max_concurrency=limits["max_concurrency"] or None,
+                requests_per_second=limits["requests_per_second"] or None,
+                tokens_per_minute=limits["tokens_per_minute"] or None,
+                queue_timeout=limits["queue_timeout"]
+            )
+        return limiters
+    
+    def _init_http_pool(self) -> HTTPClientPool:
+        """Initialize pooled HTTP clients for network-backed providers"""
+        base_urls = {}
+        if "openai" in self.providers:
+            base_urls["openai"] = self.config.get("openai_base_url") or "https://api.openai.com/v1"
+        if "huggingface" in self.providers:
+            base_urls["huggingface"] = self.config.get("hf_base_url") or "https://api-inference.huggingface.co"
+        if "llama_local" in self.providers and self.config.get("llama_base_url"):
+            base_urls["llama_local"] = self.config["llama_base_url"]
+        return HTTPClientPool(
+            base_urls,
+            max_connections=self.config.get("http_max_connections", 100),
+            max_keepalive_connections=self.config.get("http_max_keepalive", 20),
+            keepalive_expiry=self.config.get("http_keepalive_expiry", 30.0),
+            connect_timeout=self.config.get("http_connect_timeout", 5.0),
+            timeout=self.config.get("timeout", 30.0),
+            http2=self.config.get("http2", False)
+        )
+    
+    async def startup(self):
+        """Open pooled HTTP clients (call from the application startup hook)"""
+        await self.http.startup()
+    
+    async def shutdown(self):
+        """Close pooled HTTP clients (call from the application shutdown hook)"""
+        await self.http.shutdown()
+    
+    def _model_for(self, provider: str) -> str:
+        """Model name served by provider"""
+        if provider == "openai":
+            return self.config.get("openai_model") or "gpt-4"
+        elif provider == "huggingface":
+            return self.config.get("hf_model", "unknown")
+        elif provider == "llama_local":
+            return self.config.get("llama_path", "unknown")
+        elif provider == "simulation":
+            return "simulation-v1"
+        return "demo-v1"
+    
+    def _prepare_prompt(self, provider: str, prompt: str, options: Dict[str, Any]):
+        """
+        Fit prompt into the provider model's context window
+        
+        Returns:
+            (prompt, prompt_tokens, truncated)
+        
+        Raises:
+            ContextWindowExceeded: Prompt cannot be sent to this provider
+        """
+        model = self._model_for(provider)
+        return fit_prompt(
+            prompt,
+            model,
+            max_completion_tokens=int(options.get("max_tokens", 0)),
+            policy=self.config.get("context_policy", "truncate"),
+            window=context_window(model, self.config.get("context_windows"))
+        )
+    
+    def _account(
+        self, provider: str, result: Dict[str, Any], prompt_tokens: int, truncated: bool
+    ) -> Dict[str, Any]:
+        """Attach token counts to a provider result and update usage totals"""
+        completion_tokens = count_tokens(result["text"], self._model_for(provider))
+        result["metadata"].update({
+            "tokens": prompt_tokens,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        })
+        if truncated:
+            result["metadata"]["prompt_truncated"] = True
+        usage = self.usage[provider]
+        usage["requests"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+        usage["truncated"] += int(truncated)
+        return result
+    
     async def generate(self, prompt: str, **options) -> Dict[str, Any]:
         """
         Generate response using available LLM provider
@@ -41,52 +220,342 @@ class LLMProvider:
         Args:
             prompt: Input prompt
             **options: Additional options (temperature, max_tokens, etc.)
+                use_cache=False bypasses the response cache
+                priority=<int> orders admission when providers are saturated
+                deadline=<Deadline> bounds the whole call, including queueing
         
         Returns:
             Dictionary with text, provider, and metadata
+        
+        Raises:
+            RateLimitError: Every provider stayed saturated past the queue timeout
+            ContextWindowExceeded: Prompt fits no provider's context window
+            DeadlineExceededError: The deadline passed before a response arrived
         """
-        for provider in self.providers:
+        use_cache = options.pop("use_cache", True) and self.cache is not None
+        priority = options.pop("priority", 0)
+        deadline: Deadline = options.pop("deadline", None) or Deadline()
+        deadline.check("LLM generation")
+        key = make_cache_key(prompt, ",".join(self.providers), options)
+        
+        if use_cache:
+            cached = await self.cache.get_async(key)
+            if cached is not None:
+                cached["metadata"]["cached"] = True
+                return cached
+        
+        if self.inflight is None:
+            call = self._generate_uncached(key, prompt, options, priority)
+        else:
+            # The shared call is bounded only by the per-provider timeout; each
+            # caller stops waiting at its own deadline
+            call = self.inflight.do(
+                key, lambda: self._generate_uncached(key, prompt, options, priority)
+            )
+        try:
+            return await asyncio.wait_for(call, deadline.remaining())
+        except asyncio.TimeoutError:
+            if deadline.expired():
+                raise DeadlineExceededError("LLM generation deadline exceeded")
+            raise
+    
+    async def _generate_uncached(
+        self, key: str, prompt: str, options: Dict[str, Any], priority: int = 0
+    ) -> Dict[str, Any]:
+        """Call the providers and populate the cache on success"""
+        result = await self._dispatch(prompt, options, priority)
+        if self.cache is not None and result.get("provider") is not None:
+            await self.cache.set_async(key, result)
+        return result
+    
+    async def _dispatch(
+        self, prompt: str, options: Dict[str, Any], priority: int = 0
+    ) -> Dict[str, Any]:
+        """Try providers in routed order until one succeeds, hedging slow ones"""
+        candidates = self.router.order()
+        tried: Set[str] = set()
+        errors: List[Exception] = []
+        for index, provider in enumerate(candidates):
+            if provider in tried:
+                continue
+            tried.add(provider)
+            backup = next((p for p in candidates[index + 1:] if p not in tried), None)
+            delay = self.router.hedge_delay(provider) if backup else None
             try:
-                if provider == "openai":
-                    return await self._openai_generate(prompt, **options)
-                elif provider == "huggingface":
-                    return await self._huggingface_generate(prompt, **options)
-                elif provider == "llama_local":
-                    return await self._llama_generate(prompt, **options)
-                elif provider == "demo_mode":
-                    return await self._demo_generate(prompt, **options)
+                if delay is None:
+                    return await self._timed_call(provider, prompt, options, priority)
+                return await self._hedged_call(
+                    provider, backup, delay, prompt, options, priority, tried
+                )
             except Exception as e:
                 print(f"LLMProvider error with {provider}: {e}")
+                errors.append(e)
                 continue
         
+        if errors and all(isinstance(e, (RateLimitError, ContextWindowExceeded)) for e in errors):
+            # Rejected locally before reaching any provider
+            raise errors[-1]
+        
         return {
             "text": "[ERROR] No provider available",
             "provider": None,
-            "metadata": {"error": "All providers failed"}
+            "metadata": {
+                "error": "All providers failed" if candidates else "All provider circuits open"
+            }
         }
     
+    async def _timed_call(
+        self, provider: str, prompt: str, options: Dict[str, Any], priority: int = 0
+    ) -> Dict[str, Any]:
+        """Call one provider under its admission limits and feed the outcome to the router"""
+        prompt, prompt_tokens, truncated = self._prepare_prompt(provider, prompt, options)
+        cost = prompt_tokens + int(options.get("max_tokens", 0))
+        async with self.limiters[provider].slot(cost, priority):
+            self.router.on_start(provider)
+            started = time.monotonic()
+            try:
+                if self.batcher is not None and provider in self.BATCH_PROVIDERS:
+                    call = self.batcher.submit(provider, prompt, options)
+                else:
+                    call = self._call_provider(provider, prompt, **options)
+                result = await asyncio.wait_for(call, self.config.get("timeout"))
+            except asyncio.CancelledError:
+                self.router.record_cancel(provider)
+                raise
+            except Exception:
+                self.router.record_failure(provider, time.monotonic() - started)
+                raise
+            self.router.record_success(provider, time.monotonic() - started)
+            return self._account(provider, result, prompt_tokens, truncated)
+    
+    async def _hedged_call(
+        self,
+        primary: str,
+        backup: str,
+        delay: float,
+        prompt: str,
+        options: Dict[str, Any],
+        priority: int,
+        tried: Set[str]
+    ) -> Dict[str, Any]:
+        """Call primary; if it is still running after delay, race backup against it"""
+        primary_task = asyncio.ensure_future(self._timed_call(primary, prompt, options, priority))
+        pending = {primary_task}
+        error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary_task.result()
+            
+            self.router.on_hedge(primary)
+            tried.add(backup)
+            pending.add(asyncio.ensure_future(self._timed_call(backup, prompt, options, priority)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        error = asyncio.CancelledError()
+                    elif task.exception() is None:
+                        return task.result()
+                    else:
+                        error = task.exception()
+            raise error
+        finally:
+            # Also reached when this call is cancelled mid-wait
+            for task in pending:
+                task.cancel()
+    
+    async def _call_provider(self, provider: str, prompt: str, **options) -> Dict[str, Any]:
+        """Generate with a single named provider"""
+        if provider == "openai":
+            return await self._openai_generate(prompt, **options)
+        elif provider == "huggingface":
+            return await self._huggingface_generate(prompt, **options)
+        elif provider == "llama_local":
+            return await self._llama_generate(prompt, **options)
+        elif provider == "demo_mode":
+            return await self._demo_generate(prompt, **options)
+        elif provider == "simulation":
+            return await self.simulator.generate(prompt, **options)
+        raise ValueError(f"Unknown provider: {provider}")
+    
+    async def _batch_call_provider(
+        self, provider: str, prompts: List[str], **options
+    ) -> List[Dict[str, Any]]:
+        """Generate for several prompts with a single named provider"""
+        if provider == "huggingface":
+            return await self._huggingface_batch_generate(prompts, **options)
+        elif provider == "llama_local":
+            return await self._llama_batch_generate(prompts, **options)
+        elif provider == "demo_mode":
+            return await self._demo_batch_generate(prompts, **options)
+        elif provider == "simulation":
+            return await self.simulator.generate_batch(prompts, **options)
+        return list(await asyncio.gather(
+            *[self._call_provider(provider, prompt, **options) for prompt in prompts]
+        ))
+    
+    async def generate_stream(self, prompt: str, **options) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response using available LLM provider
+        
+        Args:
+            prompt: Input prompt
+            **options: Additional options (temperature, max_tokens, etc.)
+                use_cache=False bypasses the response cache
+                priority=<int> orders admission when providers are saturated
+                deadline=<Deadline> stops trying further providers once passed
+        
+        Yields:
+            {"type": "token", "text": ...} chunks as they are produced, then
+            one {"type": "done", "result": {...}} with the same shape as
+            generate(), or {"type": "error", ...} if the stream failed
+        """
+        use_cache = options.pop("use_cache", True) and self.cache is not None
+        priority = options.pop("priority", 0)
+        deadline: Deadline = options.pop("deadline", None) or Deadline()
+        key = make_cache_key(prompt, ",".join(self.providers), options)
+        
+        if use_cache:
+            cached = await self.cache.get_async(key)
+            if cached is not None:
+                cached["metadata"]["cached"] = True
+                yield {"type": "token", "text": cached["text"]}
+                yield {"type": "done", "result": cached}
+                return
+        
+        rejected: Optional[Exception] = None
+        for provider in self.router.order():
+            if deadline.expired():
+                rejected = DeadlineExceededError("LLM generation deadline exceeded")
+                break
+            limiter = self.limiters[provider]
+            try:
+                fitted, prompt_tokens, truncated = self._prepare_prompt(provider, prompt, options)
+                await limiter.acquire(
+                    prompt_tokens + int(options.get("max_tokens", 0)),
+                    priority,
+                    timeout=deadline.cap(limiter.queue_timeout)
+                )
+            except (RateLimitError, ContextWindowExceeded) as e:
+                rejected = e
+                continue
+            emitted = False
+            self.router.on_start(provider)
+            started = time.monotonic()
+            try:
+                async for chunk in self._stream_provider(provider, fitted, **options):
+                    if chunk["type"] == "done":
+                        self.router.record_success(provider, time.monotonic() - started)
+                        self._account(provider, chunk["result"], prompt_tokens, truncated)
+                        if self.cache is not None:
+                            await self.cache.set_async(key, chunk["result"])
+                    else:
+                        emitted = True
+                    yield chunk
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                self.router.record_cancel(provider)
+                raise
+            except Exception as e:
+                self.router.record_failure(provider, time.monotonic() - started)
+                print(f"LLMProvider stream error with {provider}: {e}")
+                if emitted:
+                    # Tokens already reached the caller; falling back would splice outputs
+                    yield {"type": "error", "provider": provider, "error": str(e)}
+                    return
+                rejected = None
+                continue
+            finally:
+                limiter.release()
+        
+        yield {
+            "type": "error",
+            "provider": None,
+            "error": str(rejected) if rejected else "All providers failed"
+        }
+    
+    async def _stream_provider(
+        self, provider: str, prompt: str, **options
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream from a single provider, buffering those without native streaming"""
+        if provider == "demo_mode":
+            async for chunk in self._demo_stream(prompt, **options):
+                yield chunk
+            return
+        if provider == "simulation":
+            async for chunk in self.simulator.stream(prompt, **options):
+                yield chunk
+            return
+        result = await self._call_provider(provider, prompt, **options)
+        yield {"type": "token", "text": result["text"]}
+        yield {"type": "done", "result": result}
+    
     async def _openai_generate(self, prompt: str, **options) -> Dict[str, Any]:
-        """Generate using OpenAI API (placeholder)"""
-        await asyncio.sleep(0.1)  # Simulate async operation
+        """Generate using the OpenAI chat completions API, over the pooled client"""
+        model = self._model_for("openai")
+        body = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            **{name: options[name] for name in self.OPENAI_PARAMETERS if name in options}
+        }
+        response = await self.http.request(
+            "openai",
+            "POST",
+            "/chat/completions",
+            json=body,
+            headers={"Authorization": f"Bearer {self.config['openai_api_key']}"}
+        )
+        data = response.json()
         return {
-            "text": f"[OpenAI echo]: {prompt}",
+            "text": data["choices"][0]["message"]["content"] or "",
             "provider": "openai",
             "metadata": {
-                "model": "gpt-4",
-                "tokens": len(prompt.split()),
+                "model": data.get("model", model),
+                "finish_reason": data["choices"][0].get("finish_reason"),
                 **options
             }
         }
     
+    async def _huggingface_request(self, inputs, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Call the HuggingFace Inference API over the pooled client
+        
+        Args:
+            inputs: Prompt, or list of prompts for one batched call
+            options: Generation options
+        
+        Returns:
+            One {"generated_text": ...} entry per prompt
+        """
+        parameters = {"return_full_text": False}
+        if "max_tokens" in options:
+            parameters["max_new_tokens"] = options["max_tokens"]
+        for name in ("temperature", "top_p"):
+            if name in options:
+                parameters[name] = options[name]
+        headers = {}
+        if self.config.get("hf_api_key"):
+            headers["Authorization"] = f"Bearer {self.config['hf_api_key']}"
+        response = await self.http.request(
+            "huggingface",
+            "POST",
+            f"/models/{self._model_for('huggingface')}",
+            json={"inputs": inputs, "parameters": parameters},
+            headers=headers
+        )
+        data = response.json()
+        # Batched calls return one list of candidates per prompt
+        return [entry[0] if isinstance(entry, list) else entry for entry in data]
+    
     async def _huggingface_generate(self, prompt: str, **options) -> Dict[str, Any]:
-        """Generate using HuggingFace Model (placeholder)"""
-        await asyncio.sleep(0.1)  # Simulate async operation
+        """Generate using the HuggingFace Inference API"""
+        [entry] = await self._huggingface_request(prompt, options)
         return {
-            "text": f"[HuggingFace echo]: {prompt}",
+            "text": entry["generated_text"],
             "provider": "huggingface",
             "metadata": {
-                "model": self.config.get("hf_model", "unknown"),
-                "tokens": len(prompt.split()),
+                "model": self._model_for("huggingface"),
                 **options
             }
         }
@@ -99,7 +568,6 @@ class LLMProvider:
             "provider": "llama_local",
             "metadata": {
                 "model": self.config.get("llama_path", "unknown"),
-                "tokens": len(prompt.split()),
                 **options
             }
         }
@@ -112,12 +580,119 @@ class LLMProvider:
             "provider": "demo_mode",
             "metadata": {
                 "model": "demo-v1",
-                "tokens": len(prompt.split()),
                 "mode": "development",
                 **options
             }
         }
     
+    async def _huggingface_batch_generate(self, prompts: List[str], **options) -> List[Dict[str, Any]]:
+        """Batch generate using the HuggingFace Inference API, one request for all prompts"""
+        entries = await self._huggingface_request(prompts, options)
+        return [
+            {
+                "text": entry["generated_text"],
+                "provider": "huggingface",
+                "metadata": {
+                    "model": self._model_for("huggingface"),
+                    "batch_size": len(prompts),
+                    **options
+                }
+            }
+            for entry in entries
+        ]
+    
+    async def _llama_batch_generate(self, prompts: List[str], **options) -> List[Dict[str, Any]]:
+        """Batch generate using LLaMA Local Model (placeholder)"""
+        await asyncio.sleep(0.1)  # Simulate one batched forward pass
+        return [
+            {
+                "text": f"[LLaMA echo]: {prompt}",
+                "provider": "llama_local",
+                "metadata": {
+                    "model": self.config.get("llama_path", "unknown"),
+                    "batch_size": len(prompts),
+                    **options
+                }
+            }
+            for prompt in prompts
+        ]
+    
+    async def _demo_batch_generate(self, prompts: List[str], **options) -> List[Dict[str, Any]]:
+        """Batch generate using Demo Mode (no external dependencies)"""
+        await asyncio.sleep(0.05)  # Simulate one batched forward pass
+        return [
+            {
+                "text": f"[Demo echo]: {prompt}",
+                "provider": "demo_mode",
+                "metadata": {
+                    "model": "demo-v1",
+                    "mode": "development",
+                    "batch_size": len(prompts),
+                    **options
+                }
+            }
+            for prompt in prompts
+        ]
+    
+    async def _demo_stream(self, prompt: str, **options) -> AsyncIterator[Dict[str, Any]]:
+        """Stream using Demo Mode, one word at a time"""
+        text = f"[Demo echo]: {prompt}"
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(0.01)  # Simulate per-token latency
+            yield {"type": "token", "text": word if i == 0 else f" {word}"}
+        yield {
+            "type": "done",
+            "result": {
+                "text": text,
+                "provider": "demo_mode",
+                "metadata": {
+                    "model": "demo-v1",
+                    "mode": "development",
+                    **options
+                }
+            }
+        }
+    
     def get_available_providers(self) -> list:
         """Return list of available providers"""
         return self.providers
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Return routing, breaker, cache and coalescing state"""
+        return {
+            "providers": self.providers,
+            "routing": self.router.get_status(),
+            "cache": self.get_cache_stats(),
+            "inflight": self.get_inflight_stats(),
+            "batching": self.get_batch_stats(),
+            "limits": {
+                provider: limiter.get_stats()
+                for provider, limiter in self.limiters.items()
+            },
+            "http": self.http.get_stats(),
+            "usage": self.usage,
+            "simulation": self.simulator.get_stats() if self.simulator else None,
+        }
+    
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """Return micro-batching counters"""
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.get_stats()}
+    
+    def get_inflight_stats(self) -> Dict[str, Any]:
+        """Return request coalescing counters"""
+        if self.inflight is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.inflight.get_stats()}
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return response cache counters"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
+
+
+# Global LLM provider instance
+llm_provider = LLMProvider(settings.llm_config())
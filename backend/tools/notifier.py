@@ -6,6 +6,9 @@ Handles WebSocket broadcasts and real-time notifications
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from config.settings import settings
+from utils.ring_buffer import IndexedRingBuffer
+
 
 class Notifier:
     """
@@ -13,11 +16,16 @@ class Notifier:
     Manages WebSocket connections and real-time event broadcasting
     """
     
-    def __init__(self):
-        """Initialize Notifier"""
+    def __init__(self, max_history: int = settings.NOTIFIER_HISTORY_SIZE):
+        """
+        Initialize Notifier
+        
+        Args:
+            max_history: Messages kept in history
+        """
         self.connections: List[Any] = []
-        self.message_history: List[Dict[str, Any]] = []
-        self.max_history: int = 1000
+        self.message_history = IndexedRingBuffer(max_history)
+        self.max_history = max_history
     
     async def connect(self, websocket: Any):
         """
@@ -79,8 +87,6 @@ class Notifier:
     def _add_to_history(self, message: Dict[str, Any]):
         """Store message in history"""
         self.message_history.append(message)
-        if len(self.message_history) > self.max_history:
-            self.message_history.pop(0)
     
     def get_message_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -92,7 +98,7 @@ class Notifier:
         Returns:
             List of recent messages
         """
-        return self.message_history[-limit:]
+        return self.message_history.latest(limit)
     
     def get_status(self) -> Dict[str, Any]:
         """Get notifier status"""
@@ -100,6 +106,7 @@ class Notifier:
             "connected_clients": len(self.connections),
             "history_size": len(self.message_history),
             "max_history": self.max_history,
+            "history_memory_bytes": self.message_history.get_stats()["memory_bytes"],
             "status": "active"
         }
 
@@ -0,0 +1,234 @@
+"""
+Provider Router for My.app
+Latency-aware provider ordering with circuit breakers and hedging thresholds
+"""
+
+from typing import Dict, Any, List, Optional
+from collections import deque
+import time
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker
+    
+    closed -> open after failure_threshold consecutive failures
+    open -> half_open once recovery_time has elapsed
+    half_open -> closed on a successful trial call, back to open on failure
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30.0):
+        """
+        Initialize CircuitBreaker
+        
+        Args:
+            failure_threshold: Consecutive failures before opening
+            recovery_time: Seconds to stay open before allowing a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+    
+    def is_available(self) -> bool:
+        """Whether a request may be sent through this breaker now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_time:
+                return False
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            return not self.trial_in_flight
+        return True
+    
+    def on_start(self):
+        """Mark a call as started (claims the half-open trial slot)"""
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = True
+    
+    def on_success(self):
+        """Record a successful call"""
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        self.state = self.CLOSED
+        self.opened_at = None
+    
+    def on_failure(self):
+        """Record a failed call"""
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    def on_cancel(self):
+        """Release the trial slot of a call that was abandoned"""
+        self.trial_in_flight = False
+
+
+class ProviderStats:
+    """Latency and error tracking for one provider"""
+    
+    def __init__(self, alpha: float = 0.2, window: int = 100):
+        """
+        Initialize ProviderStats
+        
+        Args:
+            alpha: EWMA smoothing factor
+            window: Number of recent latencies kept for percentiles
+        """
+        self.alpha = alpha
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.latencies: deque = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.hedges = 0
+    
+    def record(self, latency: float, success: bool):
+        """Fold one call outcome into the averages"""
+        if success:
+            self.successes += 1
+            self.latencies.append(latency)
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        else:
+            self.failures += 1
+        self.error_rate = self.alpha * (0.0 if success else 1.0) + (1 - self.alpha) * self.error_rate
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile over the recent window"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class ProviderRouter:
+    """
+    Chooses provider order for each request
+    
+    Healthy providers are ranked by EWMA latency inflated by their recent
+    error rate; providers without samples keep their configured order and
+    are tried first so they get measured. Providers whose breaker is open
+    are skipped; half-open ones get the next request as their trial.
+    """
+    
+    def __init__(
+        self,
+        providers: List[str],
+        ewma_alpha: float = 0.2,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20
+    ):
+        """
+        Initialize ProviderRouter
+        
+        Args:
+            providers: Provider names in configured preference order
+            ewma_alpha: EWMA smoothing factor for latency and error rate
+            failure_threshold: Consecutive failures before a breaker opens
+            recovery_time: Seconds a breaker stays open
+            hedge_enabled: Send a backup request when the primary is slow
+            hedge_percentile: Primary latency percentile that triggers the hedge
+            hedge_min_samples: Samples required before hedging a provider
+        """
+        self.providers = list(providers)
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.stats: Dict[str, ProviderStats] = {
+            name: ProviderStats(alpha=ewma_alpha) for name in self.providers
+        }
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(failure_threshold, recovery_time) for name in self.providers
+        }
+        self.last_order: List[str] = list(self.providers)
+    
+    def order(self) -> List[str]:
+        """Available providers, best first"""
+        available = [name for name in self.providers if self.breakers[name].is_available()]
+        
+        def score(name: str) -> float:
+            if self.breakers[name].state == CircuitBreaker.HALF_OPEN:
+                # Probe recovering providers first so they can close again
+                return -1.0
+            stats = self.stats[name]
+            if stats.ewma_latency is None:
+                return 0.0
+            return stats.ewma_latency / max(1e-3, 1.0 - stats.error_rate)
+        
+        self.last_order = sorted(available, key=score)
+        return self.last_order
+    
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds to wait on provider before hedging, or None to not hedge"""
+        if not self.hedge_enabled:
+            return None
+        stats = self.stats[provider]
+        if len(stats.latencies) < self.hedge_min_samples:
+            return None
+        return stats.percentile(self.hedge_percentile)
+    
+    def on_start(self, provider: str):
+        """Record that a call to provider is starting"""
+        self.breakers[provider].on_start()
+    
+    def on_hedge(self, provider: str):
+        """Record that provider exceeded its hedge delay"""
+        self.stats[provider].hedges += 1
+    
+    def record_success(self, provider: str, latency: float):
+        """Record a successful call"""
+        self.stats[provider].record(latency, True)
+        self.breakers[provider].on_success()
+    
+    def record_failure(self, provider: str, latency: float):
+        """Record a failed call"""
+        self.stats[provider].record(latency, False)
+        self.breakers[provider].on_failure()
+    
+    def record_cancel(self, provider: str):
+        """Record a call abandoned because another one won"""
+        self.breakers[provider].on_cancel()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get routing and breaker state for every provider"""
+        return {
+            "order": self.last_order,
+            "hedging": {
+                "enabled": self.hedge_enabled,
+                "percentile": self.hedge_percentile,
+                "min_samples": self.hedge_min_samples,
+            },
+            "providers": {
+                name: {
+                    "breaker": self.breakers[name].state,
+                    "consecutive_failures": self.breakers[name].consecutive_failures,
+                    "times_opened": self.breakers[name].times_opened,
+                    "ewma_latency": self.stats[name].ewma_latency,
+                    "error_rate": self.stats[name].error_rate,
+                    "p50_latency": self.stats[name].percentile(50),
+                    "p95_latency": self.stats[name].percentile(95),
+                    "successes": self.stats[name].successes,
+                    "failures": self.stats[name].failures,
+                    "hedges": self.stats[name].hedges,
+                }
+                for name in self.providers
+            },
+        }
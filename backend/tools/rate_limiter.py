@@ -0,0 +1,190 @@
+"""
+Rate Limiter for My.app
+Per-provider concurrency caps, token buckets and a priority admission queue
+"""
+
+from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import heapq
+import itertools
+import time
+
+from utils.exceptions import RateLimitError
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate"""
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize TokenBucket
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def take(self, amount: float):
+        """Remove amount tokens (call after wait_time returned 0)"""
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """
+    Admission control for one provider
+    
+    Requests are admitted in priority order (higher first, FIFO within a
+    priority) once a concurrency slot is free and the request and token
+    buckets allow it. A request still queued when its deadline passes
+    raises RateLimitError.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        queue_timeout: float = 10.0
+    ):
+        """
+        Initialize ProviderLimiter
+        
+        Args:
+            name: Provider name (used in errors and stats)
+            max_concurrency: Maximum concurrent calls (unlimited if None)
+            requests_per_second: Request rate limit (unlimited if None)
+            tokens_per_minute: Token rate limit (unlimited if None)
+            queue_timeout: Default seconds a request may wait for admission
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.request_bucket = (
+            TokenBucket(requests_per_second, max(1.0, requests_per_second))
+            if requests_per_second else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+            if tokens_per_minute else None
+        )
+        self.in_flight = 0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+    
+    def _bucket_wait(self, tokens: int) -> float:
+        """Seconds until both buckets can admit a request of tokens"""
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.wait_time(1))
+        if self.token_bucket is not None:
+            wait = max(wait, self.token_bucket.wait_time(tokens))
+        return wait
+    
+    def _has_slot(self) -> bool:
+        return self.max_concurrency is None or self.in_flight < self.max_concurrency
+    
+    def _wake_head(self):
+        """Wake the highest-priority waiter so it re-checks admission"""
+        if self._waiters:
+            future = self._waiters[0][3]
+            if future is not None and not future.done():
+                future.set_result(None)
+    
+    async def acquire(self, tokens: int = 1, priority: int = 0, timeout: Optional[float] = None):
+        """
+        Wait for admission
+        
+        Args:
+            tokens: Estimated tokens the request will consume
+            priority: Higher values are admitted first
+            timeout: Seconds to wait before RateLimitError (default queue_timeout)
+        
+        Raises:
+            RateLimitError: Not admitted before the deadline
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + (self.queue_timeout if timeout is None else timeout)
+        entry = [-priority, next(self._seq), tokens, None]
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                wait = None
+                if self._waiters[0] is entry and self._has_slot():
+                    wait = self._bucket_wait(tokens)
+                    if wait == 0.0:
+                        heapq.heappop(self._waiters)
+                        if self.request_bucket is not None:
+                            self.request_bucket.take(1)
+                        if self.token_bucket is not None:
+                            self.token_bucket.take(tokens)
+                        self.in_flight += 1
+                        self.admitted += 1
+                        self.total_wait += loop.time() - started
+                        self._wake_head()
+                        return
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise RateLimitError(
+                        f"Provider {self.name} rate limit: not admitted within "
+                        f"{deadline - started:.2f}s"
+                    )
+                entry[3] = loop.create_future()
+                await asyncio.wait({entry[3]}, timeout=min(remaining, wait) if wait else remaining)
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._wake_head()
+            raise
+    
+    def release(self):
+        """Free a concurrency slot"""
+        self.in_flight -= 1
+        self._wake_head()
+    
+    @asynccontextmanager
+    async def slot(self, tokens: int = 1, priority: int = 0, timeout: Optional[float] = None):
+        """Hold an admission slot for the duration of the block"""
+        await self.acquire(tokens, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter counters"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_second": self.request_bucket.rate if self.request_bucket else None,
+            "tokens_per_minute": self.token_bucket.capacity if self.token_bucket else None,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "average_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+        }
@@ -0,0 +1,323 @@
+"""
+Response Cache for My.app
+LRU + TTL cache for LLM responses with an optional on-disk tier
+"""
+
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import time
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so trivially different prompts share a cache entry"""
+    return " ".join(prompt.split())
+
+
+def make_cache_key(prompt: str, provider: str, options: Dict[str, Any]) -> str:
+    """
+    Build a stable cache key for a generation request
+    
+    Args:
+        prompt: Input prompt
+        provider: Provider (or provider chain) serving the request
+        options: Generation options (temperature, max_tokens, etc.)
+    
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(
+        {
+            "prompt": normalize_prompt(prompt),
+            "provider": provider,
+            "options": options,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_memo_key(agent: str, prompt: str, context: Dict[str, Any]) -> str:
+    """
+    Build a stable key for an agent run
+    
+    Args:
+        agent: Agent name
+        prompt: Input prompt (exact, not normalized)
+        context: Context dictionary; key order does not matter
+    
+    Returns:
+        Hex digest identifying the run
+    """
+    payload = json.dumps(
+        {"agent": agent, "prompt": prompt, "context": context},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCacheTier:
+    """
+    On-disk second tier for the response cache
+    Stores one JSON file per key with its expiry time
+    
+    Holds at most max_entries files, dropping the least recently used.
+    Methods do blocking file I/O and may be called from worker threads.
+    """
+    
+    def __init__(self, directory: str, max_entries: int = 10000):
+        """
+        Initialize disk tier
+        
+        Args:
+            directory: Directory holding cached responses
+            max_entries: Maximum number of files kept
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        # Keys on disk, least recently used first (files left by a previous run by mtime)
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        for path in sorted(self.directory.glob("*.json"), key=self._mtime):
+            self._keys[path.stem] = None
+        self._evict()
+    
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return 0.0
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the live stored entry ({"value", "expires_at"}) or None; expired entries are removed"""
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Disk expiry uses wall-clock time so it survives restarts
+        expires_at = stored.get("expires_at")
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            with self._lock:
+                self.expirations += 1
+            return None
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+        return stored
+    
+    def set(self, key: str, value: Dict[str, Any], expires_at: Optional[float]):
+        """Persist entry for key, dropping the least recently used past max_entries"""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({"value": value, "expires_at": expires_at}, f, default=str)
+            tmp_path.replace(path)
+        except OSError as e:
+            print(f"ResponseCache disk write failed for {key}: {e}")
+            return
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+        self._evict()
+    
+    def _evict(self):
+        while True:
+            with self._lock:
+                if len(self._keys) <= self.max_entries:
+                    return
+                key, _ = self._keys.popitem(last=False)
+                self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+    
+    def delete(self, key: str):
+        """Remove entry for key"""
+        with self._lock:
+            self._keys.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._keys.clear()
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache with TTL expiry
+    Optionally backed by a DiskCacheTier for entries evicted from memory
+    
+    get() and set() touch the disk tier inline; on the event loop use
+    get_async() and set_async(), which run disk I/O in a thread.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: int = 10000
+    ):
+        """
+        Initialize ResponseCache
+        
+        Args:
+            max_entries: Maximum number of in-memory entries
+            ttl: Entry lifetime in seconds (None for no expiry)
+            disk_dir: Directory for the on-disk tier (disabled if None)
+            disk_max_entries: Maximum number of entries in the on-disk tier
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = DiskCacheTier(disk_dir, disk_max_entries) if disk_dir else None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+        
+        Args:
+            key: Cache key from make_cache_key
+        
+        Returns:
+            Copy of the cached response, or None on miss
+        """
+        value = self._memory_get(key)
+        if value is not None or self.disk is None:
+            return self._counted(key, value)
+        return self._disk_loaded(key, self.disk.get(key))
+    
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get(), reading the disk tier in a thread"""
+        value = self._memory_get(key)
+        if value is not None or self.disk is None:
+            return self._counted(key, value)
+        return self._disk_loaded(key, await asyncio.to_thread(self.disk.get, key))
+    
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+            self.expirations += 1
+        return None
+    
+    def _counted(self, key: str, value: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(value)
+    
+    def _disk_loaded(self, key: str, stored: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Promote a disk-tier entry into memory"""
+        if stored is None:
+            self.misses += 1
+            return None
+        value = stored["value"]
+        expires_at = stored.get("expires_at")
+        self._store(key, value, None if expires_at is None else expires_at - time.time())
+        self.disk_hits += 1
+        return copy.deepcopy(value)
+    
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        Store a response
+        
+        Args:
+            key: Cache key from make_cache_key
+            value: Response dictionary
+        """
+        value = copy.deepcopy(value)
+        self._store(key, value, self.ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, self._disk_expiry())
+    
+    async def set_async(self, key: str, value: Dict[str, Any]):
+        """set(), writing the disk tier in a thread"""
+        value = copy.deepcopy(value)
+        self._store(key, value, self.ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, self._disk_expiry())
+    
+    def _disk_expiry(self) -> Optional[float]:
+        return None if self.ttl is None else time.time() + self.ttl
+    
+    def _store(self, key: str, value: Dict[str, Any], ttl: Optional[float]):
+        """Insert into the memory tier, evicting the least recently used entries"""
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: str):
+        """Drop a single entry from all tiers"""
+        self._entries.pop(key, None)
+        if self.disk is not None:
+            self.disk.delete(key)
+    
+    def clear(self):
+        """Drop all entries from all tiers"""
+        self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "disk_enabled": self.disk is not None,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_max_entries": self.disk.max_entries if self.disk is not None else 0,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            "expirations": self.expirations + (self.disk.expirations if self.disk is not None else 0),
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
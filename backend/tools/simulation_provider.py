@@ -0,0 +1,174 @@
+"""
+Simulation Provider for My.app
+Synthetic LLM backend with configurable latency, failures and streaming cadence
+"""
+
+from typing import Dict, Any, List, Optional, AsyncIterator
+import asyncio
+import bisect
+import math
+import random
+
+from utils.exceptions import LLMProviderException
+
+
+FILLER_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua"
+).split()
+
+
+class SimulationProvider:
+    """
+    Load-testing stand-in for a real model
+    
+    Latency distributions:
+        fixed       - always latency_median_ms
+        lognormal   - lognormal around latency_median_ms with shape sigma
+        percentiles - piecewise-linear interpolation of a percentile table,
+                      e.g. {"50": 200, "95": 800, "99": 2000} (milliseconds)
+    
+    A request fails with probability error_rate, and with probability
+    timeout_rate it hangs for timeout seconds before failing. Streams emit
+    the first token after the sampled latency, then one token per
+    token_interval_ms.
+    """
+    
+    def __init__(
+        self,
+        distribution: str = "lognormal",
+        latency_median_ms: float = 200.0,
+        latency_sigma: float = 0.5,
+        latency_percentiles: Optional[Dict[str, float]] = None,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout: float = 30.0,
+        token_interval_ms: float = 20.0,
+        completion_tokens: int = 32,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize SimulationProvider
+        
+        Args:
+            distribution: "fixed", "lognormal" or "percentiles"
+            latency_median_ms: Median (or fixed) latency in milliseconds
+            latency_sigma: Lognormal shape parameter (larger = heavier tail)
+            latency_percentiles: Percentile -> latency in ms table
+            error_rate: Probability a request raises an error
+            timeout_rate: Probability a request hangs until timeout
+            timeout: Seconds a timed-out request hangs
+            token_interval_ms: Delay between streamed tokens
+            completion_tokens: Words generated after the echoed prompt
+            seed: Random seed for reproducible runs
+        """
+        if distribution not in ("fixed", "lognormal", "percentiles"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        table = sorted(
+            (float(p), float(ms)) for p, ms in (latency_percentiles or {"50": latency_median_ms}).items()
+        )
+        self._pct_points = [p for p, _ in table]
+        self._pct_values = [ms for _, ms in table]
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout = timeout
+        self.token_interval_ms = token_interval_ms
+        self.completion_tokens = completion_tokens
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+    
+    def sample_latency(self) -> float:
+        """Draw one request latency in seconds"""
+        if self.distribution == "fixed":
+            ms = self.latency_median_ms
+        elif self.distribution == "lognormal":
+            ms = self.random.lognormvariate(math.log(self.latency_median_ms), self.latency_sigma)
+        else:
+            ms = self._interpolate_percentile(self.random.uniform(0.0, 100.0))
+        return max(0.0, ms) / 1000.0
+    
+    def _interpolate_percentile(self, pct: float) -> float:
+        points, values = self._pct_points, self._pct_values
+        if pct <= points[0]:
+            # Scale linearly from zero up to the first listed percentile
+            return values[0] * pct / points[0] if points[0] else values[0]
+        if pct >= points[-1]:
+            return values[-1]
+        i = bisect.bisect_right(points, pct)
+        lo_p, hi_p = points[i - 1], points[i]
+        lo_v, hi_v = values[i - 1], values[i]
+        return lo_v + (hi_v - lo_v) * (pct - lo_p) / (hi_p - lo_p)
+    
+    async def _maybe_fail(self):
+        """Apply the configured timeout and error rates"""
+        self.requests += 1
+        roll = self.random.random()
+        if roll < self.timeout_rate:
+            self.timeouts += 1
+            await asyncio.sleep(self.timeout)
+            raise asyncio.TimeoutError("Simulated provider timeout")
+        if roll < self.timeout_rate + self.error_rate:
+            self.errors += 1
+            raise LLMProviderException("Simulated provider error")
+    
+    def _completion(self, prompt: str) -> List[str]:
+        words = [f"[Simulated]: {prompt}"]
+        words.extend(FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(self.completion_tokens))
+        return words
+    
+    def _result(self, text: str, options: Dict[str, Any], latency: float) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "provider": "simulation",
+            "metadata": {
+                "model": "simulation-v1",
+                "simulated_latency": latency,
+                **options
+            }
+        }
+    
+    async def generate(self, prompt: str, **options) -> Dict[str, Any]:
+        """Generate one simulated response"""
+        latency = self.sample_latency()
+        await asyncio.sleep(latency)
+        await self._maybe_fail()
+        return self._result(" ".join(self._completion(prompt)), options, latency)
+    
+    async def generate_batch(self, prompts: List[str], **options) -> List[Dict[str, Any]]:
+        """Generate a batch; the batch takes as long as one request"""
+        latency = self.sample_latency()
+        await asyncio.sleep(latency)
+        await self._maybe_fail()
+        return [
+            self._result(" ".join(self._completion(prompt)), {"batch_size": len(prompts), **options}, latency)
+            for prompt in prompts
+        ]
+    
+    async def stream(self, prompt: str, **options) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a simulated response token by token"""
+        latency = self.sample_latency()
+        await asyncio.sleep(latency)
+        await self._maybe_fail()
+        words = self._completion(prompt)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.token_interval_ms / 1000.0)
+            yield {"type": "token", "text": word if i == 0 else f" {word}"}
+        yield {"type": "done", "result": self._result(" ".join(words), options, latency)}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get simulation settings and counters"""
+        return {
+            "distribution": self.distribution,
+            "latency_median_ms": self.latency_median_ms,
+            "error_rate": self.error_rate,
+            "timeout_rate": self.timeout_rate,
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+        }
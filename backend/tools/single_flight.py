@@ -0,0 +1,90 @@
+"""
+Single-flight request coalescing for My.app
+Concurrent callers with the same key share one in-flight call
+"""
+
+from typing import Dict, Any, Callable, Awaitable
+import asyncio
+import copy
+
+
+class _InFlightCall:
+    """Shared upstream task and the number of callers awaiting it"""
+    
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key
+    
+    The first caller for a key starts the upstream call as a task; later
+    callers await the same task. A caller being cancelled does not cancel
+    the shared call unless it was the last one waiting on it, in which
+    case the key is released at once. Exceptions
+    raised by the shared call propagate to every waiter.
+    """
+    
+    def __init__(self):
+        """Initialize SingleFlight"""
+        self._calls: Dict[str, _InFlightCall] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled = 0
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once for all concurrent callers sharing key
+        
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine factory performing the upstream call
+        
+        Returns:
+            Result of fn (each caller receives its own copy)
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _InFlightCall(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget(k, c))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to receive the result; forget it now so a
+                # caller arriving before the task unwinds starts a fresh call
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+                self.cancelled += 1
+        return copy.deepcopy(result)
+    
+    def _forget(self, key: str, call: _InFlightCall):
+        """Drop a finished call so the next caller starts a fresh one"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Mark the exception as retrieved when no waiter consumed it
+            call.task.exception()
+    
+    def in_flight(self) -> int:
+        """Number of distinct keys currently in flight"""
+        return len(self._calls)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,193 @@
+"""
+Tokenizer utilities for My.app
+Per-model token counting and context-window budgeting
+"""
+
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import math
+import re
+import threading
+
+from utils.exceptions import LLMProviderException
+
+try:
+    import tiktoken
+except ImportError:  # Optional: exact counts for OpenAI models
+    tiktoken = None
+
+
+# Context window (in tokens) per model; unknown models use DEFAULT_CONTEXT_WINDOW
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-3.5-turbo": 16385,
+    "demo-v1": 4096,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Token counts remembered by count_tokens()
+COUNT_CACHE_SIZE = 4096
+
+
+class ContextWindowExceeded(LLMProviderException):
+    """Prompt plus requested completion does not fit the model's context window"""
+    pass
+
+
+class Tokenizer:
+    """Base tokenizer - splits text into token strings"""
+    
+    name = "base"
+    
+    def tokenize(self, text: str) -> List[str]:
+        raise NotImplementedError
+    
+    def count(self, text: str) -> int:
+        return len(self.tokenize(text))
+    
+    def truncate_left(self, text: str, max_tokens: int) -> str:
+        """Keep the last max_tokens tokens of text"""
+        if max_tokens <= 0:
+            return ""
+        return "".join(self.tokenize(text)[-max_tokens:]).lstrip()
+
+
+class HeuristicTokenizer(Tokenizer):
+    """
+    Dependency-free approximation of BPE tokenizers
+    
+    Punctuation and short words are one token each; longer words cost one
+    token per four characters, which tracks GPT-style tokenizers closely on
+    English text.
+    """
+    
+    name = "heuristic"
+    _pattern = re.compile(r"\s*\w+|\s*[^\w\s]|\s+")
+    max_single_token_chars = 6
+    chars_per_token = 4
+    
+    def tokenize(self, text: str) -> List[str]:
+        tokens = []
+        for piece in self._pattern.findall(text):
+            word = piece.lstrip()
+            if len(word) <= self.max_single_token_chars:
+                tokens.append(piece)
+                continue
+            lead = piece[:len(piece) - len(word)]
+            chunks = math.ceil(len(word) / self.chars_per_token)
+            for i in range(chunks):
+                chunk = word[i * self.chars_per_token:(i + 1) * self.chars_per_token]
+                tokens.append(lead + chunk if i == 0 else chunk)
+        return tokens
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact tokenizer for OpenAI models (requires tiktoken)"""
+    
+    name = "tiktoken"
+    
+    def __init__(self, model: str):
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+    
+    def tokenize(self, text: str) -> List[str]:
+        return [self.encoding.decode([t]) for t in self.encoding.encode(text)]
+    
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+    
+    def truncate_left(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        return self.encoding.decode(self.encoding.encode(text)[-max_tokens:])
+
+
+_heuristic = HeuristicTokenizer()
+_tokenizers: Dict[str, Tokenizer] = {}
+_counts: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+_counts_lock = threading.Lock()
+
+
+def get_tokenizer(model: str) -> Tokenizer:
+    """Return the tokenizer for model"""
+    tokenizer = _tokenizers.get(model)
+    if tokenizer is None:
+        if tiktoken is not None and model.startswith("gpt-"):
+            tokenizer = TiktokenTokenizer(model)
+        else:
+            tokenizer = _heuristic
+        _tokenizers[model] = tokenizer
+    return tokenizer
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count tokens of text for model
+    
+    Counts are memoized (least recently used first out) under a digest of
+    the text, so the cache holds COUNT_CACHE_SIZE small keys rather than
+    keeping every long prompt it has seen alive.
+    """
+    key = (model, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    with _counts_lock:
+        count = _counts.get(key)
+        if count is not None:
+            _counts.move_to_end(key)
+            return count
+    count = get_tokenizer(model).count(text)
+    with _counts_lock:
+        _counts[key] = count
+        if len(_counts) > COUNT_CACHE_SIZE:
+            _counts.popitem(last=False)
+    return count
+
+
+def context_window(model: str, overrides: Optional[Dict[str, int]] = None) -> int:
+    """Context window size for model"""
+    if overrides and model in overrides:
+        return overrides[model]
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def fit_prompt(
+    prompt: str,
+    model: str,
+    max_completion_tokens: int = 0,
+    policy: str = "truncate",
+    window: Optional[int] = None
+) -> Tuple[str, int, bool]:
+    """
+    Make prompt fit the model's context window
+    
+    Args:
+        prompt: Input prompt
+        model: Model name
+        max_completion_tokens: Tokens reserved for the completion
+        policy: "truncate" drops the oldest (leading) tokens, "reject" raises
+        window: Context window override (defaults to the model's)
+    
+    Returns:
+        (prompt, prompt_tokens, truncated)
+    
+    Raises:
+        ContextWindowExceeded: Prompt does not fit and policy is "reject",
+            or the completion reservation alone exceeds the window
+    """
+    window = window or context_window(model)
+    budget = window - max_completion_tokens
+    prompt_tokens = count_tokens(prompt, model)
+    if prompt_tokens <= budget:
+        return prompt, prompt_tokens, False
+    if policy != "truncate" or budget <= 0:
+        raise ContextWindowExceeded(
+            f"Prompt of {prompt_tokens} tokens plus {max_completion_tokens} completion "
+            f"tokens exceeds {model} context window of {window}"
+        )
+    trimmed = get_tokenizer(model).truncate_left(prompt, budget)
+    return trimmed, count_tokens(trimmed, model), True
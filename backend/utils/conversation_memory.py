@@ -0,0 +1,194 @@
+"""
+Conversation memory for My.app
+Per-conversation message retention, and spilling idle conversations to disk
+"""
+
+from typing import Dict, Any, Callable, List, Optional
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+RETENTION_POLICIES = ("truncate", "summarize")
+
+
+def summarize_messages(previous: Optional[Dict[str, Any]], messages: List[Dict[str, Any]], max_chars: int = 2000) -> str:
+    """
+    Extractive summary: the previous summary plus one short line per message
+    
+    Args:
+        previous: Summary message being folded in, if any
+        messages: Messages to summarize, oldest first
+        max_chars: Longest summary kept (the most recent lines win)
+    
+    Returns:
+        Summary text
+    """
+    lines = [previous["content"]] if previous else []
+    for message in messages:
+        speaker = message.get("role") or message.get("message_type") or message.get("sender") or "message"
+        content = " ".join(str(message.get("content", "")).split())
+        lines.append(f"{speaker}: {content[:120]}")
+    text = "\n".join(lines)
+    return text if len(text) <= max_chars else "..." + text[-(max_chars - 3):]
+
+
+class RetentionPolicy:
+    """
+    How many messages a conversation keeps, and what happens to older ones
+    
+    Past its capacity a conversation drops its oldest messages ("truncate"),
+    or replaces them with a single summary message ("summarize"). The
+    summary takes over the ID of the newest message it replaces, so it
+    sorts before every message kept and ID cursors stay valid; the next
+    overflow folds the old summary into a new one.
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 0,
+        policy: str = "truncate",
+        summarizer: Optional[Callable[[Optional[Dict[str, Any]], List[Dict[str, Any]]], str]] = None
+    ):
+        """
+        Initialize RetentionPolicy
+        
+        Args:
+            capacity: Messages kept per conversation (0 for no limit)
+            policy: "truncate" or "summarize"
+            summarizer: (previous summary, messages) -> summary text (default summarize_messages)
+        
+        Raises:
+            ValueError: Unknown policy
+        """
+        if policy not in RETENTION_POLICIES:
+            raise ValueError(f"Unknown retention policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.summarizer = summarizer or summarize_messages
+        self.capacities: Dict[str, int] = {}
+    
+    @property
+    def summarizes(self) -> bool:
+        return self.policy == "summarize"
+    
+    def set_capacity(self, agent_id: str, capacity: int):
+        """Capacity for conversations with one agent (e.g. its AgentProfile.memory_capacity)"""
+        self.capacities[agent_id] = capacity
+    
+    def initial_capacity(self, agent_id: Optional[str], capacity: Optional[int] = None) -> Optional[int]:
+        """Capacity recorded on a new conversation: the one asked for, else the agent's (None for the default)"""
+        if capacity is not None:
+            return capacity
+        return self.capacities.get(agent_id) if agent_id is not None else None
+    
+    def capacity_for(self, agent_id: Optional[str]) -> int:
+        """Capacity of a conversation with this agent"""
+        return self.capacities.get(agent_id, self.capacity) if agent_id is not None else self.capacity
+    
+    def overflow(self, count: int, capacity: int) -> int:
+        """Oldest messages to take out of a conversation holding count"""
+        if capacity <= 0 or count <= capacity:
+            return 0
+        # Summarizing leaves room for the summary itself
+        return count - capacity + 1 if self.summarizes else count - capacity
+    
+    def condense(self, dropped: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Summary message replacing the dropped messages (None when truncating)
+        
+        Args:
+            dropped: Messages taken out, oldest first; a previous summary comes first
+        """
+        if not self.summarizes or not dropped:
+            return None
+        previous = dropped[0] if dropped[0].get("type") == "summary" else None
+        messages = dropped[1:] if previous else dropped
+        summarized = (previous or {}).get("summarized_messages", 0) + len(messages)
+        newest = dropped[-1]
+        return {
+            "id": newest["id"],
+            "role": "system",
+            "type": "summary",
+            "content": self.summarizer(previous, messages),
+            "summarized_messages": summarized,
+            "timestamp": newest.get("timestamp"),
+        }
+
+
+class SpillStore:
+    """
+    Messages of evicted conversations, one gzip'd JSON-lines file each
+    
+    Files live in a directory of their own, created on first spill and
+    removed by close(); conversation IDs are hashed into file names.
+    """
+    
+    def __init__(self, path: str = ""):
+        """
+        Initialize SpillStore
+        
+        Args:
+            path: Parent directory for spill files (the system temp directory if empty)
+        """
+        self.path = path
+        self._directory: Optional[str] = None
+        self._counts: Dict[str, int] = {}
+        self.spills = 0
+        self.reloads = 0
+    
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._counts
+    
+    @property
+    def conversations(self) -> int:
+        return len(self._counts)
+    
+    @property
+    def messages(self) -> int:
+        return sum(self._counts.values())
+    
+    def _file(self, conversation_id: str) -> str:
+        if self._directory is None:
+            if self.path:
+                os.makedirs(self.path, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix="spill-", dir=self.path or None)
+        name = hashlib.sha1(conversation_id.encode()).hexdigest()
+        return os.path.join(self._directory, f"{name}.jsonl.gz")
+    
+    def write(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        """Spill a conversation's messages, oldest first"""
+        with gzip.open(self._file(conversation_id), "wt", encoding="utf-8", compresslevel=1) as f:
+            for message in messages:
+                f.write(json.dumps(message, default=str, separators=(",", ":")))
+                f.write("\n")
+        self._counts[conversation_id] = len(messages)
+        self.spills += 1
+    
+    def read(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Take a spilled conversation's messages back (the file is removed)"""
+        path = self._file(conversation_id)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            messages = [json.loads(line) for line in f]
+        self.discard(conversation_id)
+        self.reloads += 1
+        return messages
+    
+    def discard(self, conversation_id: str) -> bool:
+        """Drop a spilled conversation; return whether there was one"""
+        if self._counts.pop(conversation_id, None) is None:
+            return False
+        try:
+            os.remove(self._file(conversation_id))
+        except FileNotFoundError:
+            pass
+        return True
+    
+    def close(self):
+        """Remove every spill file"""
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+        self._directory = None
+        self._counts.clear()
@@ -1,107 +1,806 @@
 """Database utilities for My.app"""
 
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime
+import asyncio
 import json
+import os
+import queue
+import sqlite3
+import threading
+
+from config.settings import settings
+from utils.conversation_memory import RetentionPolicy, SpillStore
+from utils.ids import new_id
+from utils.shared_state import LocalStateStore, state_store
 
 
 class InMemoryDatabase:
-    """In-memory database for Stage 1-2 development"""
+    """
+    In-memory database for Stage 1-2 development
+    
+    Records are kept in a state store: process-local by default, or a
+    SQLite file shared by all workers when SHARED_STATE_PATH is set.
+    
+    Conversations keep at most their retention capacity of messages: the
+    one given when the conversation was created, else its agent's (see
+    set_memory_capacity), else the policy default. With a process-local
+    store, max_resident_messages also caps the messages held across all
+    conversations: past it, the least recently used conversations are
+    spilled to disk whole and read back on their next access. Through
+    call(), spill files are written and read in a thread; direct calls
+    do that file I/O inline.
+    """
+    
+    engine = "memory"
+    
+    def __init__(
+        self,
+        state=None,
+        retention: Optional[RetentionPolicy] = None,
+        max_resident_messages: int = 0,
+        spill_path: str = ""
+    ):
+        """
+        Initialize InMemoryDatabase
+        
+        Args:
+            state: State store (a new LocalStateStore if None)
+            retention: Per-conversation capacity and policy (no limit if None)
+            max_resident_messages: Messages held in memory before idle conversations spill (0 for no limit)
+            spill_path: Directory for spilled conversations (the system temp directory if empty)
+        """
+        self.state = state if state is not None else LocalStateStore()
+        self.retention = retention if retention is not None else RetentionPolicy()
+        # A shared store isn't this process's memory to manage
+        self.max_resident_messages = 0 if self.state.shared else max_resident_messages
+        self.spill = SpillStore(spill_path)
+        # Resident conversations, least recently used first -> message count
+        self._resident: "OrderedDict[str, int]" = OrderedDict()
+        self._resident_messages = 0
+        # Evicted conversations whose spill file call() has not written yet
+        self._outgoing: Dict[str, List[dict]] = {}
+        self._defer_spill = False
+        self._spill_lock: Optional[asyncio.Lock] = None
+        self.retained_out = 0
+    
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Run a database method from async code (off the loop when the store is shared SQLite)"""
+        if not self.max_resident_messages and not self.spill.conversations:
+            return await self.state.call(getattr(self, method), *args, **kwargs)
+        if self._spill_lock is None:
+            self._spill_lock = asyncio.Lock()
+        # Spilled conversations the method uses are read back off the loop first
+        for conversation_id in self._conversations_used(method, args):
+            if conversation_id in self.spill:
+                async with self._spill_lock:
+                    if conversation_id in self.spill:
+                        messages = await asyncio.to_thread(self.spill.read, conversation_id)
+                        self._restore(conversation_id, messages)
+        self._defer_spill = True
+        try:
+            result = getattr(self, method)(*args, **kwargs)
+        finally:
+            self._defer_spill = False
+        if self._outgoing:
+            await self._write_outgoing()
+        return result
+    
+    @staticmethod
+    def _conversations_used(method: str, args: tuple) -> List[str]:
+        if method == "add_records":
+            return list(args[0]) if args else []
+        if method in ("add_message", "add_messages", "get_messages") and args:
+            return [args[0]]
+        return []
+    
+    async def _write_outgoing(self):
+        """Write evicted conversations to their spill files in a thread"""
+        async with self._spill_lock:
+            while self._outgoing:
+                conversation_id, messages = next(iter(self._outgoing.items()))
+                await asyncio.to_thread(self.spill.write, conversation_id, messages)
+                if self._outgoing.get(conversation_id) is messages:
+                    del self._outgoing[conversation_id]
+                elif conversation_id not in self._outgoing:
+                    # Taken back while being written; the file is stale. Dropped
+                    # before yielding so no one reads it back (one unlink)
+                    self.spill.discard(conversation_id)
+    
+    def flush(self):
+        """Writes are applied immediately"""
+    
+    def close(self):
+        """Remove spilled conversations"""
+        self.spill.close()
+    
+    @staticmethod
+    def _messages_ns(conversation_id: str) -> str:
+        return f"messages/{conversation_id}"
+    
+    def set_memory_capacity(self, agent_id: str, capacity: int):
+        """Messages kept by conversations with an agent (its AgentProfile.memory_capacity)"""
+        self.retention.set_capacity(agent_id, capacity)
+    
+    def _capacity(self, conversation_id: str) -> int:
+        conversation = self.state.get("conversations", conversation_id) or {}
+        if conversation.get('memory_capacity') is not None:
+            return conversation['memory_capacity']
+        return self.retention.capacity_for(conversation.get('agent_id'))
+    
+    def _touch(self, conversation_id: str):
+        """Before using a conversation's messages: reload it if spilled, mark it recently used"""
+        if not self.max_resident_messages and not self.spill.conversations and not self._outgoing:
+            return
+        if conversation_id in self._outgoing:
+            self._restore(conversation_id, self._outgoing.pop(conversation_id))
+        elif conversation_id in self.spill:
+            self._restore(conversation_id, self.spill.read(conversation_id))
+        elif conversation_id in self._resident:
+            self._resident.move_to_end(conversation_id)
     
-    def __init__(self):
-        self.messages: Dict[str, list] = {}
-        self.conversations: Dict[str, dict] = {}
-        self.executions: Dict[str, dict] = {}
-        self.users: Dict[str, dict] = {}
+    def _restore(self, conversation_id: str, messages: List[dict]):
+        """Make a spilled conversation resident again"""
+        self.state.put_many(self._messages_ns(conversation_id), [(m['id'], m) for m in messages])
+        self._resident[conversation_id] = len(messages)
+        self._resident_messages += len(messages)
+        self._evict(keep=conversation_id)
+    
+    def _retain(self, conversation_id: str):
+        """After adding messages: apply the conversation's capacity, then the resident limit"""
+        namespace = self._messages_ns(conversation_id)
+        count = self.state.count(namespace)
+        excess = self.retention.overflow(count, self._capacity(conversation_id))
+        if excess:
+            dropped = self.state.range(namespace, limit=excess)
+            for message in dropped:
+                self.state.delete(namespace, message['id'])
+            summary = self.retention.condense(dropped)
+            if summary is not None:
+                self.state.put(namespace, summary['id'], summary)
+            self.retained_out += sum(1 for message in dropped if message.get('type') != "summary")
+            count = self.state.count(namespace)
+        if not self.max_resident_messages:
+            return
+        self._resident_messages += count - self._resident.get(conversation_id, 0)
+        self._resident[conversation_id] = count
+        self._resident.move_to_end(conversation_id)
+        self._evict(keep=conversation_id)
+    
+    def _evict(self, keep: str):
+        """Spill least recently used conversations until under the resident limit"""
+        while self._resident_messages > self.max_resident_messages and len(self._resident) > 1:
+            conversation_id = next(iter(self._resident))
+            if conversation_id == keep:
+                self._resident.move_to_end(conversation_id)
+                continue
+            namespace = self._messages_ns(conversation_id)
+            if self._defer_spill:
+                self._outgoing[conversation_id] = self.state.range(namespace)
+            else:
+                self.spill.write(conversation_id, self.state.range(namespace))
+            self.state.clear(namespace)
+            self._resident_messages -= self._resident.pop(conversation_id)
+    
+    def _forget(self, conversation_id: str):
+        """A conversation's messages were cleared"""
+        self._outgoing.pop(conversation_id, None)
+        self.spill.discard(conversation_id)
+        self._resident_messages -= self._resident.pop(conversation_id, 0)
     
     # Messages
     def add_message(self, conversation_id: str, message: dict) -> str:
         """Add message to conversation"""
-        if conversation_id not in self.messages:
-            self.messages[conversation_id] = []
-        
-        message_id = f"msg_{datetime.now().timestamp()}"
+        self._touch(conversation_id)
+        message_id = new_id("msg")
         message['id'] = message_id
         message['timestamp'] = datetime.now().isoformat()
-        self.messages[conversation_id].append(message)
+        self.state.put(self._messages_ns(conversation_id), message_id, message)
+        self._retain(conversation_id)
         return message_id
     
-    def get_messages(self, conversation_id: str) -> List[dict]:
-        """Get all messages in conversation"""
-        return self.messages.get(conversation_id, [])
+    def add_messages(self, conversation_id: str, messages: List[dict]) -> List[str]:
+        """
+        Add several messages to a conversation in one write
+        
+        Messages get IDs in list order. A timestamp already set is kept
+        (replayed transcripts), the rest share one taken for the batch.
+        
+        Args:
+            conversation_id: Conversation to add to
+            messages: Messages, oldest first
+        
+        Returns:
+            Message IDs in list order
+        """
+        return self.add_records({conversation_id: messages}, {})
+    
+    def add_records(self, messages: Dict[str, List[dict]], executions: Dict[str, List[dict]]) -> List[str]:
+        """
+        Add messages to several conversations and executions of several agents in one write
+        
+        Args:
+            messages: Conversation ID -> messages, oldest first (see add_messages)
+            executions: Agent ID -> executions (see add_executions)
+        
+        Returns:
+            Message IDs, then execution IDs, in argument order
+        """
+        for conversation_id in messages:
+            self._touch(conversation_id)
+        now = datetime.now().isoformat()
+        items = []
+        for conversation_id, conversation_messages in messages.items():
+            namespace = self._messages_ns(conversation_id)
+            for message in conversation_messages:
+                message['id'] = new_id("msg")
+                message.setdefault('timestamp', now)
+                items.append((namespace, message['id'], message))
+        for agent_executions in executions.values():
+            for execution in agent_executions:
+                execution['id'] = new_id("exec")
+                execution.setdefault('started_at', now)
+                items.append(("executions", execution['id'], execution))
+        self.state.put_all(items)
+        for conversation_id in messages:
+            self._retain(conversation_id)
+        return [record_id for _, record_id, _ in items]
+    
+    def get_messages(
+        self,
+        conversation_id: str,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Get messages in conversation, oldest first
+        
+        Message IDs sort in creation order, so they double as cursors.
+        
+        Args:
+            conversation_id: Conversation to read
+            before: Only messages with a lower ID
+            after: Only messages with a higher ID
+            limit: Most messages returned: the first ones after after, or,
+                with only before given, the last ones before it
+        
+        Returns:
+            Messages in ID order (all of them by default)
+        """
+        self._touch(conversation_id)
+        return self.state.range(self._messages_ns(conversation_id), after, before, limit)
     
     def clear_messages(self, conversation_id: str) -> bool:
         """Clear all messages in conversation"""
-        if conversation_id in self.messages:
-            self.messages[conversation_id] = []
+        namespace = self._messages_ns(conversation_id)
+        spilled = conversation_id in self.spill or conversation_id in self._outgoing
+        self._forget(conversation_id)
+        if spilled or self.state.get("conversations", conversation_id) is not None or self.state.count(namespace):
+            self.state.clear(namespace)
             return True
         return False
     
     # Conversations
-    def create_conversation(self, user_id: str, agent_id: str) -> str:
-        """Create new conversation"""
-        conversation_id = f"conv_{datetime.now().timestamp()}"
-        self.conversations[conversation_id] = {
+    def create_conversation(self, user_id: str, agent_id: str, memory_capacity: Optional[int] = None) -> str:
+        """
+        Create new conversation
+        
+        Args:
+            user_id: User in the conversation
+            agent_id: Agent in the conversation
+            memory_capacity: Messages kept (default the agent's capacity, if one is set)
+        """
+        conversation_id = new_id("conv")
+        self.state.put("conversations", conversation_id, {
             'id': conversation_id,
             'user_id': user_id,
             'agent_id': agent_id,
+            'memory_capacity': self.retention.initial_capacity(agent_id, memory_capacity),
             'created_at': datetime.now().isoformat(),
             'updated_at': datetime.now().isoformat()
+        })
+        return conversation_id
+    
+    def get_conversation(self, conversation_id: str) -> Optional[dict]:
+        """Get conversation details"""
+        return self.state.get("conversations", conversation_id)
+    
+    # Executions
+    def add_execution(self, agent_id: str, execution: dict) -> str:
+        """Add agent execution"""
+        execution_id = new_id("exec")
+        execution['id'] = execution_id
+        execution['started_at'] = datetime.now().isoformat()
+        self.state.put("executions", execution_id, execution)
+        return execution_id
+    
+    def add_executions(self, agent_id: str, executions: List[dict]) -> List[str]:
+        """Add several agent executions in one write (see add_messages; started_at is kept if set)"""
+        return self.add_records({}, {agent_id: executions})
+    
+    def get_execution(self, execution_id: str) -> Optional[dict]:
+        """Get execution details"""
+        return self.state.get("executions", execution_id)
+    
+    def update_execution(self, execution_id: str, updates: dict) -> bool:
+        """Update execution"""
+        updates = {**updates, 'updated_at': datetime.now().isoformat()}
+        return self.state.update("executions", execution_id, updates) is not None
+    
+    # Users
+    def create_user(self, username: str, email: Optional[str] = None) -> str:
+        """Create user"""
+        user_id = new_id("user")
+        self.state.put("users", user_id, {
+            'id': user_id,
+            'username': username,
+            'email': email,
+            'created_at': datetime.now().isoformat()
+        })
+        return user_id
+    
+    def get_user(self, user_id: str) -> Optional[dict]:
+        """Get user details"""
+        return self.state.get("users", user_id)
+    
+    # Statistics
+    def get_stats(self) -> dict:
+        """Get database statistics"""
+        resident = self.state.count("messages/", prefix=True)
+        outgoing = sum(len(messages) for messages in self._outgoing.values())
+        spilled = self.spill.messages + outgoing
+        return {
+            'total_messages': resident + spilled,
+            'total_conversations': self.state.count("conversations"),
+            'total_executions': self.state.count("executions"),
+            'total_users': self.state.count("users"),
+            'engine': self.engine,
+            'resident_messages': resident,
+            'spilled_messages': spilled,
+            'resident_conversations': self.state.count_namespaces("messages/"),
+            'spilled_conversations': self.spill.conversations + len(self._outgoing),
+            'spills': self.spill.spills,
+            'reloads': self.spill.reloads,
+            'retention_policy': self.retention.policy,
+            'retained_out': self.retained_out
         }
-        self.messages[conversation_id] = []
+
+
+class SQLiteDatabase:
+    """
+    Persistent database in a SQLite file, with the InMemoryDatabase methods
+    
+    One dedicated thread per process owns the connection (WAL mode, so
+    other workers' readers never block on its writes). Calls are queued
+    to that thread, which drains the queue and runs everything waiting in
+    one transaction, so a burst of writes costs one commit. Every call
+    waits for its transaction to commit and raises the error if its
+    statement failed, so a returned ID is always stored; reads see every
+    write queued before them. A bulk call is a single queued call, so it
+    always commits in one transaction. Async code uses call() to wait
+    without blocking the event loop, which lets concurrent writers share
+    a commit.
+    
+    Conversations keep at most their retention capacity of messages;
+    older ones are trimmed in the same transaction as the write that
+    overflowed. The rest stays on disk, so nothing is spilled.
+    
+    Statements are fixed strings, so sqlite3's per-connection statement
+    cache prepares each of them once.
+    """
+    
+    engine = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            conversation_id TEXT NOT NULL,
+            value TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_conversation_id ON messages (conversation_id, id);
+        CREATE TABLE IF NOT EXISTS conversations (id TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS executions (id TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+    
+    # get_messages statements by (after given, before given, newest first)
+    _MESSAGE_RANGES = {
+        (after, before, newest): (
+            "SELECT value FROM messages WHERE conversation_id = ?"
+            + (" AND id > ?" if after else "")
+            + (" AND id < ?" if before else "")
+            + (" ORDER BY id DESC" if newest else " ORDER BY id")
+            + " LIMIT ?"
+        )
+        for after in (False, True)
+        for before in (False, True)
+        for newest in (False, True)
+    }
+    
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        busy_timeout: float = 5.0,
+        retention: Optional[RetentionPolicy] = None
+    ):
+        """
+        Initialize SQLiteDatabase
+        
+        Args:
+            path: Database file (created if missing)
+            batch_size: Most queued calls run in one transaction
+            busy_timeout: Seconds to wait for another process's write lock
+            retention: Per-conversation capacity and policy (no limit if None)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self.retention = retention if retention is not None else RetentionPolicy()
+        self.retained_out = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self.transactions = 0
+        self.calls = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+    
+    # Database thread
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                # First use, or first use after a fork: the parent's thread is gone
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._serve, name="sqlite-database", daemon=True)
+                self._thread.start()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+    
+    def _serve(self):
+        """Database thread: run queued calls in batched transactions"""
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+            if batch:
+                self._run_batch(conn, batch)
+        conn.close()
+    
+    def _run_batch(self, conn: sqlite3.Connection, batch: List[tuple]):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for operation, _ in batch:
+                # A savepoint per call, so one failing call doesn't undo the rest
+                conn.execute("SAVEPOINT call")
+                try:
+                    outcomes.append((True, operation(conn)))
+                    conn.execute("RELEASE call")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO call")
+                    conn.execute("RELEASE call")
+                    outcomes.append((False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = [(False, e)] * len(batch)
+        self.transactions += 1
+        self.calls += len(batch)
+        for (_, future), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+    
+    def _submit(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Queue an operation for the database thread and wait until its transaction commits
+        
+        Raises:
+            Exception: Whatever the operation or the commit raised
+        """
+        self._ensure_thread()
+        future: Future = Future()
+        self._queue.put((operation, future))
+        return future.result()
+    
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Run a database method from async code without blocking the event loop"""
+        return await asyncio.to_thread(getattr(self, method), *args, **kwargs)
+    
+    def flush(self):
+        """Wait until every queued call has run"""
+        self._submit(lambda conn: None)
+    
+    def close(self):
+        """Run queued calls and stop the database thread"""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+    
+    @staticmethod
+    def _dump(value: Any) -> str:
+        return json.dumps(value, default=str)
+    
+    def _put(self, table: str, record_id: str, value: dict):
+        sql = (
+            f"INSERT INTO {table} (id, value) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET value = excluded.value"
+        )
+        data = self._dump(value)
+        self._submit(lambda conn: conn.execute(sql, (record_id, data)))
+    
+    def _get(self, table: str, record_id: str) -> Optional[dict]:
+        sql = f"SELECT value FROM {table} WHERE id = ?"
+        row = self._submit(lambda conn: conn.execute(sql, (record_id,)).fetchone())
+        return json.loads(row[0]) if row else None
+    
+    def set_memory_capacity(self, agent_id: str, capacity: int):
+        """Messages kept by conversations with an agent (its AgentProfile.memory_capacity)"""
+        self.retention.set_capacity(agent_id, capacity)
+    
+    def _retain(self, conn: sqlite3.Connection, conversation_id: str):
+        """Trim a conversation back to its capacity (on the database thread)"""
+        row = conn.execute("SELECT value FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        conversation = json.loads(row[0]) if row else {}
+        capacity = conversation.get('memory_capacity')
+        if capacity is None:
+            capacity = self.retention.capacity_for(conversation.get('agent_id'))
+        if capacity <= 0:
+            return
+        count = conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()[0]
+        excess = self.retention.overflow(count, capacity)
+        if not excess:
+            return
+        rows = conn.execute(
+            "SELECT id, value FROM messages WHERE conversation_id = ? ORDER BY id LIMIT ?",
+            (conversation_id, excess)
+        ).fetchall()
+        conn.execute(
+            "DELETE FROM messages WHERE conversation_id = ? AND id <= ?", (conversation_id, rows[-1][0])
+        )
+        if not self.retention.summarizes:
+            self.retained_out += len(rows)
+            return
+        dropped = [json.loads(value) for _, value in rows]
+        summary = self.retention.condense(dropped)
+        conn.execute(
+            "INSERT INTO messages (id, conversation_id, value) VALUES (?, ?, ?)",
+            (summary['id'], conversation_id, self._dump(summary))
+        )
+        self.retained_out += sum(1 for message in dropped if message.get('type') != "summary")
+    
+    # Messages
+    def add_message(self, conversation_id: str, message: dict) -> str:
+        """Add message to conversation"""
+        message_id = new_id("msg")
+        message['id'] = message_id
+        message['timestamp'] = datetime.now().isoformat()
+        data = self._dump(message)
+        
+        def add(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT INTO messages (id, conversation_id, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET value = excluded.value",
+                (message_id, conversation_id, data)
+            )
+            self._retain(conn, conversation_id)
+        self._submit(add)
+        return message_id
+    
+    def add_messages(self, conversation_id: str, messages: List[dict]) -> List[str]:
+        """Add several messages in one transaction, waiting for the commit (see InMemoryDatabase.add_messages)"""
+        return self.add_records({conversation_id: messages}, {})
+    
+    def add_records(self, messages: Dict[str, List[dict]], executions: Dict[str, List[dict]]) -> List[str]:
+        """Add messages and executions in one transaction, waiting for the commit (see InMemoryDatabase.add_records)"""
+        now = datetime.now().isoformat()
+        message_rows = []
+        for conversation_id, conversation_messages in messages.items():
+            for message in conversation_messages:
+                message['id'] = new_id("msg")
+                message.setdefault('timestamp', now)
+                message_rows.append((message['id'], conversation_id, self._dump(message)))
+        execution_rows = []
+        for agent_executions in executions.values():
+            for execution in agent_executions:
+                execution['id'] = new_id("exec")
+                execution.setdefault('started_at', now)
+                execution_rows.append((execution['id'], self._dump(execution)))
+        
+        def add(conn: sqlite3.Connection):
+            conn.executemany(
+                "INSERT INTO messages (id, conversation_id, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET value = excluded.value",
+                message_rows
+            )
+            conn.executemany(
+                "INSERT INTO executions (id, value) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET value = excluded.value",
+                execution_rows
+            )
+            for conversation_id in messages:
+                self._retain(conn, conversation_id)
+        self._submit(add)
+        return [row[0] for row in message_rows] + [row[0] for row in execution_rows]
+    
+    def get_messages(
+        self,
+        conversation_id: str,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        """Get messages in conversation, oldest first (see InMemoryDatabase.get_messages)"""
+        newest = after is None and before is not None and limit is not None
+        sql = self._MESSAGE_RANGES[(after is not None, before is not None, newest)]
+        params = [conversation_id]
+        if after is not None:
+            params.append(after)
+        if before is not None:
+            params.append(before)
+        params.append(-1 if limit is None else limit)
+        rows = self._submit(lambda conn: conn.execute(sql, params).fetchall())
+        if newest:
+            rows.reverse()
+        return [json.loads(value) for (value,) in rows]
+    
+    def clear_messages(self, conversation_id: str) -> bool:
+        """Clear all messages in conversation"""
+        def clear(conn: sqlite3.Connection) -> bool:
+            deleted = conn.execute(
+                "DELETE FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).rowcount
+            exists = conn.execute(
+                "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            return deleted > 0 or exists is not None
+        return self._submit(clear)
+    
+    # Conversations
+    def create_conversation(self, user_id: str, agent_id: str, memory_capacity: Optional[int] = None) -> str:
+        """Create new conversation (see InMemoryDatabase.create_conversation)"""
+        conversation_id = new_id("conv")
+        self._put("conversations", conversation_id, {
+            'id': conversation_id,
+            'user_id': user_id,
+            'agent_id': agent_id,
+            'memory_capacity': self.retention.initial_capacity(agent_id, memory_capacity),
+            'created_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        })
         return conversation_id
     
     def get_conversation(self, conversation_id: str) -> Optional[dict]:
         """Get conversation details"""
-        return self.conversations.get(conversation_id)
+        return self._get("conversations", conversation_id)
     
     # Executions
     def add_execution(self, agent_id: str, execution: dict) -> str:
         """Add agent execution"""
-        execution_id = f"exec_{datetime.now().timestamp()}"
+        execution_id = new_id("exec")
         execution['id'] = execution_id
         execution['started_at'] = datetime.now().isoformat()
-        self.executions[execution_id] = execution
+        self._put("executions", execution_id, execution)
         return execution_id
     
+    def add_executions(self, agent_id: str, executions: List[dict]) -> List[str]:
+        """Add several agent executions in one transaction, waiting for the commit"""
+        return self.add_records({}, {agent_id: executions})
+    
     def get_execution(self, execution_id: str) -> Optional[dict]:
         """Get execution details"""
-        return self.executions.get(execution_id)
+        return self._get("executions", execution_id)
     
     def update_execution(self, execution_id: str, updates: dict) -> bool:
         """Update execution"""
-        if execution_id in self.executions:
-            self.executions[execution_id].update(updates)
-            self.executions[execution_id]['updated_at'] = datetime.now().isoformat()
+        updates = {**updates, 'updated_at': datetime.now().isoformat()}
+        
+        def update(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT value FROM executions WHERE id = ?", (execution_id,)).fetchone()
+            if row is None:
+                return False
+            execution = json.loads(row[0])
+            execution.update(updates)
+            conn.execute(
+                "UPDATE executions SET value = ? WHERE id = ?", (self._dump(execution), execution_id)
+            )
             return True
-        return False
+        return self._submit(update)
     
     # Users
     def create_user(self, username: str, email: Optional[str] = None) -> str:
         """Create user"""
-        user_id = f"user_{datetime.now().timestamp()}"
-        self.users[user_id] = {
+        user_id = new_id("user")
+        self._put("users", user_id, {
             'id': user_id,
             'username': username,
             'email': email,
             'created_at': datetime.now().isoformat()
-        }
+        })
         return user_id
     
     def get_user(self, user_id: str) -> Optional[dict]:
         """Get user details"""
-        return self.users.get(user_id)
+        return self._get("users", user_id)
     
     # Statistics
     def get_stats(self) -> dict:
         """Get database statistics"""
+        counts = self._submit(lambda conn: conn.execute(
+            "SELECT (SELECT COUNT(*) FROM messages), (SELECT COUNT(*) FROM conversations), "
+            "(SELECT COUNT(*) FROM executions), (SELECT COUNT(*) FROM users)"
+        ).fetchone())
         return {
-            'total_messages': sum(len(msgs) for msgs in self.messages.values()),
-            'total_conversations': len(self.conversations),
-            'total_executions': len(self.executions),
-            'total_users': len(self.users)
+            'total_messages': counts[0],
+            'total_conversations': counts[1],
+            'total_executions': counts[2],
+            'total_users': counts[3],
+            'engine': self.engine,
+            'retention_policy': self.retention.policy,
+            'retained_out': self.retained_out,
+            'transactions': self.transactions,
+            'calls_per_transaction': round(self.calls / self.transactions, 2) if self.transactions else 0.0
         }
 
 
+def open_database(url: Optional[str], state=None):
+    """
+    Database engine for a DATABASE_URL
+    
+    Args:
+        url: "sqlite:///<path>" for SQLiteDatabase; empty or "memory://" for InMemoryDatabase
+        state: State store for InMemoryDatabase
+    
+    Raises:
+        ValueError: Unsupported URL scheme or retention policy
+    """
+    retention = RetentionPolicy(
+        capacity=settings.CONVERSATION_MEMORY_CAPACITY,
+        policy=settings.CONVERSATION_RETENTION_POLICY
+    )
+    if not url or url.startswith("memory:"):
+        return InMemoryDatabase(
+            state,
+            retention=retention,
+            max_resident_messages=settings.MEMORY_MAX_RESIDENT_MESSAGES,
+            spill_path=settings.MEMORY_SPILL_PATH
+        )
+    if url.startswith("sqlite:///"):
+        return SQLiteDatabase(url[len("sqlite:///"):], batch_size=settings.DATABASE_BATCH_SIZE, retention=retention)
+    raise ValueError(f"Unsupported DATABASE_URL: {url}")
+
+
 # Global database instance
-db = InMemoryDatabase()
+db = open_database(settings.DATABASE_URL, state_store)
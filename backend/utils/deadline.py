@@ -0,0 +1,53 @@
+"""Request deadlines for My.app"""
+
+from typing import Optional
+import time
+
+from utils.exceptions import DeadlineExceededError
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must finish
+
+    Created once at the API layer and passed down through the controller,
+    agents and LLM provider so every layer shares the same budget.
+    """
+    
+    def __init__(self, expires_at: Optional[float] = None):
+        """
+        Initialize Deadline
+        
+        Args:
+            expires_at: time.monotonic() value at expiry (None = no deadline)
+        """
+        self.expires_at = expires_at
+    
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> "Deadline":
+        """Deadline seconds from now (None = no deadline)"""
+        return cls(None if seconds is None else time.monotonic() + seconds)
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+    
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """The smaller of timeout and the remaining time"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+    
+    def check(self, what: str = "Request"):
+        """Raise DeadlineExceededError if the deadline has passed"""
+        if self.expired():
+            raise DeadlineExceededError(f"{what} deadline exceeded")
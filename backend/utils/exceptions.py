@@ -49,3 +49,8 @@ class ConflictError(MyAppException):
 class RateLimitError(MyAppException):
     """Rate limit exceeded"""
     pass
+
+
+class DeadlineExceededError(MyAppException):
+    """Request deadline expired before the work finished"""
+    pass
@@ -0,0 +1,75 @@
+"""
+ID generation for My.app
+Unique, time-sortable record IDs
+"""
+
+from typing import Optional
+import os
+import secrets
+import threading
+import time
+
+# Crockford base32: sorts the same as the numbers it encodes
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class SortableIdGenerator:
+    """
+    ULID-style IDs: 48-bit millisecond timestamp, 16-bit sequence, 64-bit node
+    
+    Encoded as 26 base32 characters, so IDs compare as strings in creation
+    order. The sequence counts IDs within one millisecond (borrowing the
+    next millisecond if it runs out, and holding the last one if the clock
+    steps back), so IDs from one process are strictly increasing. The node
+    is random per process and re-drawn after a fork, which keeps IDs made
+    in the same millisecond by different workers apart.
+    """
+    
+    def __init__(self):
+        """Initialize SortableIdGenerator"""
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._node = 0
+        self._last_ms = 0
+        self._seq = 0
+    
+    def new(self) -> str:
+        """Next ID"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._node = secrets.randbits(64)
+                self._last_ms, self._seq = 0, 0
+            now_ms = int(time.time() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms, self._seq = now_ms, 0
+            else:
+                self._seq += 1
+                if self._seq > 0xFFFF:
+                    self._last_ms, self._seq = self._last_ms + 1, 0
+            value = (self._last_ms << 80) | (self._seq << 64) | self._node
+        return _encode(value, 26)
+
+
+_generator = SortableIdGenerator()
+
+
+def new_id(prefix: str) -> str:
+    """
+    New unique, time-sortable ID
+    
+    Args:
+        prefix: Record type, e.g. "msg"
+    
+    Returns:
+        "<prefix>_<26 base32 characters>"
+    """
+    return f"{prefix}_{_generator.new()}"
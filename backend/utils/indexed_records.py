@@ -0,0 +1,156 @@
+"""
+Indexed records for My.app
+Mutable records with stable IDs, secondary indexes and cursor pagination
+"""
+
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+import bisect
+import time
+
+
+class IndexedRecords:
+    """
+    Records keyed by an ascending integer ID, filed under secondary indexes
+    
+    Unlike IndexedRingBuffer records are kept and can be updated; an
+    update re-files the record under its new index keys. IDs grow with
+    creation time, so time ranges are resolved by binary search and the
+    ID doubles as the pagination cursor.
+    """
+    
+    def __init__(self, indexes: Optional[Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]] = None):
+        """
+        Initialize IndexedRecords
+        
+        Args:
+            indexes: Index name -> function returning the keys a record is filed under
+        """
+        self.indexes = indexes or {}
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._ids: List[int] = []
+        self._times: List[float] = []
+        self._index: Dict[str, Dict[str, List[int]]] = {name: {} for name in self.indexes}
+        self._next_id = 0
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def _keys(self, name: str, record: Dict[str, Any]) -> List[str]:
+        return [str(key) for key in self.indexes[name](record)]
+    
+    def _file(self, record_id: int, record: Dict[str, Any]):
+        for name in self.indexes:
+            index = self._index[name]
+            for key in self._keys(name, record):
+                bisect.insort(index.setdefault(key, []), record_id)
+    
+    def _unfile(self, record_id: int, record: Dict[str, Any]):
+        for name in self.indexes:
+            index = self._index[name]
+            for key in self._keys(name, record):
+                ids = index[key]
+                del ids[bisect.bisect_left(ids, record_id)]
+                if not ids:
+                    del index[key]
+    
+    def add(self, record: Dict[str, Any], timestamp: Optional[float] = None) -> int:
+        """
+        Store a new record
+        
+        Args:
+            record: Record to store (gets an "id" field)
+            timestamp: Epoch seconds (default now)
+        
+        Returns:
+            ID of the record
+        """
+        record_id = self._next_id
+        self._next_id += 1
+        record["id"] = record_id
+        self._records[record_id] = record
+        self._ids.append(record_id)
+        self._times.append(time.time() if timestamp is None else timestamp)
+        self._file(record_id, record)
+        return record_id
+    
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """Record with this ID, or None"""
+        return self._records.get(record_id)
+    
+    def update(self, record_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge updates into a record and re-index it; return it, or None if missing"""
+        record = self._records.get(record_id)
+        if record is None:
+            return None
+        self._unfile(record_id, record)
+        record.update(updates)
+        self._file(record_id, record)
+        return record
+    
+    def count(self, index: Optional[str] = None, key: Any = None) -> int:
+        """Number of records, or of records filed under key in index"""
+        if index is None:
+            return len(self._records)
+        return len(self._index[index].get(str(key), ()))
+    
+    def counts(self, index: str) -> Dict[str, int]:
+        """Records per key of an index"""
+        return {key: len(ids) for key, ids in self._index[index].items()}
+    
+    def _id_bound(self, ts: float, inclusive: bool) -> int:
+        """Smallest ID stamped at/after ts (after ts if not inclusive), or the next ID"""
+        if inclusive:
+            i = bisect.bisect_left(self._times, ts)
+        else:
+            i = bisect.bisect_right(self._times, ts)
+        return self._ids[i] if i < len(self._ids) else self._next_id
+    
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Find records, newest first
+        
+        Args:
+            filters: Index name -> key the record must be filed under
+            since: Only records created at or after this epoch time
+            until: Only records created at or before this epoch time
+            before: Cursor; only records with a lower ID
+            limit: Maximum records returned
+        
+        Returns:
+            (records, cursor for the next page or None)
+        """
+        filters = {name: str(key) for name, key in (filters or {}).items() if key is not None}
+        for name in filters:
+            if name not in self.indexes:
+                raise ValueError(f"Unknown record index: {name}")
+        
+        lowest = 0 if since is None else self._id_bound(since, inclusive=True)
+        below = self._next_id if before is None else min(before, self._next_id)
+        if until is not None:
+            below = min(below, self._id_bound(until, inclusive=False))
+        
+        if filters:
+            lists = [self._index[name].get(key) for name, key in filters.items()]
+            if any(ids is None for ids in lists):
+                return [], None
+            candidates = min(lists, key=len)
+        else:
+            candidates = self._ids
+        
+        items: List[Dict[str, Any]] = []
+        i = bisect.bisect_left(candidates, below) - 1
+        while i >= 0 and candidates[i] >= lowest:
+            record = self._records[candidates[i]]
+            if all(key in self._keys(name, record) for name, key in filters.items()):
+                if len(items) == limit:
+                    return items, items[-1]["id"]
+                items.append(record)
+            i -= 1
+        return items, None
@@ -0,0 +1,212 @@
+"""
+Ring buffer for My.app
+Fixed-capacity history with secondary indexes and cursor pagination
+"""
+
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+import bisect
+import sys
+import time
+
+
+def approximate_size(value: Any) -> int:
+    """Rough deep size in bytes of JSON-like data"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(v) for v in value)
+    return size
+
+
+class _SeqList:
+    """Ascending sequence numbers; evicting the oldest is O(1) amortized"""
+    
+    __slots__ = ("seqs", "start")
+    
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.start = 0
+    
+    def __len__(self) -> int:
+        return len(self.seqs) - self.start
+    
+    def append(self, seq: int):
+        self.seqs.append(seq)
+    
+    def evict(self, seq: int) -> bool:
+        """Drop seq if it is the oldest entry; return whether the list is now empty"""
+        if self.start < len(self.seqs) and self.seqs[self.start] == seq:
+            self.start += 1
+            if self.start > 64 and self.start * 2 > len(self.seqs):
+                del self.seqs[:self.start]
+                self.start = 0
+        return len(self) == 0
+    
+    def descending(self, below: int, lowest: int) -> Iterable[int]:
+        """Sequence numbers lowest <= seq < below, newest first"""
+        i = bisect.bisect_left(self.seqs, below, self.start) - 1
+        while i >= self.start and self.seqs[i] >= lowest:
+            yield self.seqs[i]
+            i -= 1
+
+
+class IndexedRingBuffer:
+    """
+    Fixed-capacity history, newest entries overwrite the oldest
+    
+    Every entry gets a sequence number and timestamp. Each index maps an
+    entry to the keys it is filed under (e.g. the agents that ran), so a
+    query walks only the shortest matching index instead of the whole
+    buffer. Timestamps never decrease with sequence numbers (one earlier
+    than the previous entry's, e.g. after the wall clock is stepped back,
+    is raised to it), so time ranges are resolved by binary search.
+    """
+    
+    def __init__(
+        self,
+        capacity: int,
+        indexes: Optional[Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]] = None
+    ):
+        """
+        Initialize IndexedRingBuffer
+        
+        Args:
+            capacity: Maximum entries kept
+            indexes: Index name -> function returning the keys an entry is filed under
+        """
+        self.capacity = capacity
+        self.indexes = indexes or {}
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._times: List[float] = [0.0] * capacity
+        self._sizes: List[int] = [0] * capacity
+        self._index: Dict[str, Dict[str, _SeqList]] = {name: {} for name in self.indexes}
+        self._next_seq = 0
+        self._bytes = 0
+    
+    def __len__(self) -> int:
+        return min(self._next_seq, self.capacity)
+    
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self._next_seq - self.capacity)
+    
+    def _keys(self, name: str, entry: Dict[str, Any]) -> List[str]:
+        return [str(key) for key in self.indexes[name](entry)]
+    
+    def append(self, entry: Dict[str, Any], timestamp: Optional[float] = None) -> int:
+        """
+        Add an entry, evicting the oldest when full
+        
+        Args:
+            entry: Entry to store (gets a "seq" field)
+            timestamp: Epoch seconds (default now; raised to the previous entry's if earlier)
+        
+        Returns:
+            Sequence number of the entry
+        """
+        seq = self._next_seq
+        slot = seq % self.capacity
+        evicted = self._entries[slot]
+        if evicted is not None:
+            evicted_seq = seq - self.capacity
+            for name in self.indexes:
+                index = self._index[name]
+                for key in self._keys(name, evicted):
+                    if index[key].evict(evicted_seq):
+                        del index[key]
+            self._bytes -= self._sizes[slot]
+        
+        ts = time.time() if timestamp is None else timestamp
+        if seq > 0:
+            ts = max(ts, self._times[(seq - 1) % self.capacity])
+        entry["seq"] = seq
+        for name in self.indexes:
+            index = self._index[name]
+            for key in self._keys(name, entry):
+                index.setdefault(key, _SeqList()).append(seq)
+        self._entries[slot] = entry
+        self._times[slot] = ts
+        self._sizes[slot] = approximate_size(entry)
+        self._bytes += self._sizes[slot]
+        self._next_seq += 1
+        return seq
+    
+    def _seq_bound(self, ts: float, inclusive: bool) -> int:
+        """Smallest live seq stamped at/after ts (after ts if not inclusive), or the next seq"""
+        lo, hi = self.oldest_seq, self._next_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self._times[mid % self.capacity]
+            if t < ts or (not inclusive and t == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Find entries, newest first
+        
+        Args:
+            filters: Index name -> key the entry must be filed under
+            since: Only entries at or after this epoch time
+            until: Only entries at or before this epoch time
+            before: Cursor; only entries with a lower sequence number
+            limit: Maximum entries returned
+        
+        Returns:
+            (entries, cursor for the next page or None)
+        """
+        filters = {name: str(key) for name, key in (filters or {}).items() if key is not None}
+        for name in filters:
+            if name not in self.indexes:
+                raise ValueError(f"Unknown history index: {name}")
+        
+        lowest = self.oldest_seq
+        if since is not None:
+            lowest = max(lowest, self._seq_bound(since, inclusive=True))
+        below = self._next_seq if before is None else min(before, self._next_seq)
+        if until is not None:
+            below = min(below, self._seq_bound(until, inclusive=False))
+        
+        if filters:
+            lists = [self._index[name].get(key) for name, key in filters.items()]
+            if any(seq_list is None for seq_list in lists):
+                return [], None
+            candidates = min(lists, key=len).descending(below, lowest)
+        else:
+            candidates = range(below - 1, lowest - 1, -1)
+        
+        items: List[Dict[str, Any]] = []
+        for seq in candidates:
+            entry = self._entries[seq % self.capacity]
+            if all(key in self._keys(name, entry) for name, key in filters.items()):
+                if len(items) == limit:
+                    return items, items[-1]["seq"]
+                items.append(entry)
+        return items, None
+    
+    def latest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest limit entries (all if None), oldest first"""
+        count = len(self) if limit is None else min(limit, len(self))
+        return [
+            self._entries[seq % self.capacity]
+            for seq in range(self._next_seq - count, self._next_seq)
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, capacity and approximate memory use"""
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "memory_bytes": self._bytes,
+            "indexes": {name: len(index) for name, index in self._index.items()},
+        }
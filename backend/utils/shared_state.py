@@ -0,0 +1,721 @@
+"""
+Shared state for My.app
+Key/value, counter, history and indexed record storage that can be shared between worker processes
+"""
+
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+from collections import defaultdict
+import asyncio
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config.settings import settings
+from utils.indexed_records import IndexedRecords
+from utils.ring_buffer import IndexedRingBuffer
+
+
+class LocalStateStore:
+    """
+    Process-local state store (the default for a single worker)
+    
+    Values are held as-is; callers write changes back with put() or
+    update() rather than mutating returned values.
+    """
+    
+    shared = False
+    
+    def __init__(self):
+        """Initialize LocalStateStore"""
+        self._kv: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        self._counters: Dict[str, int] = defaultdict(lambda: -1)
+        self._histories: Dict[str, IndexedRingBuffer] = {}
+        self._records: Dict[str, IndexedRecords] = {}
+        # Sorted keys, kept for namespaces once range() has been used on them
+        self._sorted: Dict[str, List[str]] = {}
+    
+    async def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a function doing store I/O from async code (in-memory, so inline)"""
+        return fn(*args, **kwargs)
+    
+    def put(self, namespace: str, key: str, value: Any):
+        """Store value under key"""
+        kv = self._kv[namespace]
+        keys = self._sorted.get(namespace)
+        if keys is not None and key not in kv:
+            if not keys or key > keys[-1]:
+                keys.append(key)
+            else:
+                bisect.insort(keys, key)
+        kv[key] = value
+    
+    def put_many(self, namespace: str, items: List[Tuple[str, Any]]):
+        """Store several (key, value) pairs"""
+        for key, value in items:
+            self.put(namespace, key, value)
+    
+    def put_all(self, items: List[Tuple[str, str, Any]]):
+        """Store several (namespace, key, value) triples"""
+        for namespace, key, value in items:
+            self.put(namespace, key, value)
+    
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Value under key, or None"""
+        return self._kv[namespace].get(key)
+    
+    def update(self, namespace: str, key: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge updates into the dict under key; return it, or None if missing"""
+        value = self._kv[namespace].get(key)
+        if value is None:
+            return None
+        value.update(updates)
+        return value
+    
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove key; return whether it existed"""
+        existed = self._kv[namespace].pop(key, None) is not None
+        keys = self._sorted.get(namespace)
+        if existed and keys is not None:
+            del keys[bisect.bisect_left(keys, key)]
+        return existed
+    
+    def values(self, namespace: str) -> List[Any]:
+        """All values in insertion order"""
+        return list(self._kv[namespace].values())
+    
+    def range(
+        self,
+        namespace: str,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Values whose keys lie strictly between after and before, in key order
+        
+        Args:
+            namespace: Namespace to read
+            after: Exclusive lower key bound
+            before: Exclusive upper key bound
+            limit: Most values returned: the first ones after after, or, with
+                only before given, the last ones before it
+        """
+        kv = self._kv[namespace]
+        keys = self._sorted.get(namespace)
+        if keys is None:
+            keys = self._sorted[namespace] = sorted(kv)
+        lo = 0 if after is None else bisect.bisect_right(keys, after)
+        hi = len(keys) if before is None else bisect.bisect_left(keys, before)
+        if limit is not None and hi - lo > limit:
+            if after is None and before is not None:
+                lo = hi - limit
+            else:
+                hi = lo + limit
+        return [kv[key] for key in keys[lo:hi]]
+    
+    def count(self, namespace: str, prefix: bool = False) -> int:
+        """Number of keys in namespace (or in every namespace starting with it)"""
+        if prefix:
+            return sum(len(kv) for ns, kv in self._kv.items() if ns.startswith(namespace))
+        return len(self._kv[namespace])
+    
+    def count_namespaces(self, prefix: str) -> int:
+        """Number of non-empty namespaces starting with prefix"""
+        return sum(1 for ns, kv in self._kv.items() if kv and ns.startswith(prefix))
+    
+    def clear(self, namespace: str):
+        """Remove every key in namespace"""
+        self._kv.pop(namespace, None)
+        self._sorted.pop(namespace, None)
+    
+    def next_id(self, namespace: str) -> int:
+        """Next value of a counter starting at 0"""
+        self._counters[namespace] += 1
+        return self._counters[namespace]
+    
+    def peek_id(self, namespace: str) -> int:
+        """Last value handed out by next_id (-1 if none)"""
+        return self._counters.get(namespace, -1)
+    
+    def history(
+        self,
+        namespace: str,
+        capacity: int,
+        indexes: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]
+    ) -> IndexedRingBuffer:
+        """Indexed, capped history log (see IndexedRingBuffer)"""
+        if namespace not in self._histories:
+            self._histories[namespace] = IndexedRingBuffer(capacity, indexes)
+        return self._histories[namespace]
+    
+    def records(
+        self,
+        namespace: str,
+        indexes: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]
+    ) -> IndexedRecords:
+        """Indexed, updatable records (see IndexedRecords)"""
+        if namespace not in self._records:
+            self._records[namespace] = IndexedRecords(indexes)
+        return self._records[namespace]
+
+
+class SQLiteStateStore:
+    """
+    State store in a SQLite file shared by every worker process
+    
+    Runs in WAL mode so readers never block the writer. Each process opens
+    its own connection (re-opened after a fork); read-modify-write
+    operations take the write lock up front with BEGIN IMMEDIATE.
+    """
+    
+    shared = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS kv (
+            ns TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (ns, key)
+        );
+        CREATE TABLE IF NOT EXISTS counters (
+            ns TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS history (
+            ns TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            ts REAL NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (ns, seq)
+        );
+        CREATE TABLE IF NOT EXISTS history_keys (
+            ns TEXT NOT NULL,
+            idx TEXT NOT NULL,
+            key TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (ns, idx, key, seq)
+        );
+        CREATE INDEX IF NOT EXISTS history_keys_seq ON history_keys (ns, seq);
+        CREATE TABLE IF NOT EXISTS records (
+            ns TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            ts REAL NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (ns, id)
+        );
+        CREATE TABLE IF NOT EXISTS record_keys (
+            ns TEXT NOT NULL,
+            idx TEXT NOT NULL,
+            key TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            PRIMARY KEY (ns, idx, key, id)
+        );
+        CREATE INDEX IF NOT EXISTS record_keys_id ON record_keys (ns, id);
+    """
+    
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        """
+        Initialize SQLiteStateStore
+        
+        Args:
+            path: Database file (created if missing)
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+    
+    async def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a function doing store I/O from async code, in a thread so a busy lock can't stall the loop"""
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+    
+    @staticmethod
+    def _dump(value: Any) -> str:
+        return json.dumps(value, default=str)
+    
+    def put(self, namespace: str, key: str, value: Any):
+        """Store value under key"""
+        self._execute(
+            "INSERT INTO kv (ns, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value",
+            (namespace, key, self._dump(value))
+        )
+    
+    def put_many(self, namespace: str, items: List[Tuple[str, Any]]):
+        """Store several (key, value) pairs in one transaction"""
+        self.put_all([(namespace, key, value) for key, value in items])
+    
+    def put_all(self, items: List[Tuple[str, str, Any]]):
+        """Store several (namespace, key, value) triples in one transaction"""
+        rows = [(namespace, key, self._dump(value)) for namespace, key, value in items]
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO kv (ns, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value",
+                    rows
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Value under key, or None"""
+        rows = self._execute("SELECT value FROM kv WHERE ns = ? AND key = ?", (namespace, key))
+        return json.loads(rows[0][0]) if rows else None
+    
+    def update(self, namespace: str, key: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge updates into the dict under key; return it, or None if missing"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM kv WHERE ns = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                value = json.loads(row[0])
+                value.update(updates)
+                conn.execute(
+                    "UPDATE kv SET value = ? WHERE ns = ? AND key = ?",
+                    (self._dump(value), namespace, key)
+                )
+                conn.execute("COMMIT")
+                return value
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove key; return whether it existed"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM kv WHERE ns = ? AND key = ?", (namespace, key)
+            )
+            return cursor.rowcount > 0
+    
+    def values(self, namespace: str) -> List[Any]:
+        """All values in insertion order"""
+        rows = self._execute("SELECT value FROM kv WHERE ns = ? ORDER BY rowid", (namespace,))
+        return [json.loads(value) for (value,) in rows]
+    
+    def range(
+        self,
+        namespace: str,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Any]:
+        """Values whose keys lie strictly between after and before, in key order (see LocalStateStore.range)"""
+        sql = "SELECT value FROM kv WHERE ns = ?"
+        params: List[Any] = [namespace]
+        if after is not None:
+            sql += " AND key > ?"
+            params.append(after)
+        if before is not None:
+            sql += " AND key < ?"
+            params.append(before)
+        newest = after is None and before is not None and limit is not None
+        sql += " ORDER BY key DESC" if newest else " ORDER BY key"
+        sql += " LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        rows = self._execute(sql, tuple(params))
+        if newest:
+            rows.reverse()
+        return [json.loads(value) for (value,) in rows]
+    
+    def count(self, namespace: str, prefix: bool = False) -> int:
+        """Number of keys in namespace (or in every namespace starting with it)"""
+        if prefix:
+            # Escape LIKE wildcards in the prefix
+            pattern = namespace.replace("%", r"\%").replace("_", r"\_") + "%"
+            rows = self._execute("SELECT COUNT(*) FROM kv WHERE ns LIKE ? ESCAPE '\\'", (pattern,))
+        else:
+            rows = self._execute("SELECT COUNT(*) FROM kv WHERE ns = ?", (namespace,))
+        return rows[0][0]
+    
+    def count_namespaces(self, prefix: str) -> int:
+        """Number of non-empty namespaces starting with prefix"""
+        pattern = prefix.replace("%", r"\%").replace("_", r"\_") + "%"
+        rows = self._execute("SELECT COUNT(DISTINCT ns) FROM kv WHERE ns LIKE ? ESCAPE '\\'", (pattern,))
+        return rows[0][0]
+    
+    def clear(self, namespace: str):
+        """Remove every key in namespace"""
+        self._execute("DELETE FROM kv WHERE ns = ?", (namespace,))
+    
+    def next_id(self, namespace: str) -> int:
+        """Next value of a counter starting at 0"""
+        rows = self._execute(
+            "INSERT INTO counters (ns, value) VALUES (?, 0) "
+            "ON CONFLICT (ns) DO UPDATE SET value = value + 1 RETURNING value",
+            (namespace,)
+        )
+        return rows[0][0]
+    
+    def peek_id(self, namespace: str) -> int:
+        """Last value handed out by next_id (-1 if none)"""
+        rows = self._execute("SELECT value FROM counters WHERE ns = ?", (namespace,))
+        return rows[0][0] if rows else -1
+    
+    def history(
+        self,
+        namespace: str,
+        capacity: int,
+        indexes: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]
+    ) -> "SQLiteHistory":
+        """Indexed, capped history log (see SQLiteHistory)"""
+        return SQLiteHistory(self, namespace, capacity, indexes)
+    
+    def records(
+        self,
+        namespace: str,
+        indexes: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]
+    ) -> "SQLiteRecords":
+        """Indexed, updatable records (see SQLiteRecords)"""
+        return SQLiteRecords(self, namespace, indexes)
+    
+    def _query_indexed(
+        self,
+        table: str,
+        keys_table: str,
+        id_column: str,
+        namespace: str,
+        indexes: Dict[str, Any],
+        filters: Optional[Dict[str, Any]],
+        since: Optional[float],
+        until: Optional[float],
+        before: Optional[int],
+        limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Newest-first page of a (table, keys_table) pair
+        
+        Filtered queries walk the primary-key range of the first filter in
+        keys_table and check the others with EXISTS.
+        """
+        filters = [(name, str(key)) for name, key in (filters or {}).items() if key is not None]
+        for name, _ in filters:
+            if name not in indexes:
+                raise ValueError(f"Unknown index: {name}")
+        
+        if filters:
+            (name, key), rest = filters[0], filters[1:]
+            sql = (
+                f"SELECT h.value FROM {keys_table} k "
+                f"JOIN {table} h ON h.ns = k.ns AND h.{id_column} = k.{id_column} "
+                "WHERE k.ns = ? AND k.idx = ? AND k.key = ?"
+            )
+            params: List[Any] = [namespace, name, key]
+            order = f"k.{id_column}"
+        else:
+            rest = []
+            sql = f"SELECT h.value FROM {table} h WHERE h.ns = ?"
+            params = [namespace]
+            order = f"h.{id_column}"
+        for name, key in rest:
+            sql += (
+                f" AND EXISTS (SELECT 1 FROM {keys_table} x "
+                f"WHERE x.ns = h.ns AND x.idx = ? AND x.key = ? AND x.{id_column} = h.{id_column})"
+            )
+            params += [name, key]
+        if before is not None:
+            sql += f" AND {order} < ?"
+            params.append(before)
+        if since is not None:
+            sql += " AND h.ts >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND h.ts <= ?"
+            params.append(until)
+        sql += f" ORDER BY {order} DESC LIMIT ?"
+        params.append(limit + 1)
+        
+        items = [json.loads(value) for (value,) in self._execute(sql, tuple(params))]
+        if len(items) > limit:
+            return items[:limit], items[limit - 1][id_column]
+        return items, None
+
+
+class SQLiteHistory:
+    """
+    SQLiteStateStore counterpart of IndexedRingBuffer
+    
+    Entries live in the history table keyed by (namespace, seq); each
+    index key gets a row in history_keys, so filtered queries walk the
+    primary-key range of the first filter. Appending trims entries older
+    than capacity. Timestamps are kept in seq order like IndexedRingBuffer's.
+    """
+    
+    def __init__(
+        self,
+        store: SQLiteStateStore,
+        namespace: str,
+        capacity: int,
+        indexes: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]
+    ):
+        """
+        Initialize SQLiteHistory
+        
+        Args:
+            store: Store holding the tables
+            namespace: History name
+            capacity: Maximum entries kept
+            indexes: Index name -> function returning the keys an entry is filed under
+        """
+        self.store = store
+        self.namespace = namespace
+        self.capacity = capacity
+        self.indexes = indexes
+    
+    def __len__(self) -> int:
+        return self.store._execute(
+            "SELECT COUNT(*) FROM history WHERE ns = ?", (self.namespace,)
+        )[0][0]
+    
+    def append(self, entry: Dict[str, Any], timestamp: Optional[float] = None) -> int:
+        """Add an entry (gets a "seq" field), trimming the oldest beyond capacity"""
+        ns = self.namespace
+        with self.store._lock:
+            conn = self.store._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                last = conn.execute(
+                    "SELECT seq, ts FROM history WHERE ns = ? ORDER BY seq DESC LIMIT 1", (ns,)
+                ).fetchone()
+                seq = last[0] + 1 if last else 0
+                ts = time.time() if timestamp is None else timestamp
+                if last:
+                    # Keep timestamps in seq order, as IndexedRingBuffer does
+                    ts = max(ts, last[1])
+                entry["seq"] = seq
+                conn.execute(
+                    "INSERT INTO history (ns, seq, ts, value) VALUES (?, ?, ?, ?)",
+                    (ns, seq, ts, self.store._dump(entry))
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO history_keys (ns, idx, key, seq) VALUES (?, ?, ?, ?)",
+                    [
+                        (ns, name, str(key), seq)
+                        for name, keys_of in self.indexes.items()
+                        for key in keys_of(entry)
+                    ]
+                )
+                conn.execute("DELETE FROM history WHERE ns = ? AND seq <= ?", (ns, seq - self.capacity))
+                conn.execute("DELETE FROM history_keys WHERE ns = ? AND seq <= ?", (ns, seq - self.capacity))
+                conn.execute("COMMIT")
+                return seq
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Find entries, newest first; same arguments as IndexedRingBuffer.query"""
+        return self.store._query_indexed(
+            "history", "history_keys", "seq", self.namespace, self.indexes,
+            filters, since, until, before, limit
+        )
+    
+    def latest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest limit entries (all if None), oldest first"""
+        rows = self.store._execute(
+            "SELECT value FROM history WHERE ns = ? ORDER BY seq DESC LIMIT ?",
+            (self.namespace, -1 if limit is None else limit)
+        )
+        return [json.loads(value) for (value,) in reversed(rows)]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, capacity and stored bytes"""
+        size, stored = self.store._execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM history WHERE ns = ?",
+            (self.namespace,)
+        )[0]
+        keys = self.store._execute(
+            "SELECT idx, COUNT(DISTINCT key) FROM history_keys WHERE ns = ? GROUP BY idx",
+            (self.namespace,)
+        )
+        return {
+            "size": size,
+            "capacity": self.capacity,
+            "memory_bytes": stored,
+            "indexes": {name: 0 for name in self.indexes} | dict(keys),
+        }
+
+
+class SQLiteRecords:
+    """
+    SQLiteStateStore counterpart of IndexedRecords
+    
+    Records live in the records table keyed by (namespace, id), so get and
+    update are primary-key lookups; each index key gets a row in
+    record_keys, rewritten when an update changes it.
+    """
+    
+    def __init__(
+        self,
+        store: SQLiteStateStore,
+        namespace: str,
+        indexes: Dict[str, Callable[[Dict[str, Any]], Iterable[Any]]]
+    ):
+        """
+        Initialize SQLiteRecords
+        
+        Args:
+            store: Store holding the tables
+            namespace: Record set name
+            indexes: Index name -> function returning the keys a record is filed under
+        """
+        self.store = store
+        self.namespace = namespace
+        self.indexes = indexes
+    
+    def __len__(self) -> int:
+        return self.count()
+    
+    def _keys(self, record_id: int, record: Dict[str, Any]) -> List[tuple]:
+        return [
+            (self.namespace, name, str(key), record_id)
+            for name, keys_of in self.indexes.items()
+            for key in keys_of(record)
+        ]
+    
+    def add(self, record: Dict[str, Any], timestamp: Optional[float] = None) -> int:
+        """Store a new record (gets an "id" field); return its ID"""
+        ns = self.namespace
+        with self.store._lock:
+            conn = self.store._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                record_id = conn.execute(
+                    "SELECT COALESCE(MAX(id) + 1, 0) FROM records WHERE ns = ?", (ns,)
+                ).fetchone()[0]
+                record["id"] = record_id
+                conn.execute(
+                    "INSERT INTO records (ns, id, ts, value) VALUES (?, ?, ?, ?)",
+                    (ns, record_id, time.time() if timestamp is None else timestamp, self.store._dump(record))
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO record_keys (ns, idx, key, id) VALUES (?, ?, ?, ?)",
+                    self._keys(record_id, record)
+                )
+                conn.execute("COMMIT")
+                return record_id
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """Record with this ID, or None"""
+        rows = self.store._execute(
+            "SELECT value FROM records WHERE ns = ? AND id = ?", (self.namespace, record_id)
+        )
+        return json.loads(rows[0][0]) if rows else None
+    
+    def update(self, record_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge updates into a record and re-index it; return it, or None if missing"""
+        ns = self.namespace
+        with self.store._lock:
+            conn = self.store._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM records WHERE ns = ? AND id = ?", (ns, record_id)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                record = json.loads(row[0])
+                record.update(updates)
+                conn.execute(
+                    "UPDATE records SET value = ? WHERE ns = ? AND id = ?",
+                    (self.store._dump(record), ns, record_id)
+                )
+                conn.execute("DELETE FROM record_keys WHERE ns = ? AND id = ?", (ns, record_id))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO record_keys (ns, idx, key, id) VALUES (?, ?, ?, ?)",
+                    self._keys(record_id, record)
+                )
+                conn.execute("COMMIT")
+                return record
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def count(self, index: Optional[str] = None, key: Any = None) -> int:
+        """Number of records, or of records filed under key in index"""
+        if index is None:
+            rows = self.store._execute("SELECT COUNT(*) FROM records WHERE ns = ?", (self.namespace,))
+        else:
+            rows = self.store._execute(
+                "SELECT COUNT(*) FROM record_keys WHERE ns = ? AND idx = ? AND key = ?",
+                (self.namespace, index, str(key))
+            )
+        return rows[0][0]
+    
+    def counts(self, index: str) -> Dict[str, int]:
+        """Records per key of an index"""
+        rows = self.store._execute(
+            "SELECT key, COUNT(*) FROM record_keys WHERE ns = ? AND idx = ? GROUP BY key",
+            (self.namespace, index)
+        )
+        return dict(rows)
+    
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Find records, newest first; same arguments as IndexedRecords.query"""
+        return self.store._query_indexed(
+            "records", "record_keys", "id", self.namespace, self.indexes,
+            filters, since, until, before, limit
+        )
+
+
+def open_state_store(path: Optional[str]):
+    """SQLiteStateStore at path, or a LocalStateStore when path is empty"""
+    return SQLiteStateStore(path) if path else LocalStateStore()
+
+
+# Global state store instance
+state_store = open_state_store(settings.SHARED_STATE_PATH)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark the database engines selected by DATABASE_URL
+
+Usage:
+    python scripts/bench_database.py --ops 20000 --conversations 100
+
+Runs the same workloads against InMemoryDatabase ("memory://") and
+SQLiteDatabase (a fresh file per run) and reports operations per second:
+
+    add_message     messages spread over --conversations conversations
+    add_messages    the same, written in batches of 500 per conversation
+    get_messages    one read per conversation
+    executions      add_execution + update_execution + get_execution
+    async writes    add_message from --tasks coroutines, with the worst
+                    event-loop stall seen by a 1 ms ticker meanwhile
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from utils.database import open_database  # noqa: E402
+
+
+def timed(fn, count):
+    started = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - started)
+
+
+def bench_messages(db, ops, conversations):
+    conversation_ids = [f"bench_{i}" for i in range(conversations)]
+
+    def write():
+        for i in range(ops):
+            db.add_message(conversation_ids[i % conversations], {"role": "user", "content": f"message {i}"})
+        db.get_stats()  # wait for queued writes
+
+    def read():
+        for conversation_id in conversation_ids:
+            db.get_messages(conversation_id)
+
+    def write_bulk():
+        for start in range(0, ops, 500):
+            conversation_id = conversation_ids[(start // 500) % conversations]
+            db.add_messages(conversation_id, [
+                {"role": "user", "content": f"message {i}"} for i in range(start, min(start + 500, ops))
+            ])
+        db.get_stats()
+
+    return timed(write, ops), timed(read, conversations), timed(write_bulk, ops)
+
+
+def bench_executions(db, ops):
+    def run():
+        for i in range(ops):
+            execution_id = db.add_execution("Aelira", {"prompt": f"run {i}", "status": "pending"})
+            db.update_execution(execution_id, {"status": "completed"})
+            db.get_execution(execution_id)
+
+    return timed(run, ops)
+
+
+def bench_async(db, ops, tasks):
+    async def run():
+        stall = 0.0
+        done = False
+
+        async def ticker():
+            nonlocal stall
+            while not done:
+                before = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stall = max(stall, time.perf_counter() - before - 0.001)
+
+        async def writer(index):
+            for i in range(ops // tasks):
+                db.add_message(f"async_{index}", {"role": "user", "content": f"message {i}"})
+                await asyncio.sleep(0)
+            await db.call("get_messages", f"async_{index}")
+
+        tick = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*[writer(i) for i in range(tasks)])
+        elapsed = time.perf_counter() - started
+        done = True
+        await tick
+        return ops / elapsed, stall * 1000
+
+    return asyncio.run(run())
+
+
+def main(args):
+    print(f"ops: {args.ops}  conversations: {args.conversations}  async tasks: {args.tasks}")
+    print(f"{'engine':>8} {'add_message/s':>14} {'add_messages/s':>15} {'get_messages/s':>15} {'executions/s':>13} "
+          f"{'async writes/s':>15} {'max stall ms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = {"memory": "memory://", "sqlite": f"sqlite:///{os.path.join(tmp, 'bench.db')}"}
+        for engine in args.engines:
+            db = open_database(urls[engine])
+            try:
+                writes, reads, bulk_writes = bench_messages(db, args.ops, args.conversations)
+                executions = bench_executions(db, args.ops // 4)
+                async_writes, stall = bench_async(db, args.ops, args.tasks)
+            finally:
+                db.close()
+            print(f"{engine:>8} {writes:>14.0f} {bulk_writes:>15.0f} {reads:>15.0f} {executions:>13.0f} "
+                  f"{async_writes:>15.0f} {stall:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", default=["memory", "sqlite"], choices=["memory", "sqlite"])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /agents/run throughput against uvicorn worker count
+
+Usage:
+    python scripts/bench_workers.py --workers 1 2 4 --requests 2000 --concurrency 64
+
+For each worker count a server is started with a fresh SHARED_STATE_PATH
+and the simulation provider (1 ms fixed latency; cache, batching and
+provider concurrency caps off, so request handling rather than the model
+dominates). Before timing, an agent and an upgrade request are created
+through one request and every worker is checked to see them.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, port, state_path):
+    env = dict(
+        os.environ,
+        LLM_PROVIDER="simulation",
+        LLM_CACHE_ENABLED="false",
+        LLM_SIM_LATENCY_DISTRIBUTION="fixed",
+        LLM_SIM_LATENCY_MEDIAN_MS="1",
+        LLM_MAX_CONCURRENCY="1024",
+        LLM_BATCHING_ENABLED="false",
+        SHARED_STATE_PATH=state_path,
+        WEB_CONCURRENCY=str(workers),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def check_consistency(base_url, probes):
+    """Write through one connection, read back through many (spread across workers)"""
+    httpx.post(f"{base_url}/agents/register", params={"name": "BenchAgent"}).raise_for_status()
+    request = httpx.post(
+        f"{base_url}/agents/upgrade-request", json={"user": "bench", "proposal": "consistency probe"}
+    ).json()
+    missing = 0
+    for _ in range(probes):
+        # A new connection per probe so the kernel spreads them over workers
+        with httpx.Client() as client:
+            agents = client.get(f"{base_url}/agents/list").json()["agents"]
+            upgrades = client.get(f"{base_url}/agents/upgrade-requests").json()["upgrade_requests"]
+        if "BenchAgent" not in agents or request["id"] not in [u["id"] for u in upgrades]:
+            missing += 1
+    return missing
+
+
+def client_process(base_url, requests, concurrency, results):
+    async def run():
+        latencies = []
+        errors = 0
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            async def one(i):
+                nonlocal errors
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post("/agents/run", json={"prompt": f"bench {i}"})
+                    latencies.append(time.perf_counter() - started)
+                    errors += response.status_code != 200
+            await asyncio.gather(*[one(i) for i in range(requests)])
+        return latencies, errors
+
+    try:
+        results.put(asyncio.run(run()))
+    except Exception as e:
+        print(f"client failed: {e}")
+        results.put(([], requests))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def bench(workers, args):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(workers, port, os.path.join(tmp, "state.db"))
+        try:
+            wait_ready(base_url)
+            missing = check_consistency(base_url, args.probes)
+
+            results = multiprocessing.Queue()
+            clients = [
+                multiprocessing.Process(
+                    target=client_process,
+                    args=(base_url, args.requests // args.clients, args.concurrency // args.clients, results)
+                )
+                for _ in range(args.clients)
+            ]
+            started = time.perf_counter()
+            for client in clients:
+                client.start()
+            outcomes = [results.get() for _ in clients]
+            elapsed = time.perf_counter() - started
+            for client in clients:
+                client.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies = [latency for outcome in outcomes for latency in outcome[0]]
+    errors = sum(outcome[1] for outcome in outcomes)
+    return {
+        "workers": workers,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "errors": errors,
+        "inconsistent": missing,
+    }
+
+
+def main(args):
+    print(f"requests: {args.requests}  concurrency: {args.concurrency}  client processes: {args.clients}")
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'inconsistent':>13}")
+    baseline = None
+    for workers in args.workers:
+        row = bench(workers, args)
+        baseline = baseline or row["throughput"]
+        print(
+            f"{row['workers']:>8} {row['throughput']:>10.1f} {row['p50']:>9.1f} {row['p99']:>9.1f} "
+            f"{row['errors']:>7} {row['inconsistent']:>13}   x{row['throughput'] / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=2, help="client processes generating load")
+    parser.add_argument("--probes", type=int, default=20, help="reads used for the consistency check")
+    main(parser.parse_args())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Load test ParentController.run_agents against the simulation provider
+
+Usage:
+    python scripts/loadtest.py --requests 500 --concurrency 50
+
+Latency, error and timeout behaviour come from the LLM_SIM_* settings,
+e.g. LLM_SIM_LATENCY_DISTRIBUTION=percentiles LLM_SIM_ERROR_RATE=0.02
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("LLM_PROVIDER", "simulation")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from agents.parent_controller import ParentController, BaseAgent  # noqa: E402
+from tools.llm_provider import llm_provider  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+async def main(args):
+    controller = ParentController()
+    for name in ["Aelira", "Zyra", "Xyron", "Orryn"][:args.agents]:
+        await controller.register_agent(name, BaseAgent(name, llm=llm_provider))
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failed_results = 0
+
+    async def one(i):
+        nonlocal failed_results
+        async with semaphore:
+            started = time.perf_counter()
+            results = await controller.run_agents(f"load test request {i}", {})
+            latencies.append(time.perf_counter() - started)
+            failed_results += sum(1 for r in results if "error" in r)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(args.requests)])
+    elapsed = time.perf_counter() - started
+
+    print(f"requests:      {args.requests} ({args.agents} agents each)")
+    print(f"concurrency:   {args.concurrency}")
+    print(f"elapsed:       {elapsed:.2f}s")
+    print(f"throughput:    {args.requests / elapsed:.1f} req/s")
+    for pct in (50, 90, 95, 99):
+        print(f"p{pct}:           {percentile(latencies, pct) * 1000:.1f} ms")
+    print(f"failed agents: {failed_results}")
+    print(f"simulator:     {llm_provider.simulator.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--agents", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,8 @@
+"""
+Shared test setup: backend modules import relative to the backend directory
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
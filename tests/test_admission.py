@@ -0,0 +1,122 @@
+"""
+Admission control: load shedding, exempt paths and trusted priority
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.admission import AdmissionController, AdmissionMiddleware
+
+
+def _client(controller: AdmissionController) -> TestClient:
+    app = FastAPI()
+    
+    @app.get("/agents/run")
+    async def run():
+        return {"ok": True}
+    
+    @app.get("/agents/history")
+    async def history():
+        return {"ok": True}
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+    
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return TestClient(app)
+
+
+@pytest.fixture
+def controller():
+    return AdmissionController(
+        retry_after=3,
+        paths=("/agents",),
+        exempt_paths=("/health",),
+        low_priority_paths=("/agents/history",),
+        priority_token="secret"
+    )
+
+
+class TestShedding:
+    def test_overload_returns_503_with_retry_after(self, controller):
+        controller.loop_lag = 1.0
+        response = _client(controller).get("/agents/run")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        assert controller.get_stats()["shed"]["normal"] == 1
+    
+    def test_health_stays_exempt(self, controller):
+        controller.loop_lag = 1.0
+        
+        assert _client(controller).get("/health").status_code == 200
+        assert controller.get_stats()["total_shed"] == 0
+    
+    def test_busy_sheds_only_low_priority(self, controller):
+        controller.loop_lag = controller.soft_loop_lag
+        client = _client(controller)
+        
+        assert client.get("/agents/run").status_code == 200
+        assert client.get("/agents/history").status_code == 503
+        assert client.get("/agents/run", headers={"X-Priority": "low"}).status_code == 503
+    
+    def test_admitted_requests_are_released(self, controller):
+        client = _client(controller)
+        for _ in range(3):
+            client.get("/agents/run")
+        
+        assert controller.in_flight == 0
+        assert controller.get_stats()["total_accepted"] == 3
+
+
+class TestPriority:
+    def test_high_priority_needs_the_token(self, controller):
+        controller.loop_lag = 1.0
+        client = _client(controller)
+        
+        assert client.get("/agents/run", headers={"X-Priority": "high"}).status_code == 503
+        wrong = {"X-Priority": "high", "X-Priority-Token": "guess"}
+        assert client.get("/agents/run", headers=wrong).status_code == 503
+        trusted = {"X-Priority": "high", "X-Priority-Token": "secret"}
+        assert client.get("/agents/run", headers=trusted).status_code == 200
+    
+    def test_no_token_configured_never_trusts(self):
+        controller = AdmissionController()
+        
+        assert controller.priority("/agents/run", "high", "") == "normal"
+        assert controller.priority("/agents/run", "high", None) == "normal"
+
+
+class TestLagMonitor:
+    def test_requests_do_not_start_the_monitor(self, controller):
+        _client(controller).get("/agents/run")
+        
+        assert controller._monitor is None
+    
+    def test_startup_and_shutdown(self, controller):
+        controller.lag_interval = 0.01
+        
+        async def run():
+            await controller.startup()
+            monitor = controller._monitor
+            await asyncio.sleep(0.05)
+            await controller.shutdown()
+            return monitor
+        monitor = asyncio.run(run())
+        
+        assert monitor.done()
+        assert controller._monitor is None
+    
+    def test_application_hooks_start_and_stop_it(self):
+        import main
+        from api.admission import admission_controller
+        
+        with TestClient(main.app):
+            running = admission_controller._monitor is not None and not admission_controller._monitor.done()
+        
+        assert running == main.settings.ADMISSION_ENABLED
+        assert admission_controller._monitor is None
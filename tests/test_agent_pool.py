@@ -0,0 +1,178 @@
+"""
+AgentPool: leasing, scale-up, queueing and idle scale-down
+"""
+
+import asyncio
+import types
+
+import pytest
+
+from agents import agent_pool
+from agents.agent_pool import AgentPool
+from agents.parent_controller import BaseAgent, ParentController
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore
+
+
+class GatedAgent(BaseAgent):
+    """Agent that runs until its gate opens, remembering the last prompt it served"""
+    
+    def __init__(self, name, gate):
+        super().__init__(name)
+        self.gate = gate
+        self.seen = None
+    
+    async def run(self, prompt, context, deadline=None):
+        self.seen = prompt
+        await self.gate.wait()
+        return self._build_result(prompt, context)
+
+
+async def _hold(pool: AgentPool, count: int):
+    """Lease count instances and keep them until the returned event is set"""
+    leased, release = [], asyncio.Event()
+    ready = asyncio.Event()
+    
+    async def hold():
+        async with pool.lease() as agent:
+            leased.append(agent)
+            if len(leased) == count:
+                ready.set()
+            await release.wait()
+    
+    tasks = [asyncio.ensure_future(hold()) for _ in range(count)]
+    await ready.wait()
+    return leased, release, tasks
+
+
+class TestLease:
+    def test_idle_instance_is_reused(self):
+        pool = AgentPool(BaseAgent("A"), max_size=3)
+        
+        async def run():
+            async with pool.lease() as first:
+                pass
+            async with pool.lease() as second:
+                pass
+            return first, second
+        first, second = asyncio.run(run())
+        
+        assert first is second is pool.prototype
+        assert pool.get_stats()["size"] == 1
+        assert pool.get_stats()["leases"] == 2
+    
+    def test_least_used_idle_instance_is_picked(self):
+        pool = AgentPool(BaseAgent("A"), min_size=2, max_size=2)
+        
+        async def run():
+            picked = []
+            for _ in range(4):
+                async with pool.lease() as agent:
+                    picked.append(agent)
+            return picked
+        picked = asyncio.run(run())
+        
+        assert picked[0] is picked[2]
+        assert picked[1] is picked[3]
+        assert picked[0] is not picked[1]
+        assert [i["runs"] for i in pool.get_stats()["instances"]] == [2, 2]
+
+
+class TestScaling:
+    def test_busy_pool_clones_up_to_max_size(self):
+        pool = AgentPool(BaseAgent("A"), max_size=3)
+        
+        async def run():
+            leased, release, tasks = await _hold(pool, 3)
+            stats = pool.get_stats()
+            release.set()
+            await asyncio.gather(*tasks)
+            return leased, stats
+        leased, stats = asyncio.run(run())
+        
+        assert len({id(agent) for agent in leased}) == 3
+        assert (stats["size"], stats["busy"], stats["scale_ups"]) == (3, 3, 2)
+        assert stats["utilization"] == 1.0
+        assert pool.busy == 0
+    
+    def test_full_pool_queues_and_hands_over(self):
+        pool = AgentPool(BaseAgent("A"), max_size=1)
+        
+        async def run():
+            leased, release, tasks = await _hold(pool, 1)
+            waiter = asyncio.ensure_future(pool._acquire(None))
+            await asyncio.sleep(0)
+            waiting = pool.waiting
+            release.set()
+            instance = await asyncio.wait_for(waiter, 1)
+            await asyncio.gather(*tasks)
+            return leased[0], instance, waiting
+        held, instance, waiting = asyncio.run(run())
+        
+        assert waiting == 1
+        assert instance.agent is held
+        # Handed straight to the waiter, so it never went idle
+        assert instance.busy
+        assert pool.get_stats()["queued_leases"] == 1
+    
+    def test_queued_lease_times_out(self):
+        pool = AgentPool(BaseAgent("A"), max_size=1)
+        
+        async def run():
+            _, release, tasks = await _hold(pool, 1)
+            with pytest.raises(asyncio.TimeoutError):
+                async with pool.lease(timeout=0.02):
+                    pass
+            waiting = pool.waiting
+            release.set()
+            await asyncio.gather(*tasks)
+            return waiting
+        waiting = asyncio.run(run())
+        
+        assert waiting == 0
+        assert pool.busy == 0
+    
+    def test_idle_clones_are_dropped(self, monkeypatch):
+        now = types.SimpleNamespace(value=1000.0)
+        monkeypatch.setattr(agent_pool, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+        pool = AgentPool(BaseAgent("A"), min_size=1, max_size=3, idle_timeout=60)
+        
+        async def run():
+            _, release, tasks = await _hold(pool, 3)
+            release.set()
+            await asyncio.gather(*tasks)
+        asyncio.run(run())
+        now.value += 61
+        
+        async def lease_once():
+            async with pool.lease() as agent:
+                return agent
+        agent = asyncio.run(lease_once())
+        
+        assert agent is pool.prototype
+        stats = pool.get_stats()
+        assert (stats["size"], stats["scale_downs"], stats["peak_size"]) == (1, 2, 3)
+
+
+class TestControllerPools:
+    def test_concurrent_runs_get_their_own_instances(self):
+        state = LocalStateStore()
+        controller = ParentController(state=state, database=InMemoryDatabase(state))
+        
+        async def run():
+            gate = asyncio.Event()
+            await controller.register_agent("G", GatedAgent("G", gate), max_instances=2)
+            runs = [
+                asyncio.ensure_future(controller.run_agents(prompt, {}, ["G"]))
+                for prompt in ("one", "two")
+            ]
+            await asyncio.sleep(0.02)
+            seen = sorted(i.agent.seen for i in controller.pools["G"]._instances)
+            gate.set()
+            results = await asyncio.gather(*runs)
+            return seen, results
+        seen, results = asyncio.run(run())
+        
+        assert seen == ["one", "two"]
+        assert [r[0]["prompt"] for r in results] == ["one", "two"]
+        assert controller.pools["G"].get_stats()["scale_ups"] == 1
@@ -0,0 +1,131 @@
+"""
+Versioned agent status: ETags, 304s, since-deltas and coalesced run-state versions
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.parent_controller import BaseAgent, ParentController
+from api.endpoints import agents as agents_endpoint
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore
+
+
+def _controller(publish_interval: float) -> ParentController:
+    return ParentController(
+        publish_interval=publish_interval,
+        state=LocalStateStore(),
+        database=InMemoryDatabase(LocalStateStore())
+    )
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = _controller(publish_interval=60)
+    monkeypatch.setattr(agents_endpoint, "parent_controller", controller)
+    return controller
+
+
+@pytest.fixture
+def client(controller):
+    app = FastAPI()
+    app.include_router(agents_endpoint.router)
+    with TestClient(app) as client:
+        yield client
+
+
+class TestETag:
+    def test_matching_etag_gets_304(self, client, controller):
+        asyncio.run(controller.register_agent("X", BaseAgent("X")))
+        first = client.get("/agents/status")
+        again = client.get("/agents/status", headers={"If-None-Match": first.headers["ETag"]})
+        
+        assert first.status_code == 200
+        assert again.status_code == 304
+        assert again.headers["ETag"] == first.headers["ETag"]
+    
+    def test_registration_changes_the_etag_at_once(self, client, controller):
+        etag = client.get("/agents/status").headers["ETag"]
+        asyncio.run(controller.register_agent("X", BaseAgent("X")))
+        response = client.get("/agents/status", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert list(response.json()["agents"]) == ["X"]
+    
+    def test_runs_do_not_change_the_etag_within_the_interval(self, client, controller):
+        asyncio.run(controller.register_agent("X", BaseAgent("X")))
+        asyncio.run(controller.run_agents("p", {}))
+        etag = client.get("/agents/status").headers["ETag"]
+        for _ in range(3):
+            asyncio.run(controller.run_agents("p", {}))
+        
+        assert client.get("/agents/status", headers={"If-None-Match": etag}).status_code == 304
+    
+    def test_since_returns_a_delta(self, client, controller):
+        asyncio.run(controller.register_agent("X", BaseAgent("X")))
+        version = client.get("/agents/status").json()["version"]
+        asyncio.run(controller.register_agent("Y", BaseAgent("Y")))
+        delta = client.get(f"/agents/status?since={version}").json()
+        
+        assert delta["full"] is False
+        assert list(delta["agents"]) == ["Y"]
+        assert delta["total_agents"] == 2
+
+
+class TestRunStateVersions:
+    def test_run_state_is_published_after_the_interval(self):
+        controller = _controller(publish_interval=0.05)
+        
+        async def run():
+            await controller.register_agent("X", BaseAgent("X"))
+            await controller.register_agent("Y", BaseAgent("Y"))
+            await controller.run_agents("p", {}, ["X", "Y"])
+            # The first change after a quiet period is published at once
+            version = controller.get_snapshot()["version"]
+            await controller.run_agents("p", {}, ["X"])
+            hidden = controller.get_delta(version)
+            await asyncio.sleep(0.06)
+            return version, hidden, controller.get_delta(version)
+        version, hidden, delta = asyncio.run(run())
+        
+        assert hidden["version"] == version
+        assert delta["version"] == version + 1
+        assert list(delta["agents"]) == ["X"]
+        assert delta["agents"]["X"]["last_result"]["status"] == "success"
+        assert delta["execution_history_size"] == 2
+    
+    def test_many_runs_make_one_version(self):
+        controller = _controller(publish_interval=0.2)
+        
+        async def run():
+            await controller.register_agent("X", BaseAgent("X"))
+            controller.get_snapshot()
+            start = controller.version
+            deadline = time.monotonic() + 0.15
+            while time.monotonic() < deadline:
+                await controller.run_agents("p", {})
+                controller.get_snapshot()
+            return start, controller.version
+        start, end = asyncio.run(run())
+        
+        assert end - start <= 1
+    
+    def test_unregister_and_stale_since(self):
+        controller = _controller(publish_interval=0)
+        
+        async def run():
+            await controller.register_agent("X", BaseAgent("X"))
+            await controller.register_agent("Y", BaseAgent("Y"))
+            version = controller.get_snapshot()["version"]
+            await controller.unregister_agent("Y")
+            return version, controller.get_delta(version), controller.get_delta(version + 100)
+        version, delta, stale = asyncio.run(run())
+        
+        assert delta["removed_agents"] == ["Y"]
+        assert delta["agents"] == {}
+        assert stale["full"] is True
+        assert list(stale["agents"]) == ["X"]
@@ -0,0 +1,86 @@
+"""
+Prompt grouping in BatchScheduler
+"""
+
+import asyncio
+
+import pytest
+
+from tools.batch_scheduler import BatchScheduler
+
+
+class _Recorder:
+    """Batch function recording the prompts of each call"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def __call__(self, provider, prompts, **options):
+        self.calls.append((provider, list(prompts), options))
+        return [{"provider": provider, "prompt": prompt} for prompt in prompts]
+
+
+def _submit_all(scheduler, requests):
+    async def run():
+        return await asyncio.gather(*[
+            scheduler.submit(provider, prompt, options) for provider, prompt, options in requests
+        ])
+    return asyncio.run(run())
+
+
+class TestBatchScheduler:
+    def test_concurrent_prompts_share_a_batch(self):
+        recorder = _Recorder()
+        scheduler = BatchScheduler(recorder, max_batch_size=8, max_wait=0.01)
+        results = _submit_all(scheduler, [("demo_mode", f"p{i}", {}) for i in range(3)])
+        
+        assert [result["prompt"] for result in results] == ["p0", "p1", "p2"]
+        assert recorder.calls == [("demo_mode", ["p0", "p1", "p2"], {})]
+        assert scheduler.get_stats()["largest_batch"] == 3
+    
+    def test_full_batch_flushes_at_max_size(self):
+        recorder = _Recorder()
+        scheduler = BatchScheduler(recorder, max_batch_size=2, max_wait=10)
+        _submit_all(scheduler, [("demo_mode", f"p{i}", {}) for i in range(4)])
+        
+        assert [prompts for _, prompts, _ in recorder.calls] == [["p0", "p1"], ["p2", "p3"]]
+    
+    def test_groups_by_provider_and_options(self):
+        recorder = _Recorder()
+        scheduler = BatchScheduler(recorder, max_batch_size=8, max_wait=0.01)
+        _submit_all(scheduler, [
+            ("demo_mode", "a", {"temperature": 0.1}),
+            ("demo_mode", "b", {"temperature": 0.9}),
+            ("simulation", "c", {"temperature": 0.1}),
+            ("demo_mode", "d", {"temperature": 0.1}),
+        ])
+        
+        groups = sorted((provider, prompts, options["temperature"]) for provider, prompts, options in recorder.calls)
+        assert groups == [
+            ("demo_mode", ["a", "d"], 0.1),
+            ("demo_mode", ["b"], 0.9),
+            ("simulation", ["c"], 0.1),
+        ]
+    
+    def test_batch_error_reaches_every_caller(self):
+        async def fail(provider, prompts, **options):
+            raise RuntimeError("backend down")
+        scheduler = BatchScheduler(fail, max_batch_size=8, max_wait=0.01)
+        
+        async def run():
+            return await asyncio.gather(
+                scheduler.submit("demo_mode", "a", {}),
+                scheduler.submit("demo_mode", "b", {}),
+                return_exceptions=True
+            )
+        errors = asyncio.run(run())
+        
+        assert [str(error) for error in errors] == ["backend down", "backend down"]
+    
+    def test_short_result_list_is_an_error(self):
+        async def short(provider, prompts, **options):
+            return []
+        scheduler = BatchScheduler(short, max_batch_size=1, max_wait=0.01)
+        
+        with pytest.raises(RuntimeError):
+            _submit_all(scheduler, [("demo_mode", "a", {})])
@@ -0,0 +1,160 @@
+"""
+Conversation retention (truncate, summarize) and spilling idle conversations to disk
+"""
+
+import asyncio
+
+from agents.parent_controller import BaseAgent, ParentController
+from models import AgentProfile
+from utils.conversation_memory import RetentionPolicy
+from utils.database import InMemoryDatabase, SQLiteDatabase
+from utils.shared_state import LocalStateStore
+
+
+def _add(db, conversation_id, count, start=0):
+    return [db.add_message(conversation_id, {"role": "user", "content": f"m{i}"}) for i in range(start, start + count)]
+
+
+def _contents(db, conversation_id):
+    return [message["content"] for message in db.get_messages(conversation_id)]
+
+
+def _profile(agent_id: str, capacity: int) -> AgentProfile:
+    return AgentProfile(
+        id=agent_id, name=agent_id.title(), title="Tester", color="#000000", emoji="*",
+        personality="terse", traits=["terse"], memory_capacity=capacity
+    )
+
+
+class TestRetention:
+    def test_no_limit_by_default(self):
+        db = InMemoryDatabase(LocalStateStore())
+        conversation_id = db.create_conversation("u", "aelira")
+        _add(db, conversation_id, 150)
+        
+        assert len(db.get_messages(conversation_id)) == 150
+        assert db.get_stats()["retained_out"] == 0
+    
+    def test_truncate_drops_oldest(self):
+        db = InMemoryDatabase(LocalStateStore(), retention=RetentionPolicy(capacity=3))
+        conversation_id = db.create_conversation("u", "aelira")
+        _add(db, conversation_id, 5)
+        
+        assert _contents(db, conversation_id) == ["m2", "m3", "m4"]
+        assert db.get_stats()["retained_out"] == 2
+    
+    def test_summarize_folds_oldest_into_one_message(self):
+        db = InMemoryDatabase(LocalStateStore(), retention=RetentionPolicy(capacity=3, policy="summarize"))
+        conversation_id = db.create_conversation("u", "aelira")
+        _add(db, conversation_id, 6)
+        messages = db.get_messages(conversation_id)
+        
+        assert len(messages) == 3
+        assert messages[0]["type"] == "summary"
+        assert messages[0]["summarized_messages"] == 4
+        assert "m0" in messages[0]["content"] and "m3" in messages[0]["content"]
+        assert [message["content"] for message in messages[1:]] == ["m4", "m5"]
+    
+    def test_summary_keeps_id_cursors_valid(self):
+        db = InMemoryDatabase(LocalStateStore(), retention=RetentionPolicy(capacity=3, policy="summarize"))
+        conversation_id = db.create_conversation("u", "aelira")
+        ids = _add(db, conversation_id, 6)
+        
+        assert [m["content"] for m in db.get_messages(conversation_id, after=ids[3])] == ["m4", "m5"]
+    
+    def test_conversation_capacity_overrides_default(self):
+        db = InMemoryDatabase(LocalStateStore(), retention=RetentionPolicy(capacity=10))
+        conversation_id = db.create_conversation("u", "aelira", memory_capacity=2)
+        _add(db, conversation_id, 4)
+        
+        assert _contents(db, conversation_id) == ["m2", "m3"]
+    
+    def test_registered_profile_capacity_applies(self):
+        db = InMemoryDatabase(LocalStateStore())
+        controller = ParentController(database=db)
+        asyncio.run(controller.register_agent("Aelira", BaseAgent("Aelira"), profile=_profile("aelira", 2)))
+        by_id = db.create_conversation("u", "aelira")
+        by_name = db.create_conversation("u", "Aelira")
+        other = db.create_conversation("u", "zyra")
+        for conversation_id in (by_id, by_name, other):
+            _add(db, conversation_id, 4)
+        
+        assert _contents(db, by_id) == ["m2", "m3"]
+        assert _contents(db, by_name) == ["m2", "m3"]
+        assert len(db.get_messages(other)) == 4
+        controller.shutdown()
+    
+    def test_sqlite_truncate(self, tmp_path):
+        db = SQLiteDatabase(str(tmp_path / "app.db"), retention=RetentionPolicy(capacity=3))
+        try:
+            conversation_id = db.create_conversation("u", "aelira")
+            _add(db, conversation_id, 5)
+            
+            assert _contents(db, conversation_id) == ["m2", "m3", "m4"]
+        finally:
+            db.close()
+
+
+class TestSpill:
+    def _db(self, tmp_path, resident=10):
+        return InMemoryDatabase(LocalStateStore(), max_resident_messages=resident, spill_path=str(tmp_path))
+    
+    def test_idle_conversations_spill_and_reload(self, tmp_path):
+        db = self._db(tmp_path)
+        first, second = db.create_conversation("u", "a"), db.create_conversation("u", "b")
+        _add(db, first, 6)
+        _add(db, second, 6)
+        
+        stats = db.get_stats()
+        assert stats["spilled_conversations"] == 1
+        assert stats["spilled_messages"] == 6
+        assert stats["resident_messages"] == 6
+        assert stats["total_messages"] == 12
+        
+        assert _contents(db, first) == [f"m{i}" for i in range(6)]
+        stats = db.get_stats()
+        assert stats["reloads"] == 1
+        assert stats["spills"] == 2
+        assert stats["resident_conversations"] == 1
+        db.close()
+    
+    def test_cleared_conversation_leaves_the_spill(self, tmp_path):
+        db = self._db(tmp_path)
+        first, second = db.create_conversation("u", "a"), db.create_conversation("u", "b")
+        _add(db, first, 6)
+        _add(db, second, 6)
+        
+        assert db.clear_messages(first)
+        assert db.get_stats()["spilled_messages"] == 0
+        assert db.get_messages(first) == []
+        db.close()
+    
+    def test_call_spills_and_reloads_off_the_loop(self, tmp_path):
+        db = self._db(tmp_path)
+        
+        async def run():
+            first = await db.call("create_conversation", "u", "a")
+            second = await db.call("create_conversation", "u", "b")
+            await db.call("add_messages", first, [{"content": f"a{i}"} for i in range(6)])
+            await db.call("add_messages", second, [{"content": f"b{i}"} for i in range(6)])
+            spilled = db.get_stats()
+            messages = await db.call("get_messages", first)
+            return spilled, messages
+        spilled, messages = asyncio.run(run())
+        
+        assert spilled["spilled_messages"] == 6
+        assert spilled["spills"] == 1
+        assert [message["content"] for message in messages] == [f"a{i}" for i in range(6)]
+        stats = db.get_stats()
+        assert stats["reloads"] == 1
+        assert stats["total_messages"] == 12
+        db.close()
+    
+    def test_close_removes_spill_files(self, tmp_path):
+        db = self._db(tmp_path, resident=2)
+        for agent in ("a", "b", "c"):
+            _add(db, db.create_conversation("u", agent), 2)
+        assert any(tmp_path.iterdir())
+        
+        db.close()
+        assert not any(tmp_path.iterdir())
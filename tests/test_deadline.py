@@ -0,0 +1,124 @@
+"""
+Request deadlines: budget arithmetic and propagation from the API down to the LLM provider
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from agents.parent_controller import BaseAgent, ParentController
+from api.endpoints import agents as agents_endpoint
+from tools.llm_provider import LLMProvider
+from utils.database import InMemoryDatabase
+from utils.deadline import Deadline
+from utils.exceptions import DeadlineExceededError
+from utils.shared_state import LocalStateStore
+
+
+def _controller() -> ParentController:
+    return ParentController(state=LocalStateStore(), database=InMemoryDatabase(LocalStateStore()))
+
+
+def _slow_llm(log, delay=5):
+    """Demo LLMProvider whose provider call sleeps, logging whether it was cancelled"""
+    provider = LLMProvider({})
+    
+    async def call(name, prompt, **options):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append("cancelled")
+            raise
+        log.append("done")
+        return {"text": prompt, "provider": name, "metadata": {}}
+    provider._call_provider = call
+    return provider
+
+
+class TestDeadline:
+    def test_no_deadline(self):
+        deadline = Deadline.after(None)
+        
+        assert deadline.remaining() is None
+        assert not deadline.expired()
+        assert deadline.cap(5) == 5
+        deadline.check()
+    
+    def test_cap_takes_the_smaller_budget(self):
+        deadline = Deadline.after(10)
+        
+        assert deadline.cap(1) == 1
+        assert 9 < deadline.cap(60) <= 10
+        assert 9 < deadline.cap(None) <= 10
+    
+    def test_expired(self):
+        deadline = Deadline(time.monotonic() - 1)
+        
+        assert deadline.remaining() == 0.0
+        with pytest.raises(DeadlineExceededError, match="LLM generation deadline exceeded"):
+            deadline.check("LLM generation")
+    
+    def test_request_timeout_is_capped(self):
+        request = agents_endpoint.AgentRequest(prompt="p", timeout=10 ** 6)
+        deadline = agents_endpoint._request_deadline(request)
+        
+        assert deadline.remaining() <= agents_endpoint.settings.REQUEST_TIMEOUT
+
+
+class TestPropagation:
+    def test_agents_share_the_request_deadline(self):
+        controller = _controller()
+        llm = LLMProvider({})
+        seen = []
+        real = llm.generate
+        
+        async def generate(prompt, **options):
+            seen.append(options.get("deadline"))
+            return await real(prompt, **options)
+        llm.generate = generate
+        deadline = Deadline.after(30)
+        
+        async def run():
+            await controller.register_agent("A", BaseAgent("A", llm))
+            await controller.register_agent("B", BaseAgent("B", llm))
+            return await controller.run_agents("p", {}, deadline=deadline)
+        results = asyncio.run(run())
+        
+        assert [r["status"] for r in results] == ["success", "success"]
+        assert seen == [deadline, deadline]
+    
+    def test_deadline_cancels_the_provider_call(self):
+        controller = _controller()
+        log = []
+        llm = _slow_llm(log)
+        
+        async def run():
+            await controller.register_agent("A", BaseAgent("A", llm))
+            started = time.monotonic()
+            results = await controller.run_agents("p", {}, deadline=Deadline.after(0.05))
+            await asyncio.sleep(0)
+            return results, time.monotonic() - started, list(log)
+        results, elapsed, log = asyncio.run(run())
+        
+        assert results[0]["status"] == "timeout"
+        assert elapsed < 1
+        assert log == ["cancelled"]
+    
+    def test_expired_deadline_skips_the_provider(self):
+        log = []
+        llm = _slow_llm(log)
+        
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(llm.generate("p", deadline=Deadline(time.monotonic() - 1)))
+        assert log == []
+    
+    def test_agent_reports_an_exceeded_deadline_as_timeout(self):
+        log = []
+        agent = BaseAgent("A", _slow_llm(log))
+        
+        result = asyncio.run(agent.run("p", {}, Deadline.after(0.05)))
+        
+        assert result["status"] == "timeout"
+        assert result["timed_out"] is True
+        assert agent.status == "idle"
@@ -0,0 +1,184 @@
+"""
+ExecutionQueue: background runs, long-poll waits and cancellation
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.execution_queue import ExecutionQueue
+from agents.parent_controller import BaseAgent, ParentController
+from api.endpoints import agents as agents_endpoint
+from utils.database import InMemoryDatabase
+from utils.exceptions import NotFoundError, RateLimitError
+from utils.shared_state import LocalStateStore
+
+
+class GatedAgent(BaseAgent):
+    """Agent that runs until its gate opens, logging cancellations"""
+    
+    def __init__(self, name, gate, log):
+        super().__init__(name)
+        self.gate = gate
+        self.log = log
+    
+    async def run(self, prompt, context, deadline=None):
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.log.append(prompt)
+            raise
+        return self._build_result(prompt, context)
+
+
+async def _queue(workers=1, max_queued=10, **kwargs):
+    """Started queue over an isolated controller with one gated agent"""
+    state = LocalStateStore()
+    controller = ParentController(state=state, database=InMemoryDatabase(state))
+    gate, log = asyncio.Event(), []
+    await controller.register_agent("G", GatedAgent("G", gate, log))
+    queue = ExecutionQueue(controller, InMemoryDatabase(state), workers=workers, max_queued=max_queued, **kwargs)
+    await queue.startup()
+    return queue, gate, log
+
+
+class TestLongPoll:
+    def test_wait_returns_when_the_run_finishes(self):
+        async def run():
+            queue, gate, _ = await _queue()
+            execution = dict(await queue.submit("p", {}))
+            asyncio.get_running_loop().call_later(0.05, gate.set)
+            started = time.monotonic()
+            finished = await queue.wait(execution["id"], 5)
+            elapsed = time.monotonic() - started
+            await queue.shutdown()
+            return execution, finished, elapsed
+        execution, finished, elapsed = asyncio.run(run())
+        
+        assert execution["status"] == "pending"
+        assert finished["status"] == "completed"
+        assert finished["results"][0]["agent"] == "G"
+        assert elapsed < 1
+    
+    def test_wait_times_out_with_the_current_record(self):
+        async def run():
+            queue, _, _ = await _queue()
+            execution = await queue.submit("p", {})
+            record = dict(await queue.wait(execution["id"], 0.05))
+            await queue.shutdown()
+            return record
+        record = asyncio.run(run())
+        
+        assert record["status"] == "running"
+    
+    def test_wait_polls_executions_of_other_workers(self):
+        async def run():
+            queue, gate, _ = await _queue()
+            other = ExecutionQueue(queue.controller, queue.db, poll_interval=0.01)
+            execution = await queue.submit("p", {})
+            asyncio.get_running_loop().call_later(0.05, gate.set)
+            record = await other.wait(execution["id"], 5)
+            await queue.shutdown()
+            return record
+        record = asyncio.run(run())
+        
+        assert record["status"] == "completed"
+    
+    def test_unknown_execution(self):
+        async def run():
+            queue, _, _ = await _queue()
+            try:
+                with pytest.raises(NotFoundError):
+                    await queue.wait("exec_missing", 0.01)
+            finally:
+                await queue.shutdown()
+        asyncio.run(run())
+
+
+class TestCancel:
+    def test_cancel_running_execution(self):
+        async def run():
+            queue, gate, log = await _queue()
+            first = await queue.submit("first", {})
+            second = await queue.submit("second", {})
+            await asyncio.sleep(0.02)
+            await queue.cancel(first["id"])
+            cancelled = await queue.wait(first["id"], 1)
+            gate.set()
+            finished = await queue.wait(second["id"], 1)
+            await queue.shutdown()
+            return cancelled, finished, log, queue.get_stats()
+        cancelled, finished, log, stats = asyncio.run(run())
+        
+        assert cancelled["status"] == "cancelled"
+        assert log == ["first"]
+        # The worker goes on to the next execution
+        assert finished["status"] == "completed"
+        assert (stats["cancelled"], stats["completed"]) == (1, 1)
+    
+    def test_cancel_queued_execution(self):
+        async def run():
+            queue, gate, log = await _queue()
+            await queue.submit("first", {})
+            queued = await queue.submit("queued", {})
+            await asyncio.sleep(0.02)
+            cancelled = await queue.cancel(queued["id"])
+            gate.set()
+            await asyncio.sleep(0.05)
+            record = await queue.get(queued["id"])
+            await queue.shutdown()
+            return cancelled, record, log
+        cancelled, record, log = asyncio.run(run())
+        
+        assert cancelled["status"] == "cancelled"
+        assert record["status"] == "cancelled"
+        assert "results" not in record or not record["results"]
+        assert log == []
+    
+    def test_cancel_finished_execution_is_a_no_op(self):
+        async def run():
+            queue, gate, _ = await _queue()
+            gate.set()
+            execution = await queue.submit("p", {})
+            await queue.wait(execution["id"], 1)
+            record = await queue.cancel(execution["id"])
+            await queue.shutdown()
+            return record, queue.get_stats()
+        record, stats = asyncio.run(run())
+        
+        assert record["status"] == "completed"
+        assert stats["cancelled"] == 0
+
+
+class TestAdmission:
+    def test_full_queue_rejects(self):
+        async def run():
+            queue, _, _ = await _queue(max_queued=1)
+            await queue.submit("running", {})
+            await asyncio.sleep(0.02)
+            await queue.submit("queued", {})
+            try:
+                with pytest.raises(RateLimitError):
+                    await queue.submit("rejected", {})
+            finally:
+                await queue.shutdown()
+            return queue.get_stats()
+        stats = asyncio.run(run())
+        
+        assert stats["rejected"] == 1
+    
+    def test_endpoints_map_errors(self, monkeypatch):
+        state = LocalStateStore()
+        controller = ParentController(state=state, database=InMemoryDatabase(state))
+        monkeypatch.setattr(agents_endpoint, "execution_queue", ExecutionQueue(controller, InMemoryDatabase(state)))
+        app = FastAPI()
+        app.include_router(agents_endpoint.router)
+        client = TestClient(app)
+        response = client.get("/agents/executions/exec_missing/wait?timeout=0")
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Execution exec_missing not found"
+        assert client.post("/agents/executions/exec_missing/cancel").status_code == 404
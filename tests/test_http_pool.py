@@ -0,0 +1,89 @@
+"""
+HTTPClientPool against a local HTTP server
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from tools.http_pool import HTTPClientPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        status = 500 if self.path == "/fail" else 200
+        body = self.path.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _run(pool: HTTPClientPool, work):
+    async def run():
+        await pool.startup()
+        try:
+            return await work()
+        finally:
+            await pool.shutdown()
+    return asyncio.run(run())
+
+
+class TestHTTPClientPool:
+    def test_sequential_requests_reuse_one_connection(self, base_url):
+        pool = HTTPClientPool({"local": base_url})
+        
+        async def work():
+            return [(await pool.request("local", "GET", f"/r{i}")).text for i in range(5)]
+        bodies = _run(pool, work)
+        
+        assert bodies == [f"/r{i}" for i in range(5)]
+        stats = pool.get_stats()["providers"]["local"]
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["in_flight"] == 0
+    
+    def test_error_status_raises_and_counts(self, base_url):
+        pool = HTTPClientPool({"local": base_url})
+        
+        async def work():
+            with pytest.raises(httpx.HTTPStatusError):
+                await pool.request("local", "GET", "/fail")
+        _run(pool, work)
+        
+        assert pool.get_stats()["providers"]["local"]["errors"] == 1
+    
+    def test_max_connections_bounds_concurrency(self, base_url):
+        pool = HTTPClientPool({"local": base_url}, max_connections=2)
+        
+        async def work():
+            return await asyncio.gather(*[pool.request("local", "GET", "/") for _ in range(6)])
+        _run(pool, work)
+        
+        assert pool.get_stats()["providers"]["local"]["connections_opened"] <= 2
+    
+    def test_closed_pool_rejects_requests(self, base_url):
+        pool = HTTPClientPool({"local": base_url})
+        _run(pool, lambda: asyncio.sleep(0))
+        
+        assert pool.get_stats()["providers"]["local"]["open"] is False
+        with pytest.raises(RuntimeError):
+            pool.get_client("local")
@@ -0,0 +1,133 @@
+"""
+Sortable IDs and paging messages by ID
+"""
+
+import types
+
+import pytest
+
+from utils import ids
+from utils.database import InMemoryDatabase, open_database
+from utils.ids import SortableIdGenerator, new_id
+from utils.shared_state import LocalStateStore, SQLiteStateStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake wall clock for the ID module, in seconds"""
+    now = types.SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(ids, "time", types.SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture(params=["memory", "shared", "sqlite"])
+def database(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryDatabase(LocalStateStore())
+    elif request.param == "shared":
+        yield InMemoryDatabase(SQLiteStateStore(str(tmp_path / "state.db")))
+    else:
+        database = open_database(f"sqlite:///{tmp_path / 'app.db'}")
+        yield database
+        database.close()
+
+
+def _conversation(database, count):
+    conversation_id = database.create_conversation("u", "a")
+    message_ids = [database.add_message(conversation_id, {"text": str(i)}) for i in range(count)]
+    return conversation_id, message_ids
+
+
+def _texts(messages):
+    return [message["text"] for message in messages]
+
+
+class TestSortableIds:
+    def test_format(self):
+        message_id = new_id("msg")
+        
+        assert message_id.startswith("msg_")
+        assert len(message_id) == 4 + 26
+        assert set(message_id[4:]) <= set(ids._ALPHABET)
+    
+    def test_same_millisecond_ids_increase(self, clock):
+        generator = SortableIdGenerator()
+        made = [generator.new() for _ in range(100)]
+        
+        assert made == sorted(made)
+        assert len(set(made)) == 100
+        assert len({value[:10] for value in made}) == 1
+    
+    def test_clock_stepping_back_keeps_order(self, clock):
+        generator = SortableIdGenerator()
+        first = generator.new()
+        clock.value -= 5
+        second = generator.new()
+        clock.value += 10
+        third = generator.new()
+        
+        assert first < second < third
+    
+    def test_sequence_overflow_borrows_the_next_millisecond(self, clock):
+        generator = SortableIdGenerator()
+        now_ms = int(clock.value * 1000)
+        first = generator.new()
+        generator._seq = 0xFFFF
+        borrowed = generator.new()
+        
+        # The first 10 characters encode the millisecond
+        assert first[:10] == ids._encode(now_ms, 10)
+        assert borrowed[:10] == ids._encode(now_ms + 1, 10)
+        clock.value += 0.001
+        assert generator.new() > borrowed
+    
+    def test_fork_draws_a_new_node(self, clock):
+        generator = SortableIdGenerator()
+        parent = generator.new()
+        generator._pid = -1
+        child = generator.new()
+        
+        # Same millisecond, different process: only the node part differs
+        assert parent[:10] == child[:10]
+        assert parent[13:] != child[13:]
+
+
+class TestMessagePages:
+    def test_all_messages_oldest_first(self, database):
+        conversation_id, message_ids = _conversation(database, 5)
+        messages = database.get_messages(conversation_id)
+        
+        assert _texts(messages) == ["0", "1", "2", "3", "4"]
+        assert [m["id"] for m in messages] == message_ids == sorted(message_ids)
+    
+    def test_newest_page_before(self, database):
+        conversation_id, message_ids = _conversation(database, 5)
+        
+        assert _texts(database.get_messages(conversation_id, limit=2)) == ["0", "1"]
+        assert _texts(database.get_messages(conversation_id, before=message_ids[4], limit=2)) == ["2", "3"]
+    
+    def test_forward_pages_after(self, database):
+        conversation_id, message_ids = _conversation(database, 5)
+        pages, cursor = [], None
+        while True:
+            page = database.get_messages(conversation_id, after=cursor, limit=2)
+            if not page:
+                break
+            pages.append(_texts(page))
+            cursor = page[-1]["id"]
+        
+        assert pages == [["0", "1"], ["2", "3"], ["4"]]
+    
+    def test_between_before_and_after(self, database):
+        conversation_id, message_ids = _conversation(database, 5)
+        first, last = message_ids[0], message_ids[4]
+        
+        assert _texts(database.get_messages(conversation_id, after=first, before=last)) == ["1", "2", "3"]
+        assert _texts(database.get_messages(conversation_id, after=first, before=last, limit=1)) == ["1"]
+    
+    def test_conversations_do_not_mix(self, database):
+        first, _ = _conversation(database, 2)
+        second, _ = _conversation(database, 3)
+        
+        assert _texts(database.get_messages(first)) == ["0", "1"]
+        assert len(database.get_messages(second)) == 3
@@ -0,0 +1,130 @@
+"""
+NDJSON bulk import: line splitting, batching and streamed acknowledgements
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from api.endpoints import chat
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore
+
+
+async def _chunks(*chunks, consumed=None):
+    for chunk in chunks:
+        if consumed is not None:
+            consumed.append(chunk)
+        yield chunk
+
+
+async def _lines(*chunks, max_line_bytes=100):
+    return [line async for line in chat._ndjson_lines(_chunks(*chunks), max_line_bytes)]
+
+
+def _message(conversation_id, text):
+    return json.dumps({"conversation_id": conversation_id, "message": {"text": text, "sender": "user"}})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    database = InMemoryDatabase(LocalStateStore())
+    monkeypatch.setattr(chat, "db", database)
+    monkeypatch.setattr(chat.settings, "IMPORT_MAX_LINE_BYTES", 200)
+    app = FastAPI()
+    app.include_router(chat.router)
+    with TestClient(app) as client:
+        client.database = database
+        yield client
+
+
+class TestNDJSONLines:
+    def test_lines_split_across_chunks(self):
+        lines = asyncio.run(_lines(b'{"a"', b': 1}\n\n{"b": 2', b"}\n", b'{"c": 3}'))
+        
+        assert lines == [(1, b'{"a": 1}'), (3, b'{"b": 2}'), (4, b'{"c": 3}')]
+    
+    def test_many_lines_in_one_chunk(self):
+        lines = asyncio.run(_lines(b"1\n2\n3\n"))
+        
+        assert lines == [(1, b"1"), (2, b"2"), (3, b"3")]
+    
+    def test_oversized_partial_line_is_rejected(self):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(_lines(b"ok\n", b"x" * 60, b"x" * 60, max_line_bytes=100))
+        
+        assert error.value.status_code == 413
+        assert "Line 2" in error.value.detail
+    
+    def test_oversized_complete_line_is_rejected(self):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(_lines(b"x" * 150 + b"\nok\n", max_line_bytes=100))
+        
+        assert "Line 1" in error.value.detail
+
+
+class TestImportBatches:
+    def test_batch_boundaries_and_malformed_lines(self, monkeypatch):
+        database = InMemoryDatabase(LocalStateStore())
+        monkeypatch.setattr(chat, "db", database)
+        body = [_message("c1", "a"), "not json", _message("c1", "b"), "[1]", _message("c2", "c")]
+        
+        async def run():
+            lines = chat._ndjson_lines(_chunks("\n".join(body).encode()), 1000)
+            return [batch async for batch in chat._import_batches(lines, 2)]
+        batches = asyncio.run(run())
+        
+        assert [batch["lines"] for batch in batches] == [[1, 2], [3, 4], [5, 5]]
+        assert [batch["messages"] for batch in batches] == [1, 1, 1]
+        assert [error["line"] for batch in batches for error in batch["errors"]] == [2, 4]
+        assert [m["text"] for m in database.get_messages("c1")] == ["a", "b"]
+    
+    def test_acknowledges_before_reading_the_rest(self, monkeypatch):
+        monkeypatch.setattr(chat, "db", InMemoryDatabase(LocalStateStore()))
+        consumed = []
+        chunks = [(_message("c1", str(i)) + "\n").encode() for i in range(4)]
+        
+        async def run():
+            lines = chat._ndjson_lines(_chunks(*chunks, consumed=consumed), 1000)
+            batches = chat._import_batches(lines, 2)
+            first = await anext(batches)
+            seen = len(consumed)
+            await batches.aclose()
+            return first, seen
+        first, seen = asyncio.run(run())
+        
+        assert first["lines"] == [1, 2]
+        assert seen == 2
+
+
+class TestImportEndpoint:
+    def test_streams_one_acknowledgement_per_batch(self, client):
+        body = "\n".join(_message("c1", str(i)) for i in range(5)) + "\n"
+        response = client.post("/chat/import?batch_size=2", content=body)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["batch"] for line in lines[:-1]] == [0, 1, 2]
+        assert lines[-1] == {"status": "imported", "batches": 3, "messages": 5, "executions": 0, "errors": 0}
+        assert len(client.database.get_messages("c1")) == 5
+    
+    def test_oversized_first_line_is_413(self, client):
+        response = client.post("/chat/import", content="x" * 300 + "\n")
+        
+        assert response.status_code == 413
+    
+    def test_oversized_line_after_a_commit_is_reported(self, client):
+        body = _message("c1", "a") + "\n" + "x" * 300 + "\n"
+        response = client.post("/chat/import?batch_size=1", content=body)
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert response.status_code == 200
+        assert lines[0]["messages"] == 1
+        assert lines[-1]["status"] == "rejected"
+        assert lines[-1]["status_code"] == 413
+        assert lines[-1]["batches"] == 1
+        assert len(client.database.get_messages("c1")) == 1
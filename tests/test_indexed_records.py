@@ -0,0 +1,129 @@
+"""
+Indexed records (and their shared SQLite counterpart): status filters, updates and cursor pages
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.parent_controller import ParentController
+from api.endpoints import agents as agents_endpoint
+from utils.database import InMemoryDatabase
+from utils.indexed_records import IndexedRecords
+from utils.shared_state import LocalStateStore, SQLiteStateStore
+
+INDEXES = {
+    "status": lambda request: [request["status"]],
+    "user": lambda request: [request["user"]],
+}
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def records(request, tmp_path):
+    if request.param == "local":
+        return IndexedRecords(INDEXES)
+    return SQLiteStateStore(str(tmp_path / "state.db")).records("upgrade_requests", INDEXES)
+
+
+def _add(records, count, user="u", timestamp=None):
+    return [
+        records.add({"user": user, "status": "pending"}, None if timestamp is None else timestamp + i)
+        for i in range(count)
+    ]
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def _pages(records, filters=None, limit=2):
+    pages, cursor = [], None
+    while True:
+        items, cursor = records.query(filters, before=cursor, limit=limit)
+        pages.append(_ids(items))
+        if cursor is None:
+            return pages
+
+
+class TestCursor:
+    def test_pages_cover_every_record_once(self, records):
+        _add(records, 5)
+        
+        assert _pages(records) == [[4, 3], [2, 1], [0]]
+    
+    def test_exact_multiple_of_the_page_size(self, records):
+        _add(records, 4)
+        
+        assert _pages(records) == [[3, 2], [1, 0]]
+    
+    def test_records_added_between_pages_are_not_repeated(self, records):
+        _add(records, 4)
+        first, cursor = records.query(limit=2)
+        _add(records, 2)
+        second, _ = records.query(before=cursor, limit=2)
+        
+        assert _ids(first) + _ids(second) == [3, 2, 1, 0]
+
+
+class TestFilters:
+    def test_status_filter_follows_updates(self, records):
+        _add(records, 4)
+        records.update(1, {"status": "approved"})
+        records.update(3, {"status": "rejected"})
+        
+        assert _ids(records.query({"status": "pending"})[0]) == [2, 0]
+        assert _ids(records.query({"status": "approved"})[0]) == [1]
+        assert records.counts("status") == {"pending": 2, "approved": 1, "rejected": 1}
+        assert records.get(1)["status"] == "approved"
+    
+    def test_filtered_pages(self, records):
+        _add(records, 6)
+        for record_id in (0, 2, 3, 5):
+            records.update(record_id, {"status": "approved"})
+        
+        assert _pages(records, {"status": "approved"}) == [[5, 3], [2, 0]]
+    
+    def test_combined_filters_and_time_range(self, records):
+        _add(records, 3, user="a", timestamp=100)
+        _add(records, 3, user="b", timestamp=200)
+        records.update(4, {"status": "approved"})
+        
+        assert _ids(records.query({"user": "b", "status": "pending"})[0]) == [5, 3]
+        assert _ids(records.query({"user": "a"}, since=101, until=102)[0]) == [2, 1]
+        assert records.query({"user": "nobody"}) == ([], None)
+    
+    def test_unknown_index_and_record(self, records):
+        _add(records, 1)
+        
+        with pytest.raises(ValueError):
+            records.query({"priority": "high"})
+        assert records.update(99, {"status": "approved"}) is None
+
+
+class TestUpgradeRequestsEndpoint:
+    def test_pages_and_status_filter(self, monkeypatch):
+        state = LocalStateStore()
+        controller = ParentController(state=state, database=InMemoryDatabase(state))
+        monkeypatch.setattr(agents_endpoint, "parent_controller", controller)
+        
+        async def submit():
+            for i in range(5):
+                await controller.request_upgrade(f"user{i % 2}", f"proposal {i}")
+            await controller.approve_upgrade(1)
+            await controller.reject_upgrade(2)
+        asyncio.run(submit())
+        app = FastAPI()
+        app.include_router(agents_endpoint.router)
+        client = TestClient(app)
+        first = client.get("/agents/upgrade-requests?limit=2").json()
+        second = client.get(f"/agents/upgrade-requests?limit=2&cursor={first['next_cursor']}").json()
+        pending = client.get("/agents/upgrade-requests?status=pending&user=user0").json()
+        
+        assert _ids(first["upgrade_requests"]) == [4, 3]
+        assert _ids(second["upgrade_requests"]) == [2, 1]
+        assert _ids(pending["upgrade_requests"]) == [4, 0]
+        assert pending["next_cursor"] is None
+        assert first["counts"] == {"total": 5, "pending": 3, "approved": 1, "rejected": 1}
+        assert client.post("/agents/upgrade-requests/99/approve").status_code == 404
@@ -0,0 +1,113 @@
+"""
+Network-backed LLM providers go through the pooled HTTP clients
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+
+import pytest
+
+from tools.llm_provider import LLMProvider
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((self.path, self.headers.get("Authorization"), body))
+        if self.path == "/chat/completions":
+            reply = {
+                "model": body["model"],
+                "choices": [{"message": {"content": f"openai: {body['messages'][0]['content']}"}, "finish_reason": "stop"}]
+            }
+        else:
+            inputs = body["inputs"]
+            if isinstance(inputs, list):
+                reply = [[{"generated_text": f"hf: {text}"}] for text in inputs]
+            else:
+                reply = [{"generated_text": f"hf: {inputs}"}]
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    _Handler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _run(provider: LLMProvider, work):
+    async def run():
+        await provider.startup()
+        try:
+            return await work()
+        finally:
+            await provider.shutdown()
+    return asyncio.run(run())
+
+
+class TestHTTPProviders:
+    def test_openai_uses_the_pooled_client(self, base_url):
+        provider = LLMProvider({
+            "openai_api_key": "sk-test",
+            "openai_base_url": base_url,
+            "openai_model": "gpt-4",
+        })
+        
+        async def work():
+            return [await provider.generate(f"hello {i}", temperature=0.2, use_cache=False) for i in range(3)]
+        results = _run(provider, work)
+        
+        assert [r["text"] for r in results] == [f"openai: hello {i}" for i in range(3)]
+        assert results[0]["provider"] == "openai"
+        path, auth, body = _Handler.requests[0]
+        assert path == "/chat/completions"
+        assert auth == "Bearer sk-test"
+        assert body["temperature"] == 0.2
+        stats = provider.http.get_stats()["providers"]["openai"]
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+    
+    def test_huggingface_batches_in_one_request(self, base_url):
+        provider = LLMProvider({
+            "hf_model": "tiny-model",
+            "hf_api_key": "hf-test",
+            "hf_base_url": base_url,
+            "batching_enabled": True,
+            "batch_max_wait": 0.05,
+        })
+        
+        async def work():
+            return await asyncio.gather(*[provider.generate(f"p{i}", use_cache=False) for i in range(3)])
+        results = _run(provider, work)
+        
+        assert [r["text"] for r in results] == ["hf: p0", "hf: p1", "hf: p2"]
+        assert results[0]["metadata"]["batch_size"] == 3
+        [(path, auth, body)] = _Handler.requests
+        assert path == "/models/tiny-model"
+        assert auth == "Bearer hf-test"
+        assert body["inputs"] == ["p0", "p1", "p2"]
+    
+    def test_closed_pool_fails_over_to_error_result(self, base_url):
+        provider = LLMProvider({"openai_api_key": "sk-test", "openai_base_url": base_url})
+        
+        result = asyncio.run(provider.generate("hello", use_cache=False))
+        
+        assert result["provider"] is None
+        assert _Handler.requests == []
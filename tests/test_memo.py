@@ -0,0 +1,147 @@
+"""
+Memoized agents: cache hits, keys, expiry and invalidation
+"""
+
+import asyncio
+import types
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.parent_controller import BaseAgent, ParentController
+from api.endpoints import agents as agents_endpoint
+from tools import response_cache
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore
+
+
+class CountingAgent(BaseAgent):
+    """Deterministic agent counting its real runs (shared by pooled clones)"""
+    
+    memoize = True
+    
+    def __init__(self, name, calls, fail=False):
+        super().__init__(name)
+        self.calls = calls
+        self.fail = fail
+    
+    async def run(self, prompt, context, deadline=None):
+        self.calls.append(prompt)
+        if self.fail:
+            return {"agent": self.name, "error": "boom", "status": "failed"}
+        return self._build_result(prompt, context)
+
+
+def _controller(**kwargs) -> ParentController:
+    state = LocalStateStore()
+    return ParentController(state=state, database=InMemoryDatabase(state), **kwargs)
+
+
+def _runs(controller, runs, **agents):
+    """Register agents, then run each (prompt, context) in turn"""
+    async def run():
+        for name, agent in agents.items():
+            await controller.register_agent(name, agent)
+        results = []
+        for prompt, context in runs:
+            results.append(await controller.run_agents(prompt, context))
+        return results
+    return asyncio.run(run())
+
+
+class TestMemoize:
+    def test_same_prompt_and_context_hit(self):
+        controller = _controller()
+        calls = []
+        results = _runs(controller, [("p", {"a": 1, "b": 2}), ("p", {"b": 2, "a": 1})], M=CountingAgent("M", calls))
+        
+        assert calls == ["p"]
+        assert "memoized" not in results[0][0]
+        assert results[1][0]["memoized"] is True
+        stats = asyncio.run(controller.get_metrics())["memo"]["M"]
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+    
+    def test_different_inputs_miss(self):
+        calls = []
+        _runs(_controller(), [("p", {}), ("q", {}), ("p", {"x": 1})], M=CountingAgent("M", calls))
+        
+        assert calls == ["p", "q", "p"]
+    
+    def test_failures_are_not_cached(self):
+        calls = []
+        _runs(_controller(), [("p", {}), ("p", {})], M=CountingAgent("M", calls, fail=True))
+        
+        assert calls == ["p", "p"]
+    
+    def test_agents_run_every_time_unless_memoized(self):
+        calls = []
+        agent = CountingAgent("M", calls)
+        agent.memoize = False
+        _runs(_controller(), [("p", {}), ("p", {})], M=agent)
+        
+        assert calls == ["p", "p"]
+    
+    def test_results_expire(self, monkeypatch):
+        now = types.SimpleNamespace(value=1000.0)
+        monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(monotonic=lambda: now.value, time=lambda: now.value))
+        controller = _controller(memo_ttl=10)
+        calls = []
+        _runs(controller, [("p", {})], M=CountingAgent("M", calls))
+        now.value += 11
+        _runs(controller, [("p", {})])
+        
+        assert calls == ["p", "p"]
+
+
+class TestInvalidation:
+    def test_invalidate_one_agent(self):
+        controller = _controller()
+        m_calls, n_calls = [], []
+        _runs(controller, [("p", {})], M=CountingAgent("M", m_calls), N=CountingAgent("N", n_calls))
+        
+        assert controller.invalidate_memo("M") == {"invalidated": ["M"]}
+        assert controller.invalidate_memo("ghost") == {"invalidated": []}
+        _runs(controller, [("p", {})])
+        assert (m_calls, n_calls) == (["p", "p"], ["p"])
+    
+    def test_invalidate_all(self):
+        controller = _controller()
+        m_calls, n_calls = [], []
+        _runs(controller, [("p", {})], M=CountingAgent("M", m_calls), N=CountingAgent("N", n_calls))
+        
+        assert sorted(controller.invalidate_memo()["invalidated"]) == ["M", "N"]
+        _runs(controller, [("p", {})])
+        assert (m_calls, n_calls) == (["p", "p"], ["p", "p"])
+    
+    def test_approved_upgrade_invalidates(self):
+        controller = _controller()
+        calls = []
+        _runs(controller, [("p", {})], M=CountingAgent("M", calls))
+        
+        async def upgrade():
+            await controller.request_upgrade("u", "better answers")
+            await controller.approve_upgrade(0)
+        asyncio.run(upgrade())
+        _runs(controller, [("p", {})])
+        
+        assert calls == ["p", "p"]
+    
+    def test_reregistering_drops_results(self):
+        controller = _controller()
+        calls = []
+        _runs(controller, [("p", {})], M=CountingAgent("M", calls))
+        _runs(controller, [("p", {})], M=CountingAgent("M", calls))
+        
+        assert calls == ["p", "p"]
+    
+    def test_endpoint(self, monkeypatch):
+        controller = _controller()
+        calls = []
+        _runs(controller, [("p", {})], M=CountingAgent("M", calls))
+        monkeypatch.setattr(agents_endpoint, "parent_controller", controller)
+        app = FastAPI()
+        app.include_router(agents_endpoint.router)
+        response = TestClient(app).post("/agents/memo/invalidate?agent=M")
+        
+        assert response.json() == {"invalidated": ["M"]}
+        assert controller.memo["M"].get_stats()["entries"] == 0
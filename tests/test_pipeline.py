@@ -0,0 +1,127 @@
+"""
+Agent pipelines: DAG validation, upstream results and skip-on-failure
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.parent_controller import BaseAgent, ParentController, _plan_pipeline
+from api.endpoints import agents as agents_endpoint
+from utils.database import InMemoryDatabase
+from utils.exceptions import ValidationException
+from utils.shared_state import LocalStateStore
+
+
+class UpstreamAgent(BaseAgent):
+    """Agent that echoes the upstream node IDs it was given"""
+    
+    def __init__(self, name, delay=0.0):
+        super().__init__(name)
+        self.delay = delay
+    
+    async def run(self, prompt, context, deadline=None):
+        await asyncio.sleep(self.delay)
+        result = self._build_result(prompt, context)
+        result["upstream"] = sorted(context.get("upstream", {}))
+        return result
+
+
+class FailingAgent(BaseAgent):
+    async def run(self, prompt, context, deadline=None):
+        return {"agent": self.name, "error": "boom", "status": "failed"}
+
+
+def _node(node_id, agent="ok", *deps, prompt=None):
+    return {"id": node_id, "agent": agent, "depends_on": list(deps), "prompt": prompt}
+
+
+def _run(nodes, **agents):
+    state = LocalStateStore()
+    controller = ParentController(state=state, database=InMemoryDatabase(state))
+    
+    async def run():
+        await controller.register_agent("ok", UpstreamAgent("ok", delay=0.02))
+        await controller.register_agent("fail", FailingAgent("fail"))
+        for name, agent in agents.items():
+            await controller.register_agent(name, agent)
+        return await controller.run_pipeline("p", {"user": "u"}, nodes)
+    return asyncio.run(run())
+
+
+class TestPlan:
+    def test_topological_order(self):
+        nodes = [_node("d", "ok", "b", "c"), _node("b", "ok", "a"), _node("c", "ok", "a"), _node("a")]
+        
+        assert _plan_pipeline(nodes) == ["a", "b", "c", "d"]
+    
+    def test_cycle_names_its_nodes(self):
+        nodes = [_node("a"), _node("b", "ok", "a", "d"), _node("c", "ok", "b"), _node("d", "ok", "c")]
+        
+        with pytest.raises(ValidationException, match="cycle through: b, c, d"):
+            _plan_pipeline(nodes)
+    
+    def test_self_dependency_is_a_cycle(self):
+        with pytest.raises(ValidationException, match="cycle"):
+            _plan_pipeline([_node("a", "ok", "a")])
+    
+    def test_duplicate_and_unknown_nodes(self):
+        with pytest.raises(ValidationException, match="Duplicate"):
+            _plan_pipeline([_node("a"), _node("a")])
+        with pytest.raises(ValidationException, match="unknown node x"):
+            _plan_pipeline([_node("a", "ok", "x")])
+
+
+class TestRun:
+    def test_diamond_passes_upstream_results(self):
+        pipeline = _run([_node("a"), _node("b", "ok", "a"), _node("c", "ok", "a"), _node("d", "ok", "b", "c")])
+        nodes = pipeline["nodes"]
+        
+        assert pipeline["success"] is True
+        assert nodes["d"]["result"]["upstream"] == ["b", "c"]
+        assert nodes["b"]["result"]["context_used"] == ["user", "upstream"]
+        # b and c are independent, so they overlap
+        assert nodes["c"]["started_ms"] < nodes["b"]["finished_ms"]
+        assert nodes["d"]["started_ms"] >= max(nodes["b"]["finished_ms"], nodes["c"]["finished_ms"])
+    
+    def test_failure_skips_everything_downstream(self):
+        pipeline = _run([
+            _node("a"),
+            _node("bad", "fail", "a"),
+            _node("after", "ok", "bad"),
+            _node("last", "ok", "after"),
+            _node("side", "ok", "a"),
+        ])
+        nodes = pipeline["nodes"]
+        
+        assert pipeline["success"] is False
+        assert nodes["bad"]["status"] == "failed"
+        assert nodes["after"]["status"] == "skipped"
+        assert nodes["after"]["reason"] == "Dependency bad failed"
+        assert nodes["last"]["reason"] == "Dependency after was skipped"
+        assert nodes["side"]["status"] == "completed"
+    
+    def test_node_prompt_overrides(self):
+        pipeline = _run([_node("a", prompt="own"), _node("b")])
+        
+        assert pipeline["nodes"]["a"]["result"]["prompt"] == "own"
+        assert pipeline["nodes"]["b"]["result"]["prompt"] == "p"
+    
+    def test_unknown_agent(self):
+        with pytest.raises(ValidationException, match="unknown agent ghost"):
+            _run([_node("a", "ghost")])
+    
+    def test_endpoint_rejects_a_cycle(self, monkeypatch):
+        state = LocalStateStore()
+        monkeypatch.setattr(
+            agents_endpoint, "parent_controller", ParentController(state=state, database=InMemoryDatabase(state))
+        )
+        app = FastAPI()
+        app.include_router(agents_endpoint.router)
+        body = {"prompt": "p", "nodes": [_node("a", "ok", "b"), _node("b", "ok", "a")]}
+        response = TestClient(app).post("/agents/pipeline", json=body)
+        
+        assert response.status_code == 400
+        assert "cycle" in response.json()["detail"]
@@ -0,0 +1,141 @@
+"""
+cpu_bound agents run in worker processes
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from agents.parent_controller import BaseAgent, ParentController
+from agents.process_pool import AgentProcessPool
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore
+
+
+class SumAgent(BaseAgent):
+    cpu_bound = True
+    
+    def compute(self, prompt, context):
+        return {"total": sum(i * i for i in range(int(prompt))), "pid": os.getpid()}
+
+
+class SlowAgent(BaseAgent):
+    cpu_bound = True
+    
+    def compute(self, prompt, context):
+        # Busy for longer than the agent timeout, but bounded so the worker exits
+        end = time.monotonic() + 1.5
+        total = 0
+        while time.monotonic() < end:
+            total += 1
+        return {"total": total}
+
+
+class CrashingAgent(BaseAgent):
+    cpu_bound = True
+    
+    def compute(self, prompt, context):
+        os._exit(1)
+
+
+class LockAgent(BaseAgent):
+    cpu_bound = True
+    
+    def compute(self, prompt, context):
+        return {"lock": threading.Lock()}
+
+
+def _controller(agent_timeout=None) -> ParentController:
+    return ParentController(
+        agent_timeout=agent_timeout,
+        process_workers=1,
+        state=LocalStateStore(),
+        database=InMemoryDatabase(LocalStateStore())
+    )
+
+
+class TestProcessPool:
+    def test_compute_runs_in_a_worker_process(self):
+        controller = _controller()
+        
+        async def run():
+            await controller.register_agent("sum", SumAgent("sum"))
+            try:
+                return await controller.run_agents("1000", {}, ["sum"])
+            finally:
+                controller.shutdown()
+        [result] = asyncio.run(run())
+        
+        assert result["status"] == "success"
+        assert result["total"] == sum(i * i for i in range(1000))
+        assert result["pid"] != os.getpid()
+    
+    def test_unpicklable_inputs_fail_without_running(self):
+        pool = AgentProcessPool(1)
+        
+        async def run():
+            try:
+                return await SumAgent("sum").run_in_pool(pool, "10", {"lock": threading.Lock()})
+            finally:
+                pool.shutdown()
+        result = asyncio.run(run())
+        
+        assert result["status"] == "failed"
+        assert "not picklable" in result["error"]
+        assert pool.get_stats()["submitted"] == 0
+    
+    def test_unpicklable_result_is_an_error(self):
+        pool = AgentProcessPool(1)
+        
+        async def run():
+            try:
+                return await LockAgent("lock").run_in_pool(pool, "", {})
+            finally:
+                pool.shutdown()
+        result = asyncio.run(run())
+        
+        assert result["status"] == "failed"
+        assert "not picklable" in result["error"]
+        assert pool.get_stats()["failed"] == 1
+    
+    def test_timeout_does_not_block_the_loop(self):
+        controller = _controller(agent_timeout=0.3)
+        ticks = []
+        
+        async def tick():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.05)
+        
+        async def run():
+            await controller.register_agent("slow", SlowAgent("slow"))
+            ticker = asyncio.create_task(tick())
+            try:
+                return await controller.run_agents("", {}, ["slow"])
+            finally:
+                ticker.cancel()
+                controller.shutdown()
+        [result] = asyncio.run(run())
+        
+        assert result["status"] == "timeout"
+        assert len(ticks) >= 3
+    
+    def test_crashed_worker_is_replaced(self):
+        controller = _controller()
+        
+        async def run():
+            await controller.register_agent("crash", CrashingAgent("crash"))
+            await controller.register_agent("sum", SumAgent("sum"))
+            try:
+                crashed = await controller.run_agents("", {}, ["crash"])
+                after = await controller.run_agents("10", {}, ["sum"])
+                return crashed, after, controller.process_pool.get_stats()
+            finally:
+                controller.shutdown()
+        [crashed], [after], stats = asyncio.run(run())
+        
+        assert crashed["status"] == "failed"
+        assert "worker process died" in crashed["error"]
+        assert after["status"] == "success"
+        assert stats["restarts"] == 1
@@ -0,0 +1,172 @@
+"""
+Provider routing: circuit breaker transitions, latency ordering and hedged calls
+"""
+
+import asyncio
+import types
+
+import pytest
+
+from tools import provider_router
+from tools.llm_provider import LLMProvider
+from tools.provider_router import CircuitBreaker, ProviderRouter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock for the router module, advanced by hand"""
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(provider_router, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def _provider(latencies):
+    """Two-provider LLMProvider whose router has already measured latencies"""
+    provider = LLMProvider({
+        "openai_api_key": "key",
+        "hf_model": "model",
+        "hedge_enabled": True,
+        "hedge_min_samples": 1,
+    })
+    for name, latency in latencies.items():
+        provider.router.record_success(name, latency)
+    return provider
+
+
+def _fake_calls(provider, delays, log):
+    """Replace the provider calls with sleeps, logging how each one ends"""
+    async def call(name, prompt, **options):
+        try:
+            await asyncio.sleep(delays[name])
+        except asyncio.CancelledError:
+            log.append((name, "cancelled"))
+            raise
+        log.append((name, "done"))
+        return {"text": name, "provider": name, "metadata": {}}
+    provider._call_provider = call
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_time=10)
+        breaker.on_failure()
+        breaker.on_failure()
+        breaker.on_success()
+        for _ in range(3):
+            breaker.on_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.times_opened == 1
+        assert not breaker.is_available()
+    
+    def test_half_open_allows_one_trial(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=10)
+        breaker.on_failure()
+        clock.value += 10
+        
+        assert breaker.is_available()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.on_start()
+        assert not breaker.is_available()
+        breaker.on_cancel()
+        assert breaker.is_available()
+    
+    def test_trial_success_closes(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=10)
+        breaker.on_failure()
+        clock.value += 10
+        breaker.is_available()
+        breaker.on_start()
+        breaker.on_success()
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.consecutive_failures == 0
+    
+    def test_trial_failure_reopens(self, clock):
+        breaker = CircuitBreaker(failure_threshold=5, recovery_time=10)
+        for _ in range(5):
+            breaker.on_failure()
+        clock.value += 10
+        breaker.is_available()
+        breaker.on_start()
+        breaker.on_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.times_opened == 2
+        clock.value += 9
+        assert not breaker.is_available()
+
+
+class TestOrdering:
+    def test_faster_provider_goes_first(self):
+        router = ProviderRouter(["a", "b", "c"])
+        router.record_success("a", 0.5)
+        router.record_success("b", 0.1)
+        
+        # c has no samples yet, so it is tried first to get measured
+        assert router.order() == ["c", "b", "a"]
+    
+    def test_open_breakers_are_skipped_and_half_open_probed_first(self, clock):
+        router = ProviderRouter(["a", "b"], failure_threshold=1, recovery_time=10)
+        router.record_success("a", 0.1)
+        router.record_failure("b", 0.1)
+        
+        assert router.order() == ["a"]
+        clock.value += 10
+        assert router.order() == ["b", "a"]
+    
+    def test_hedge_delay_needs_samples(self):
+        router = ProviderRouter(["a", "b"], hedge_enabled=True, hedge_percentile=50, hedge_min_samples=3)
+        for latency in (0.1, 0.2):
+            router.record_success("a", latency)
+        
+        assert router.hedge_delay("a") is None
+        router.record_success("a", 0.3)
+        assert router.hedge_delay("a") == 0.2
+
+
+class TestHedging:
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        provider = _provider({"openai": 0.01, "huggingface": 0.02})
+        log = []
+        _fake_calls(provider, {"openai": 5, "huggingface": 0}, log)
+        
+        result = asyncio.run(provider._dispatch("hello", {}))
+        
+        assert result["provider"] == "huggingface"
+        assert log == [("huggingface", "done"), ("openai", "cancelled")]
+        status = provider.router.get_status()["providers"]
+        assert status["openai"]["hedges"] == 1
+        assert status["openai"]["failures"] == 0
+    
+    def test_fast_primary_is_not_hedged(self):
+        provider = _provider({"openai": 0.5, "huggingface": 0.6})
+        log = []
+        _fake_calls(provider, {"openai": 0, "huggingface": 0}, log)
+        
+        result = asyncio.run(provider._dispatch("hello", {}))
+        
+        assert result["provider"] == "openai"
+        assert log == [("openai", "done")]
+    
+    @pytest.mark.parametrize("primary_latency", [0.01, 5])
+    def test_cancelling_the_caller_cancels_every_call(self, primary_latency):
+        # 0.01 cancels after the hedge has started, 5 before it does
+        provider = _provider({"openai": primary_latency, "huggingface": 10})
+        log = []
+        _fake_calls(provider, {"openai": 5, "huggingface": 5}, log)
+        
+        async def run():
+            task = asyncio.ensure_future(provider._dispatch("hello", {}))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0)
+            # Snapshot before asyncio.run cancels any leftover tasks itself
+            return list(log)
+        log = asyncio.run(run())
+        
+        assert all(outcome == "cancelled" for _, outcome in log)
+        assert len(log) == (2 if primary_latency < 1 else 1)
+        assert not provider.router.breakers["openai"].trial_in_flight
@@ -0,0 +1,132 @@
+"""
+Provider admission: token buckets, concurrency caps and priority ordering
+"""
+
+import asyncio
+import types
+
+import pytest
+
+from tools import rate_limiter
+from tools.rate_limiter import ProviderLimiter, TokenBucket
+from utils.exceptions import RateLimitError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock for the limiter module, advanced by hand"""
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+async def _admit_order(limiter: ProviderLimiter, requests):
+    """Queue (name, priority) requests behind a held slot and return the order they get in"""
+    order = []
+    
+    async def request(name, priority):
+        async with limiter.slot(priority=priority):
+            order.append(name)
+    
+    await limiter.acquire()
+    tasks = []
+    for name, priority in requests:
+        tasks.append(asyncio.ensure_future(request(name, priority)))
+        await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestTokenBucket:
+    def test_refills_at_rate_up_to_capacity(self, clock):
+        bucket = TokenBucket(rate=2, capacity=4)
+        bucket.take(4)
+        
+        assert bucket.wait_time(1) == 0.5
+        clock.value += 1
+        assert bucket.wait_time(2) == 0.0
+        clock.value += 100
+        bucket.wait_time(1)
+        assert bucket.tokens == 4
+    
+    def test_requests_larger_than_capacity_are_capped(self, clock):
+        bucket = TokenBucket(rate=1, capacity=10)
+        
+        assert bucket.wait_time(50) == 0.0
+        bucket.take(50)
+        assert bucket.tokens == 0
+
+
+class TestPriority:
+    def test_higher_priority_is_admitted_first(self):
+        limiter = ProviderLimiter("p", max_concurrency=1)
+        requests = [("low", 0), ("high", 5), ("mid", 1), ("high2", 5)]
+        
+        order = asyncio.run(_admit_order(limiter, requests))
+        
+        assert order == ["high", "high2", "mid", "low"]
+        assert limiter.get_stats()["admitted"] == 5
+    
+    def test_cancelled_head_does_not_block_the_queue(self):
+        limiter = ProviderLimiter("p", max_concurrency=1)
+        
+        async def run():
+            await limiter.acquire()
+            head = asyncio.ensure_future(limiter.acquire(priority=9))
+            tail = asyncio.ensure_future(limiter.acquire(priority=0))
+            await asyncio.sleep(0)
+            head.cancel()
+            await asyncio.sleep(0)
+            limiter.release()
+            await asyncio.wait_for(tail, 1)
+            return limiter.get_stats()
+        stats = asyncio.run(run())
+        
+        assert stats["in_flight"] == 1
+        assert stats["queued"] == 0
+
+
+class TestLimits:
+    def test_concurrency_cap(self):
+        limiter = ProviderLimiter("p", max_concurrency=2)
+        peak = 0
+        
+        async def request():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+        
+        async def run():
+            await asyncio.gather(*[request() for _ in range(6)])
+        asyncio.run(run())
+        
+        assert peak == 2
+        assert limiter.in_flight == 0
+    
+    def test_queue_timeout_raises(self):
+        limiter = ProviderLimiter("p", max_concurrency=1, queue_timeout=0.02)
+        
+        async def run():
+            await limiter.acquire()
+            with pytest.raises(RateLimitError):
+                await limiter.acquire()
+        asyncio.run(run())
+        
+        assert limiter.get_stats()["rejected"] == 1
+        assert limiter.get_stats()["queued"] == 0
+    
+    def test_token_budget_delays_admission(self):
+        limiter = ProviderLimiter("p", tokens_per_minute=600)
+        
+        async def run():
+            loop = asyncio.get_running_loop()
+            await limiter.acquire(tokens=600)
+            started = loop.time()
+            await limiter.acquire(tokens=3)
+            return loop.time() - started
+        waited = asyncio.run(run())
+        
+        # 600 tokens per minute refill at 10 per second
+        assert 0.2 <= waited < 1.0
@@ -0,0 +1,125 @@
+"""
+ResponseCache: LRU and TTL eviction, disk tier, cache keys and LLMProvider integration
+"""
+
+import asyncio
+import types
+
+import pytest
+
+from tools import response_cache
+from tools.llm_provider import LLMProvider
+from tools.response_cache import DiskCacheTier, ResponseCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic and wall clocks for the cache module, advanced by hand"""
+    now = types.SimpleNamespace(value=1000.0)
+    fake = types.SimpleNamespace(monotonic=lambda: now.value, time=lambda: now.value)
+    monkeypatch.setattr(response_cache, "time", fake)
+    return now
+
+
+class TestMemoryTier:
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", {"text": "A"})
+        cache.set("b", {"text": "B"})
+        cache.get("a")
+        cache.set("c", {"text": "C"})
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == {"text": "A"}
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_entries_expire_after_ttl(self, clock):
+        cache = ResponseCache(ttl=10)
+        cache.set("a", {"text": "A"})
+        clock.value += 9
+        
+        assert cache.get("a") == {"text": "A"}
+        clock.value += 2
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+    
+    def test_returns_copies(self):
+        cache = ResponseCache()
+        value = {"metadata": {"n": 1}}
+        cache.set("a", value)
+        value["metadata"]["n"] = 2
+        cache.get("a")["metadata"]["n"] = 3
+        
+        assert cache.get("a") == {"metadata": {"n": 1}}
+
+
+class TestDiskTier:
+    def test_evicted_entries_are_promoted_from_disk(self, tmp_path):
+        cache = ResponseCache(max_entries=1, disk_dir=str(tmp_path))
+        cache.set("a", {"text": "A"})
+        cache.set("b", {"text": "B"})
+        
+        assert cache.get("a") == {"text": "A"}
+        stats = cache.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["disk_entries"] == 2
+    
+    def test_disk_entries_expire(self, tmp_path, clock):
+        cache = ResponseCache(max_entries=1, ttl=10, disk_dir=str(tmp_path))
+        cache.set("a", {"text": "A"})
+        cache.set("b", {"text": "B"})
+        clock.value += 11
+        
+        assert cache.get("a") is None
+        assert not (tmp_path / "a.json").exists()
+    
+    def test_disk_tier_is_bounded(self, tmp_path):
+        disk = DiskCacheTier(str(tmp_path), max_entries=2)
+        for key in "abc":
+            disk.set(key, {"text": key}, None)
+        
+        assert len(disk) == 2
+        assert disk.get("a") is None
+        assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["b", "c"]
+    
+    def test_survives_a_restart(self, tmp_path):
+        ResponseCache(disk_dir=str(tmp_path)).set("a", {"text": "A"})
+        cache = ResponseCache(disk_dir=str(tmp_path))
+        
+        assert asyncio.run(cache.get_async("a")) == {"text": "A"}
+    
+    def test_invalidate_and_clear_reach_disk(self, tmp_path):
+        cache = ResponseCache(disk_dir=str(tmp_path))
+        cache.set("a", {"text": "A"})
+        cache.set("b", {"text": "B"})
+        cache.invalidate("a")
+        
+        assert cache.get("a") is None
+        cache.clear()
+        assert list(tmp_path.glob("*.json")) == []
+
+
+class TestCacheKeys:
+    def test_whitespace_and_option_order_do_not_matter(self):
+        key = make_cache_key("hello  world", "demo_mode", {"a": 1, "b": 2})
+        
+        assert key == make_cache_key(" hello world ", "demo_mode", {"b": 2, "a": 1})
+        assert key != make_cache_key("hello world", "demo_mode", {"a": 2, "b": 2})
+
+
+class TestProviderCache:
+    def test_generate_is_served_from_cache(self):
+        provider = LLMProvider({"cache_enabled": True})
+        
+        async def run():
+            first = await provider.generate("hello")
+            second = await provider.generate("hello")
+            bypass = await provider.generate("hello", use_cache=False)
+            return first, second, bypass
+        first, second, bypass = asyncio.run(run())
+        
+        assert "cached" not in first["metadata"]
+        assert second["metadata"]["cached"] is True
+        assert second["text"] == first["text"]
+        assert "cached" not in bypass["metadata"]
+        assert provider.usage["demo_mode"]["requests"] == 2
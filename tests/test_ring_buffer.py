@@ -0,0 +1,119 @@
+"""
+IndexedRingBuffer (and its shared SQLite counterpart): eviction, index and time queries, cursors
+"""
+
+import pytest
+
+from utils import ring_buffer
+from utils.ring_buffer import IndexedRingBuffer
+from utils.shared_state import SQLiteStateStore
+
+
+def _history(capacity: int) -> IndexedRingBuffer:
+    return IndexedRingBuffer(capacity, {
+        "agent": lambda execution: execution["agents_run"],
+        "success": lambda execution: [execution["success"]],
+    })
+
+
+def _append(history: IndexedRingBuffer, agents, success=True, timestamp=None) -> int:
+    return history.append({"agents_run": agents, "success": success}, timestamp)
+
+
+def _seqs(items):
+    return [item["seq"] for item in items]
+
+
+class TestEviction:
+    def test_oldest_entries_are_overwritten(self):
+        history = _history(3)
+        for i in range(5):
+            _append(history, ["A"], timestamp=100 + i)
+        items, cursor = history.query()
+        
+        assert _seqs(items) == [4, 3, 2]
+        assert cursor is None
+        assert history.oldest_seq == 2
+        assert _seqs(history.latest()) == [2, 3, 4]
+    
+    def test_evicted_keys_leave_the_index(self):
+        history = _history(2)
+        _append(history, ["A"], timestamp=1)
+        _append(history, ["B"], timestamp=2)
+        _append(history, ["B"], timestamp=3)
+        
+        assert history.query({"agent": "A"}) == ([], None)
+        assert history.get_stats()["indexes"]["agent"] == 1
+    
+    def test_memory_follows_evictions(self):
+        history = _history(2)
+        _append(history, ["A"] * 50, timestamp=1)
+        big = history.get_stats()["memory_bytes"]
+        _append(history, ["A"], timestamp=2)
+        _append(history, ["A"], timestamp=3)
+        
+        assert history.get_stats()["memory_bytes"] < big
+
+
+class TestQueries:
+    def test_agent_and_success_filters(self):
+        history = _history(10)
+        _append(history, ["A"], True, 1)
+        _append(history, ["A", "B"], False, 2)
+        _append(history, ["B"], True, 3)
+        
+        assert _seqs(history.query({"agent": "A"})[0]) == [1, 0]
+        assert _seqs(history.query({"agent": "B", "success": True})[0]) == [2]
+        assert _seqs(history.query({"success": False})[0]) == [1]
+        with pytest.raises(ValueError):
+            history.query({"user": "x"})
+    
+    def test_time_range_is_inclusive(self):
+        history = _history(10)
+        for i in range(5):
+            _append(history, ["A"], timestamp=10 + i)
+        
+        assert _seqs(history.query(since=11, until=13)[0]) == [3, 2, 1]
+        assert _seqs(history.query({"agent": "A"}, since=13)[0]) == [4, 3]
+    
+    def test_cursor_pages(self):
+        history = _history(10)
+        for i in range(5):
+            _append(history, ["A"], timestamp=i)
+        first, cursor = history.query(limit=2)
+        second, cursor = history.query(before=cursor, limit=2)
+        third, cursor = history.query(before=cursor, limit=2)
+        
+        assert [_seqs(first), _seqs(second), _seqs(third)] == [[4, 3], [2, 1], [0]]
+        assert cursor is None
+
+
+class TestClockSteps:
+    def test_earlier_timestamp_is_raised_to_the_previous(self):
+        history = _history(10)
+        _append(history, ["A"], timestamp=100)
+        _append(history, ["A"], timestamp=50)
+        _append(history, ["A"], timestamp=101)
+        
+        assert _seqs(history.query(since=100)[0]) == [2, 1, 0]
+        assert _seqs(history.query(until=100)[0]) == [1, 0]
+    
+    def test_wall_clock_stepped_back(self, monkeypatch):
+        history = _history(10)
+        clock = iter([1000.0, 1001.0, 900.0, 901.0, 1002.0])
+        monkeypatch.setattr(ring_buffer.time, "time", lambda: next(clock))
+        for _ in range(5):
+            _append(history, ["A"])
+        
+        # Without clamping the step back would hide entries from the binary search
+        assert _seqs(history.query(since=1001)[0]) == [4, 3, 2, 1]
+        assert _seqs(history.query(until=1000.5)[0]) == [0]
+    
+    def test_shared_history_matches(self, tmp_path):
+        history = SQLiteStateStore(str(tmp_path / "state.db")).history("h", 10, {"agent": lambda e: e["agents_run"]})
+        _append(history, ["A"], timestamp=100)
+        _append(history, ["A"], timestamp=50)
+        _append(history, ["A"], timestamp=101)
+        
+        assert _seqs(history.query(since=100)[0]) == [2, 1, 0]
+        assert _seqs(history.query(until=100)[0]) == [1, 0]
@@ -0,0 +1,112 @@
+"""
+ParentController.run_agents: first_n and concurrency caps
+"""
+
+import asyncio
+
+from agents.parent_controller import BaseAgent, ParentController
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore
+
+
+class _Tracker:
+    """Running and peak concurrent agent runs, shared by pooled clones"""
+    
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+
+class TrackedAgent(BaseAgent):
+    def __init__(self, name, tracker, delay=0.02, gate=None):
+        super().__init__(name)
+        self.tracker = tracker
+        self.delay = delay
+        self.gate = gate
+    
+    async def run(self, prompt, context, deadline=None):
+        self.tracker.running += 1
+        self.tracker.peak = max(self.tracker.peak, self.tracker.running)
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            else:
+                await asyncio.sleep(self.delay)
+        finally:
+            self.tracker.running -= 1
+        return self._build_result(prompt, context)
+
+
+def _controller(**kwargs) -> ParentController:
+    return ParentController(state=LocalStateStore(), database=InMemoryDatabase(LocalStateStore()), **kwargs)
+
+
+class TestFirstN:
+    def test_returns_every_agent_finishing_together(self):
+        controller = _controller()
+        tracker = _Tracker()
+        
+        async def run():
+            gate = asyncio.Event()
+            await controller.register_agent("a", TrackedAgent("a", tracker, gate=gate))
+            await controller.register_agent("b", TrackedAgent("b", tracker, gate=gate))
+            await controller.register_agent("slow", TrackedAgent("slow", tracker, delay=10))
+            request = asyncio.ensure_future(controller.run_agents("p", {}, first_n=1))
+            await asyncio.sleep(0.02)
+            gate.set()
+            results = await asyncio.wait_for(request, 1)
+            await asyncio.sleep(0)
+            return results
+        results = asyncio.run(run())
+        
+        assert sorted(r["agent"] for r in results) == ["a", "b"]
+        assert tracker.running == 0
+    
+    def test_stops_after_first_n_successes(self):
+        controller = _controller()
+        tracker = _Tracker()
+        
+        async def run():
+            for name, delay in [("fast", 0.01), ("mid", 0.05), ("slow", 10)]:
+                await controller.register_agent(name, TrackedAgent(name, tracker, delay=delay))
+            return await asyncio.wait_for(controller.run_agents("p", {}, first_n=2), 1)
+        results = asyncio.run(run())
+        
+        assert [r["agent"] for r in results] == ["fast", "mid"]
+
+
+class TestConcurrencyCaps:
+    def _peak(self, controller, agents, **kwargs):
+        tracker = _Tracker()
+        
+        async def run():
+            for i in range(agents):
+                await controller.register_agent(f"a{i}", TrackedAgent(f"a{i}", tracker))
+            return await controller.run_agents("p", {}, **kwargs)
+        results = asyncio.run(run())
+        assert [r["status"] for r in results] == ["success"] * agents
+        return tracker.peak
+    
+    def test_per_request_cap(self):
+        assert self._peak(_controller(), 5, max_concurrency=2) == 2
+    
+    def test_per_request_cap_is_bounded_by_max_agents(self):
+        controller = _controller(max_agents_per_request=3)
+        
+        assert self._peak(controller, 5, max_concurrency=10) == 3
+    
+    def test_global_cap_across_requests(self):
+        controller = _controller(max_concurrent_runs=3)
+        tracker = _Tracker()
+        
+        async def run():
+            for i in range(4):
+                await controller.register_agent(f"a{i}", TrackedAgent(f"a{i}", tracker))
+            return await asyncio.gather(
+                controller.run_agents("p", {}, max_concurrency=2),
+                controller.run_agents("q", {}, max_concurrency=2),
+            )
+        first, second = asyncio.run(run())
+        
+        assert len(first) == len(second) == 4
+        assert tracker.peak == 3
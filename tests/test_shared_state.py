@@ -0,0 +1,85 @@
+"""
+Two workers sharing one SQLite state file
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+from agents.parent_controller import BaseAgent, ParentController
+from utils.database import InMemoryDatabase
+from utils.shared_state import LocalStateStore, SQLiteStateStore
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+def _worker(path: str) -> ParentController:
+    return ParentController(
+        state=SQLiteStateStore(path), sync_interval=0.02, database=InMemoryDatabase(LocalStateStore())
+    )
+
+
+class TestTwoWorkers:
+    def test_registration_and_upgrades_reach_the_other_worker(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        
+        async def run():
+            first, second = _worker(path), _worker(path)
+            await first.startup()
+            await second.startup()
+            try:
+                registered = await first.register_agent("X", BaseAgent("X"))
+                await asyncio.sleep(0.1)
+                seen = list(second.get_snapshot()["agents"])
+                
+                request = await second.request_upgrade("u", "faster")
+                await asyncio.sleep(0.1)
+                counts = first.get_snapshot()["upgrade_requests"]
+                approved = await first.approve_upgrade(request["id"])
+                
+                removed = await second.unregister_agent("X")
+                await asyncio.sleep(0.1)
+                remaining = list(first.get_snapshot()["agents"])
+                return registered, seen, counts, approved, removed, remaining
+            finally:
+                first.shutdown()
+                second.shutdown()
+        registered, seen, counts, approved, removed, remaining = asyncio.run(run())
+        
+        assert registered["total_agents"] == 1
+        assert seen == ["X"]
+        assert counts["pending"] == 1
+        assert approved["status"] == "approved"
+        assert removed["status"] == "unregistered"
+        assert remaining == []
+    
+    def test_unregistering_unknown_agent_is_an_error(self, tmp_path):
+        worker = _worker(str(tmp_path / "state.db"))
+        
+        assert "error" in asyncio.run(worker.unregister_agent("nobody"))
+        worker.shutdown()
+    
+    def test_registration_from_another_process(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        script = textwrap.dedent(f"""
+            import asyncio
+            from agents.parent_controller import BaseAgent, ParentController
+            from utils.shared_state import SQLiteStateStore
+            controller = ParentController(state=SQLiteStateStore({path!r}))
+            asyncio.run(controller.register_agent("Remote", BaseAgent("Remote")))
+            controller.shutdown()
+        """)
+        
+        async def run():
+            worker = _worker(path)
+            await worker.startup()
+            try:
+                subprocess.run([sys.executable, "-c", script], cwd=BACKEND, check=True, timeout=60)
+                await asyncio.sleep(0.1)
+                return list(worker.get_snapshot()["agents"])
+            finally:
+                worker.shutdown()
+        
+        assert asyncio.run(run()) == ["Remote"]
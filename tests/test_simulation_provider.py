@@ -0,0 +1,134 @@
+"""
+Simulation provider: latency distributions, failure rates and streaming
+"""
+
+import asyncio
+import statistics
+
+import pytest
+
+from tools.llm_provider import LLMProvider
+from tools.simulation_provider import SimulationProvider
+from utils.exceptions import LLMProviderException
+
+
+def _quantile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(pct / 100 * (len(ordered) - 1))]
+
+
+async def _outcomes(simulator: SimulationProvider, n: int):
+    """Count how n requests end: ok, error or timeout"""
+    counts = {"ok": 0, "error": 0, "timeout": 0}
+    for _ in range(n):
+        try:
+            await simulator.generate("p")
+            counts["ok"] += 1
+        except LLMProviderException:
+            counts["error"] += 1
+        except asyncio.TimeoutError:
+            counts["timeout"] += 1
+    return counts
+
+
+class TestLatency:
+    def test_fixed(self):
+        simulator = SimulationProvider(distribution="fixed", latency_median_ms=150)
+        
+        assert {simulator.sample_latency() for _ in range(10)} == {0.15}
+    
+    def test_lognormal_median_and_tail(self):
+        simulator = SimulationProvider(latency_median_ms=200, latency_sigma=0.5, seed=1)
+        samples = [simulator.sample_latency() for _ in range(5000)]
+        
+        assert statistics.median(samples) == pytest.approx(0.2, rel=0.05)
+        # p95 of a lognormal is median * exp(1.645 * sigma)
+        assert _quantile(samples, 95) == pytest.approx(0.2 * 2.276, rel=0.1)
+    
+    def test_percentile_table(self):
+        table = {"50": 100, "95": 500, "99": 2000}
+        simulator = SimulationProvider(distribution="percentiles", latency_percentiles=table, seed=1)
+        samples = [simulator.sample_latency() for _ in range(5000)]
+        
+        assert _quantile(samples, 50) == pytest.approx(0.1, rel=0.05)
+        # Linear between the listed points: p90 is 8/9 of the way from 100 to 500 ms
+        assert _quantile(samples, 90) == pytest.approx(0.1 + 0.4 * 40 / 45, rel=0.05)
+        assert max(samples) == 2.0
+    
+    def test_percentile_interpolation(self):
+        simulator = SimulationProvider(distribution="percentiles", latency_percentiles={"50": 100, "90": 300})
+        
+        assert simulator._interpolate_percentile(25) == 50
+        assert simulator._interpolate_percentile(70) == 200
+        assert simulator._interpolate_percentile(99) == 300
+    
+    def test_seed_makes_runs_reproducible(self):
+        first = SimulationProvider(seed=7)
+        second = SimulationProvider(seed=7)
+        
+        assert [first.sample_latency() for _ in range(5)] == [second.sample_latency() for _ in range(5)]
+    
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            SimulationProvider(distribution="uniform")
+
+
+class TestFailures:
+    def test_error_and_timeout_rates(self):
+        simulator = SimulationProvider(
+            distribution="fixed", latency_median_ms=0, error_rate=0.2, timeout_rate=0.1, timeout=0, seed=3
+        )
+        
+        counts = asyncio.run(_outcomes(simulator, 2000))
+        
+        assert counts["error"] == pytest.approx(400, abs=60)
+        assert counts["timeout"] == pytest.approx(200, abs=45)
+        stats = simulator.get_stats()
+        assert (stats["requests"], stats["errors"], stats["timeouts"]) == (2000, counts["error"], counts["timeout"])
+    
+    def test_no_failures_by_default(self):
+        simulator = SimulationProvider(distribution="fixed", latency_median_ms=0)
+        
+        assert asyncio.run(_outcomes(simulator, 200)) == {"ok": 200, "error": 0, "timeout": 0}
+    
+    def test_stream_fails_before_the_first_token(self):
+        simulator = SimulationProvider(distribution="fixed", latency_median_ms=0, error_rate=1.0)
+        
+        async def run():
+            chunks = []
+            with pytest.raises(LLMProviderException):
+                async for chunk in simulator.stream("p"):
+                    chunks.append(chunk)
+            return chunks
+        chunks = asyncio.run(run())
+        
+        assert chunks == []
+
+
+class TestResponses:
+    def test_stream_cadence_and_result(self):
+        simulator = SimulationProvider(
+            distribution="fixed", latency_median_ms=0, token_interval_ms=0, completion_tokens=3
+        )
+        
+        async def run():
+            return [chunk async for chunk in simulator.stream("hello")]
+        chunks = asyncio.run(run())
+        
+        tokens = [chunk["text"] for chunk in chunks if chunk["type"] == "token"]
+        assert tokens == ["[Simulated]: hello", " lorem", " ipsum", " dolor"]
+        assert chunks[-1]["result"]["text"] == "".join(tokens)
+    
+    def test_provider_uses_the_simulator(self):
+        provider = LLMProvider({
+            "provider": "simulation",
+            "sim_latency_distribution": "fixed",
+            "sim_latency_median_ms": 0,
+        })
+        
+        result = asyncio.run(provider.generate("hello", use_cache=False))
+        
+        assert provider.providers == ["simulation"]
+        assert result["provider"] == "simulation"
+        assert result["text"].startswith("[Simulated]: hello")
+        assert provider.simulator.get_stats()["requests"] == 1
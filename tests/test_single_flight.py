@@ -0,0 +1,90 @@
+"""
+SingleFlight request coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from tools.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": len(calls)}
+        
+        async def run():
+            return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        results = asyncio.run(run())
+        
+        assert calls == [1]
+        assert results == [{"value": 1}] * 5
+        assert results[0] is not results[1]
+        assert flight.get_stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "cancelled": 0}
+    
+    def test_exception_reaches_every_waiter(self):
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream")
+        
+        async def run():
+            return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        results = asyncio.run(run())
+        
+        assert [type(r) for r in results] == [ValueError] * 3
+        assert flight.in_flight() == 0
+    
+    def test_cancelling_the_leader_keeps_the_call_for_others(self):
+        flight = SingleFlight()
+        
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        async def run():
+            leader = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower, leader.cancelled()
+        result, leader_cancelled = asyncio.run(run())
+        
+        assert result == "done"
+        assert leader_cancelled
+        assert flight.get_stats()["cancelled"] == 0
+    
+    def test_last_waiter_leaving_releases_the_key(self):
+        flight = SingleFlight()
+        started = []
+        
+        async def fetch():
+            started.append(1)
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                # Unwinds slowly, leaving a window for the next caller
+                await asyncio.sleep(0.02)
+                raise
+            return len(started)
+        
+        async def run():
+            first = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await flight.do("k", fetch)
+        result = asyncio.run(run())
+        
+        assert result == 2
+        assert flight.get_stats()["leaders"] == 2
+        assert flight.get_stats()["cancelled"] == 1
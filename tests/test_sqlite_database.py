@@ -0,0 +1,130 @@
+"""
+SQLiteDatabase: persistence, per-call savepoints and concurrent writers
+"""
+
+from concurrent.futures import Future
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from utils.database import SQLiteDatabase, open_database
+
+
+class TestRoundTrip:
+    def test_records_survive_reopening(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        database = open_database(url)
+        user_id = database.create_user("ada", "ada@example.com")
+        conversation_id = database.create_conversation(user_id, "aelira")
+        first = database.add_message(conversation_id, {"text": "hi", "sender": "user"})
+        database.add_messages(conversation_id, [{"text": "hello"}, {"text": "bye"}])
+        execution_id = database.add_execution("aelira", {"status": "running"})
+        assert database.update_execution(execution_id, {"status": "completed"})
+        database.close()
+        
+        reopened = open_database(url)
+        try:
+            assert reopened.get_user(user_id)["username"] == "ada"
+            assert reopened.get_conversation(conversation_id)["agent_id"] == "aelira"
+            messages = reopened.get_messages(conversation_id)
+            assert [m["text"] for m in messages] == ["hi", "hello", "bye"]
+            assert messages[0]["id"] == first
+            assert reopened.get_messages(conversation_id, after=first, limit=1)[0]["text"] == "hello"
+            assert reopened.get_execution(execution_id)["status"] == "completed"
+            assert reopened.get_stats()["total_messages"] == 3
+        finally:
+            reopened.close()
+    
+    def test_failed_write_raises(self, tmp_path):
+        database = SQLiteDatabase(str(tmp_path / "app.db"))
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                database._put("missing_table", "x", {})
+            # The database thread keeps serving later calls
+            assert database.create_user("ada")
+        finally:
+            database.close()
+    
+    def test_call_runs_off_the_event_loop(self, tmp_path):
+        database = SQLiteDatabase(str(tmp_path / "app.db"))
+        
+        async def run():
+            conversation_id = await database.call("create_conversation", "u", "aelira")
+            await database.call("add_message", conversation_id, {"text": "hi"})
+            return await database.call("get_messages", conversation_id)
+        try:
+            assert [m["text"] for m in asyncio.run(run())] == ["hi"]
+        finally:
+            database.close()
+
+
+class TestSavepoints:
+    def test_failing_call_rolls_back_only_itself(self, tmp_path):
+        database = SQLiteDatabase(str(tmp_path / "app.db"))
+        conn = database._connect()
+        
+        def insert(user_id, fail=False):
+            def operation(conn):
+                conn.execute("INSERT INTO users (id, value) VALUES (?, '{}')", (user_id,))
+                if fail:
+                    raise ValueError("boom")
+                return user_id
+            return operation
+        batch = [(insert("a"), Future()), (insert("b", fail=True), Future()), (insert("c"), Future())]
+        database._run_batch(conn, batch)
+        
+        assert batch[0][1].result() == "a"
+        with pytest.raises(ValueError):
+            batch[1][1].result()
+        assert batch[2][1].result() == "c"
+        assert [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")] == ["a", "c"]
+        assert database.transactions == 1
+        conn.close()
+
+
+class TestConcurrentWriters:
+    def test_threads_keep_every_write_in_order(self, tmp_path):
+        database = SQLiteDatabase(str(tmp_path / "app.db"))
+        conversation_id = database.create_conversation("u", "aelira")
+        
+        def write(worker):
+            for i in range(25):
+                database.add_message(conversation_id, {"text": f"{worker}-{i}"})
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            messages = database.get_messages(conversation_id)
+            assert len(messages) == 200
+            for worker in range(8):
+                own = [m["text"] for m in messages if m["text"].startswith(f"{worker}-")]
+                assert own == [f"{worker}-{i}" for i in range(25)]
+        finally:
+            database.close()
+    
+    def test_two_processes_worth_of_connections(self, tmp_path):
+        path = str(tmp_path / "app.db")
+        first, second = SQLiteDatabase(path), SQLiteDatabase(path)
+        conversation_id = first.create_conversation("u", "aelira")
+        
+        def write(database, worker):
+            for i in range(20):
+                database.add_message(conversation_id, {"text": f"{worker}-{i}"})
+        threads = [
+            threading.Thread(target=write, args=(database, worker))
+            for worker, database in enumerate([first, second, first, second])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            assert len(first.get_messages(conversation_id)) == 80
+            assert len(second.get_messages(conversation_id)) == 80
+        finally:
+            first.close()
+            second.close()
@@ -0,0 +1,81 @@
+"""
+Streaming through the simulation provider, and agent responses with and without one
+"""
+
+import asyncio
+
+from agents.parent_controller import BaseAgent
+from tools.llm_provider import LLMProvider
+
+
+def _provider(**config) -> LLMProvider:
+    return LLMProvider({
+        "provider": "simulation",
+        "sim_latency_distribution": "fixed",
+        "sim_latency_median_ms": 1,
+        "sim_token_interval_ms": 0,
+        "sim_completion_tokens": 5,
+        "sim_seed": 1,
+        **config
+    })
+
+
+async def _collect(provider: LLMProvider, prompt: str, **options):
+    return [chunk async for chunk in provider.generate_stream(prompt, **options)]
+
+
+class TestSimulationStreaming:
+    def test_tokens_then_done(self):
+        chunks = asyncio.run(_collect(_provider(), "hello world"))
+        
+        assert [chunk["type"] for chunk in chunks[:-1]] == ["token"] * (len(chunks) - 1)
+        assert chunks[-1]["type"] == "done"
+        result = chunks[-1]["result"]
+        assert result["provider"] == "simulation"
+        assert "".join(chunk["text"] for chunk in chunks[:-1]) == result["text"]
+    
+    def test_stream_matches_generate_shape(self):
+        provider = _provider()
+        chunks = asyncio.run(_collect(provider, "hello"))
+        generated = asyncio.run(provider.generate("hello", use_cache=False))
+        
+        assert set(chunks[-1]["result"]) == set(generated)
+    
+    def test_failed_stream_reports_error(self):
+        chunks = asyncio.run(_collect(_provider(sim_error_rate=1.0), "hello"))
+        
+        assert chunks[-1]["type"] == "error"
+    
+    def test_cached_stream_replays_result(self):
+        provider = _provider(cache_enabled=True)
+        first = asyncio.run(_collect(provider, "hello"))
+        second = asyncio.run(_collect(provider, "hello"))
+        
+        assert [chunk["type"] for chunk in second] == ["token", "done"]
+        assert second[0]["text"] == first[-1]["result"]["text"]
+        assert second[-1]["result"]["metadata"]["cached"] is True
+
+
+class TestAgentResponses:
+    def test_agent_with_provider_answers_through_it(self):
+        agent = BaseAgent("Aelira", llm=LLMProvider({}))
+        result = asyncio.run(agent.run("hello", {}))
+        
+        assert result["response"] == "[Demo echo]: hello"
+        assert result["provider"] == "demo_mode"
+    
+    def test_agent_without_provider_keeps_the_processed_response(self):
+        result = asyncio.run(BaseAgent("Aelira").run("hello", {}))
+        
+        assert result["response"] == "[Aelira] processed: hello..."
+        assert "provider" not in result
+    
+    def test_stream_and_run_give_the_same_response(self):
+        agent = BaseAgent("Aelira", llm=LLMProvider({}))
+        
+        async def run():
+            return [event async for event in agent.run_stream("hello there", {})]
+        events = asyncio.run(run())
+        
+        tokens = "".join(event["text"] for event in events if event["type"] == "token")
+        assert tokens == events[-1]["result"]["response"] == "[Demo echo]: hello there"
@@ -0,0 +1,80 @@
+"""
+Token counting and context-window budgeting
+"""
+
+import pytest
+
+from tools import tokenizer
+from tools.tokenizer import ContextWindowExceeded, context_window, count_tokens, fit_prompt
+
+
+def _words(n: int) -> str:
+    return " ".join(f"w{i % 10}" for i in range(n))
+
+
+class TestCountTokens:
+    def test_heuristic_counts(self):
+        assert count_tokens("", "demo-v1") == 0
+        assert count_tokens("hello, world", "demo-v1") == 3
+        assert count_tokens("internationalization", "demo-v1") == 5
+    
+    def test_cache_keeps_digests_not_text(self):
+        text = "remember me " * 1000
+        count_tokens(text, "demo-v1")
+        
+        assert all(len(digest) == 16 for _, digest in tokenizer._counts)
+        assert ("demo-v1", text) not in tokenizer._counts
+    
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(tokenizer, "COUNT_CACHE_SIZE", 3)
+        monkeypatch.setattr(tokenizer, "_counts", tokenizer.OrderedDict())
+        for i in range(5):
+            count_tokens(f"text {i}", "demo-v1")
+        
+        assert len(tokenizer._counts) == 3
+    
+    def test_same_text_counts_per_model(self, monkeypatch):
+        calls = []
+        real = tokenizer.HeuristicTokenizer.count
+        
+        def count(self, text):
+            calls.append(text)
+            return real(self, text)
+        monkeypatch.setattr(tokenizer, "_counts", tokenizer.OrderedDict())
+        monkeypatch.setattr(tokenizer.HeuristicTokenizer, "count", count)
+        count_tokens("same text", "demo-v1")
+        count_tokens("same text", "demo-v1")
+        count_tokens("same text", "other-model")
+        
+        assert calls == ["same text", "same text"]
+
+
+class TestFitPrompt:
+    def test_prompt_within_window_is_unchanged(self):
+        prompt = _words(100)
+        
+        assert fit_prompt(prompt, "demo-v1") == (prompt, 100, False)
+    
+    def test_truncate_keeps_the_newest_tokens(self):
+        prompt = "start " + _words(5000)
+        trimmed, tokens, truncated = fit_prompt(prompt, "demo-v1", max_completion_tokens=96)
+        
+        assert truncated
+        assert tokens <= context_window("demo-v1") - 96
+        assert not trimmed.startswith("start")
+        assert prompt.endswith(trimmed)
+    
+    def test_reject_policy_raises(self):
+        with pytest.raises(ContextWindowExceeded):
+            fit_prompt(_words(5000), "demo-v1", policy="reject")
+    
+    def test_completion_reservation_larger_than_window_raises(self):
+        with pytest.raises(ContextWindowExceeded):
+            fit_prompt("hi", "demo-v1", max_completion_tokens=5000)
+    
+    def test_window_override(self):
+        assert context_window("my-finetune", {"my-finetune": 10}) == 10
+        trimmed, tokens, truncated = fit_prompt(_words(50), "my-finetune", window=10)
+        
+        assert truncated
+        assert tokens == 10